@@ -1,6 +1,7 @@
 from bc4py.config import V, stream, BlockChainError
-from bc4py.chain.checking.checkblock import check_block, check_block_time
+from bc4py.chain.checking.checkblock import check_block, check_block_time, is_assumed_valid
 from bc4py.chain.checking.checktx import check_tx, check_tx_time
+from bc4py.chain.checking.context import BlockValidationContext
 from bc4py.chain.signature import fill_verified_addr_single
 from bc4py.database.create import create_db
 from bc4py.database.builder import chain_builder, user_account
@@ -27,10 +28,13 @@ async def new_insert_block(block, f_time=True, f_sign=True):
             if f_time:
                 check_block_time(block, fixed_delay)
             check_block(block)
-            if f_sign:
+            f_assumed = is_assumed_valid(block)
+            if f_sign and not f_assumed:
                 await fill_verified_addr_single(block)
+            # inputs are resolved once and shared by txs of the block
+            context = BlockValidationContext(block, assume_valid=f_assumed)
             for tx in block.txs:
-                check_tx(tx=tx, include_block=block)
+                check_tx(tx=tx, include_block=block, context=context)
                 if f_time:
                     check_tx_time(tx)
             # Recode
@@ -61,6 +65,8 @@ __all__ = [
     "new_insert_block",
     "check_block",
     "check_block_time",
+    "is_assumed_valid",
     "check_tx",
     "check_tx_time",
+    "BlockValidationContext",
 ]
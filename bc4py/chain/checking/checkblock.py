@@ -2,6 +2,7 @@ from bc4py.config import C, V, BlockChainError
 from bc4py.chain.block import Block
 from bc4py.chain.difficulty import get_bits_by_hash
 from bc4py.database.builder import chain_builder
+from bc4py_extension import merkleroot_hash
 from logging import getLogger
 from time import time
 
@@ -17,9 +18,29 @@ def check_block(block: Block):
     bits = get_bits_by_hash(previous_hash=block.previous_hash, consensus=block.flag)[0]
     if block.bits != bits:
         raise BlockChainError('Block bits differ from calc. [{}!={}]'.format(block.bits, bits))
+    merkleroot = merkleroot_hash([tx.hash for tx in block.txs])
+    if block.merkleroot != merkleroot:
+        raise BlockChainError('Block merkleroot differ from txs. [{}!={}]'.format(
+            block.merkleroot.hex(), merkleroot.hex()))
+    # checkpoints and assume-valid block
+    checkpoint = V.BLOCK_CHECKPOINTS.get(block.height)
+    if checkpoint is not None and block.hash != checkpoint:
+        raise BlockChainError('Block differ from checkpoint height={} [{}!={}]'.format(
+            block.height, block.hash.hex(), checkpoint.hex()))
+    if block.height == V.ASSUME_VALID_HEIGHT and block.hash != V.ASSUME_VALID_HASH:
+        raise BlockChainError('Block differ from assume-valid height={} [{}!={}]'.format(
+            block.height, block.hash.hex(), V.ASSUME_VALID_HASH.hex()))
     log.debug("check block success {}".format(block))
 
 
+def is_assumed_valid(block: Block) -> bool:
+    """
+    block is the assume-valid block or an ancestor, signature checks are skipped
+    note: ancestors are listed by verified header chain, a fork block under the height is checked
+    """
+    return V.ASSUME_VALID_CHAIN.get(block.height) == block.hash
+
+
 def check_block_time(block: Block, fix_delay):
     # 新規受け入れ時のみ検査
     delay = int(time() - fix_delay) - block.create_time
@@ -4,6 +4,7 @@ from bc4py.chain.block import Block
 from bc4py.chain.checking.tx_reward import *
 from bc4py.chain.checking.tx_mintcoin import *
 from bc4py.chain.checking.utils import *
+from bc4py.chain.checking.context import get_tx_position
 from logging import getLogger
 from time import time
 import hashlib
@@ -12,7 +13,7 @@ import hashlib
 log = getLogger('bc4py')
 
 
-def check_tx(tx, include_block):
+def check_tx(tx, include_block, context=None):
     # TXの正当性チェック
     f_inputs_origin_check = True
     f_amount_check = True
@@ -24,16 +25,17 @@ def check_tx(tx, include_block):
     # 共通検査
     if include_block:
         # tx is included block
-        if tx not in include_block.txs:
+        position = get_tx_position(tx, include_block, context)
+        if position is None:
             raise BlockChainError('Block not include the tx')
         elif not (tx.time <= include_block.time <= tx.deadline):
             raise BlockChainError('block time isn\'t include in TX time-deadline. [{}<={}<={}]'.format(
                 tx.time, include_block.time, tx.deadline))
-        if 0 == include_block.txs.index(tx):
+        if 0 == position:
             if tx.type not in (C.TX_POS_REWARD, C.TX_POW_REWARD):
                 raise BlockChainError('tx index is zero, but not proof tx')
         elif tx.type in (C.TX_POS_REWARD, C.TX_POW_REWARD):
-            raise BlockChainError('{} index is not 0 idx:{}'.format(tx, include_block.txs.index(tx)))
+            raise BlockChainError('{} index is not 0 idx:{}'.format(tx, position))
 
     # 各々のタイプで検査
     if tx.type == C.TX_GENESIS:
@@ -44,11 +46,11 @@ def check_tx(tx, include_block):
         f_minimum_fee_check = False
         # TODO: POS tx need Multisig? f_signature_check
         if include_block.flag == C.BLOCK_COIN_POS:
-            check_tx_pos_reward(tx=tx, include_block=include_block)
+            check_tx_pos_reward(tx=tx, include_block=include_block, context=context)
         elif include_block.flag == C.BLOCK_CAP_POS:
             f_signature_check = False
             f_inputs_origin_check = False
-            check_tx_poc_reward(tx=tx, include_block=include_block)
+            check_tx_poc_reward(tx=tx, include_block=include_block, context=context)
         elif include_block.flag == C.BLOCK_FLK_POS:
             raise BlockChainError("unimplemented")
         else:
@@ -58,7 +60,7 @@ def check_tx(tx, include_block):
         f_amount_check = False
         f_signature_check = False
         f_minimum_fee_check = False
-        check_tx_pow_reward(tx=tx, include_block=include_block)
+        check_tx_pow_reward(tx=tx, include_block=include_block, context=context)
 
     elif tx.type == C.TX_TRANSFER:
         if not (0 < len(tx.inputs) < 256 and 0 < len(tx.outputs) < 256):
@@ -70,26 +72,28 @@ def check_tx(tx, include_block):
         f_amount_check = False
         f_minimum_fee_check = False
         f_signature_check = False
-        check_tx_mint_coin(tx=tx, include_block=include_block)
+        check_tx_mint_coin(tx=tx, include_block=include_block, context=context)
 
     else:
         raise BlockChainError('Unknown tx type "{}"'.format(tx.type))
 
     # Inputs origin チェック
     if f_inputs_origin_check:
-        inputs_origin_check(tx=tx, include_block=include_block)
+        inputs_origin_check(tx=tx, include_block=include_block, context=context)
 
     # 残高移動チェック
     if f_amount_check:
-        amount_check(tx=tx, payfee_coin_id=payfee_coin_id, include_block=include_block)
+        amount_check(tx=tx, payfee_coin_id=payfee_coin_id, include_block=include_block, context=context)
 
     # 署名チェック
-    if f_signature_check:
-        signature_check(tx=tx, include_block=include_block)
+    f_assumed = context is not None and context.assume_valid
+    if f_signature_check and not f_assumed:
+        signature_check(tx=tx, include_block=include_block, context=context)
 
     # hash-locked check
     if tx.message_type == C.MSG_HASHLOCKED:
-        check_hash_locked(tx=tx)
+        if not f_assumed:
+            check_hash_locked(tx=tx)
     else:
         if tx.R != b'':
             raise BlockChainError('Not hash-locked tx R={}'.format(tx.R))
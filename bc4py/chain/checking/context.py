@@ -0,0 +1,83 @@
+from bc4py.chain.tx import TX
+from bc4py.database.tools import get_output_from_input
+from bc4py_extension import PyAddress
+from typing import Dict, Tuple, List, Optional
+
+
+class BlockValidationContext(object):
+    """
+    status of a block shared by checks of the txs, build once per block
+
+    "positions" is txhash -> index of the tx in the block, first one if duplicated
+    "total_fee" is sum of gas fee of all txs, paid to the proof tx
+    "spenders" is outpoint -> txs of the block using it, find double spends in the block
+    "outputs" is block-local view of resolved inputs, None if not found
+    "assume_valid" skip signature and hash-locked checks, but inputs and amounts are checked
+    note: inputs are resolved with the block as best_block, do not reuse after chain changed
+    """
+    __slots__ = ("block", "assume_valid", "positions", "total_fee", "spenders", "outputs")
+
+    def __init__(self, block, assume_valid=False):
+        self.block = block
+        self.assume_valid = assume_valid
+        self.positions: Dict[bytes, int] = dict()
+        self.total_fee = 0
+        self.spenders: Dict[Tuple[bytes, int], List[TX]] = dict()
+        self.outputs: Dict[Tuple[bytes, int], Optional[Tuple[PyAddress, int, int]]] = dict()
+        for index, tx in enumerate(block.txs):
+            if tx.hash not in self.positions:
+                self.positions[tx.hash] = index
+            self.total_fee += tx.gas_price * tx.gas_amount
+            for pair in tx.inputs:
+                if pair in self.spenders:
+                    self.spenders[pair].append(tx)
+                else:
+                    self.spenders[pair] = [tx]
+
+    def __repr__(self):
+        return "<BlockValidationContext {} outputs={}>".format(self.block, len(self.outputs))
+
+    def get_output(self, txhash, txindex) -> Optional[Tuple[PyAddress, int, int]]:
+        """resolve an input once and return (address, coin_id, amount) or None"""
+        pair = (txhash, txindex)
+        if pair in self.outputs:
+            return self.outputs[pair]
+        output = get_output_from_input(txhash, txindex, best_block=self.block)
+        self.outputs[pair] = output
+        return output
+
+    def get_other_spender(self, tx, pair) -> Optional[TX]:
+        """first tx of the block using same input except the tx"""
+        for input_tx in self.spenders.get(pair, ()):
+            if input_tx is not tx:
+                return input_tx
+        return None
+
+
+def get_tx_position(tx, include_block, context=None) -> Optional[int]:
+    """index of the tx in the block, None if not included"""
+    if context is None:
+        return include_block.txs.index(tx) if tx in include_block.txs else None
+    return context.positions.get(tx.hash)
+
+
+def get_total_fee(include_block, context=None) -> int:
+    """sum of gas fee of the block txs"""
+    if context is None:
+        return sum(tx.gas_price * tx.gas_amount for tx in include_block.txs)
+    return context.total_fee
+
+
+def get_input_output(txhash, txindex, include_block, context=None):
+    """resolve an input by the context if given"""
+    if context is None:
+        return get_output_from_input(txhash, txindex, best_block=include_block)
+    return context.get_output(txhash, txindex)
+
+
+__all__ = [
+    "BlockValidationContext",
+    "get_tx_position",
+    "get_total_fee",
+    "get_input_output",
+]
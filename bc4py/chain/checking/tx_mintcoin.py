@@ -1,16 +1,17 @@
 from bc4py.config import C, BlockChainError
 from bc4py.database.mintcoin import *
 from bc4py.database.tools import get_output_from_input
+from bc4py.chain.checking.context import get_tx_position
 from bc4py.user import Balance
 from bc4py_extension import PyAddress
 
 
-def check_tx_mint_coin(tx, include_block):
+def check_tx_mint_coin(tx, include_block, context=None):
     if not (0 < len(tx.inputs) and 0 < len(tx.outputs)):
         raise BlockChainError('Input and output is more than 1')
     elif tx.message_type != C.MSG_MSGPACK:
         raise BlockChainError('TX_MINT_COIN message is bytes')
-    elif include_block and 0 == include_block.txs.index(tx):
+    elif include_block and 0 == get_tx_position(tx, include_block, context):
         raise BlockChainError('tx index is not proof tx')
     elif tx.gas_amount < tx.size + len(tx.signature) * C.SIGNATURE_GAS + C.MINTCOIN_GAS:
         raise BlockChainError('Insufficient gas amount [{}<{}+{}+{}]'.format(tx.gas_amount, tx.size,
@@ -30,7 +31,8 @@ def check_tx_mint_coin(tx, include_block):
     if m_before.address:
         require_cks.add(PyAddress.from_string(m_before.address))
     signed_cks = set(tx.verified_list)
-    if signed_cks != require_cks:
+    f_assumed = context is not None and context.assume_valid
+    if not f_assumed and signed_cks != require_cks:
         raise BlockChainError('Signature check failed. signed={} require={} lack={}'.format(
             signed_cks, require_cks, require_cks - signed_cks))
     # amount check
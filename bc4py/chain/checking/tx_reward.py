@@ -3,13 +3,13 @@ from bc4py.config import C, BlockChainError
 from bc4py_extension import poc_hash, poc_work, scope_index
 from bc4py.chain.utils import GompertzCurve
 from bc4py.chain.checking.utils import stake_coin_check, is_mature_input
-from bc4py.database.tools import get_output_from_input
+from bc4py.chain.checking.context import get_tx_position, get_total_fee, get_input_output
 
 
-def check_tx_pow_reward(tx, include_block):
+def check_tx_pow_reward(tx, include_block, context=None):
     if not (len(tx.inputs) == 0 and len(tx.outputs) > 0):
         raise BlockChainError('Inout is 0, output is more than 1')
-    elif include_block.txs.index(tx) != 0:
+    elif get_tx_position(tx, include_block, context) != 0:
         raise BlockChainError('Proof tx is index 0')
     elif not (tx.gas_price == 0 and tx.gas_amount == 0):
         raise BlockChainError('Pow gas info is wrong. [{}, {}]'.format(tx.gas_price, tx.gas_amount))
@@ -26,7 +26,7 @@ def check_tx_pow_reward(tx, include_block):
     # allow many outputs for PoW reward distribution
     extra_output_fee = (len(tx.outputs) - 1) * C.EXTRA_OUTPUT_REWARD_FEE
     reward = GompertzCurve.calc_block_reward(include_block.height)
-    income_fee = sum(tx.gas_amount * tx.gas_price for tx in include_block.txs)
+    income_fee = get_total_fee(include_block, context)
 
     if not (include_block.time == tx.time == tx.deadline - 10800):
         raise BlockChainError('TX time is wrong 3. [{}={}={}-10800]'.format(include_block.time, tx.time,
@@ -36,11 +36,11 @@ def check_tx_pow_reward(tx, include_block):
                               .format(total_output_amount, reward, income_fee, extra_output_fee))
 
 
-def check_tx_pos_reward(tx, include_block):
+def check_tx_pos_reward(tx, include_block, context=None):
     # POS報酬TXの検査
     if not (len(tx.inputs) == len(tx.outputs) == 1):
         raise BlockChainError('Inputs and outputs is only 1 len')
-    elif include_block.txs.index(tx) != 0:
+    elif get_tx_position(tx, include_block, context) != 0:
         raise BlockChainError('Proof tx is index 0')
     elif include_block.version != 0:
         raise BlockChainError('pos block version is 0')
@@ -52,7 +52,7 @@ def check_tx_pos_reward(tx, include_block):
     txhash, txindex = tx.inputs[0]
     if not is_mature_input(base_hash=txhash, limit_height=include_block.height - C.MATURE_HEIGHT):
         raise BlockChainError('Source is not mature, {} {}'.format(include_block.height, txhash.hex()))
-    base_pair = get_output_from_input(txhash, txindex, best_block=include_block)
+    base_pair = get_input_output(txhash, txindex, include_block, context)
     if base_pair is None:
         raise BlockChainError('Not found PosBaseTX:{} of {}'.format(txhash.hex(), tx))
     input_address, input_coin_id, input_amount = base_pair
@@ -78,10 +78,10 @@ def check_tx_pos_reward(tx, include_block):
         raise BlockChainError('Proof of stake check is failed')
 
 
-def check_tx_poc_reward(tx, include_block):
+def check_tx_poc_reward(tx, include_block, context=None):
     if not (len(tx.inputs) == 0 and len(tx.outputs) == 1):
         raise BlockChainError('inputs is 0 and outputs is 1')
-    elif include_block.txs.index(tx) != 0:
+    elif get_tx_position(tx, include_block, context) != 0:
         raise BlockChainError('Proof tx is index 0')
     elif not (tx.gas_price == 0 and tx.gas_amount == 0):
         raise BlockChainError('PoC gas info is wrong. [{}, {}]'.format(tx.gas_price, tx.gas_amount))
@@ -92,7 +92,7 @@ def check_tx_poc_reward(tx, include_block):
 
     o_address, o_coin_id, o_amount = tx.outputs[0]
     reward = GompertzCurve.calc_block_reward(include_block.height)
-    total_fee = sum(tx.gas_price * tx.gas_amount for tx in include_block.txs)
+    total_fee = get_total_fee(include_block, context)
     include_block.bits2target()
 
     if o_coin_id != 0:
@@ -117,6 +117,8 @@ def check_tx_poc_reward(tx, include_block):
                                                                               include_block.target_hash.hex()))
 
     # signature check
+    if context is not None and context.assume_valid:
+        return
     signed_cks = set(tx.verified_list)
     if len(signed_cks) != 1:
         raise BlockChainError('PoC signature num is wrong num={}'.format(len(signed_cks)))
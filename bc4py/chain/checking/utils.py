@@ -1,12 +1,13 @@
 from bc4py.config import C, V, BlockChainError
 from bc4py.bip32 import is_address
 from bc4py.database.builder import chain_builder, tx_builder
-from bc4py.database.tools import is_unused_index, get_output_from_input
+from bc4py.database.tools import is_unused_index
+from bc4py.chain.checking.context import get_input_output
 from bc4py.user import Balance
 from hashlib import sha256
 
 
-def inputs_origin_check(tx, include_block):
+def inputs_origin_check(tx, include_block, context=None):
     """check the TX inputs for inconsistencies"""
     # check if the same input is used in same tx
     if len(tx.inputs) != len(set(tx.inputs)):
@@ -14,7 +15,7 @@ def inputs_origin_check(tx, include_block):
 
     limit_height = chain_builder.best_block.height - C.MATURE_HEIGHT
     for txhash, txindex in tx.inputs:
-        pair = get_output_from_input(input_hash=txhash, input_index=txindex, best_block=include_block)
+        pair = get_input_output(txhash, txindex, include_block, context)
         if pair is None:
             raise BlockChainError('Not found input tx. {}:{}'.format(txhash.hex(), txindex))
 
@@ -36,7 +37,11 @@ def inputs_origin_check(tx, include_block):
             raise BlockChainError('1 Input of {} is already used! {}:{}'.format(tx, txhash.hex(), txindex))
 
         # check if the same input is used by another tx in block
-        if include_block:
+        if context:
+            input_tx = context.get_other_spender(tx, (txhash, txindex))
+            if input_tx is not None:
+                raise BlockChainError('2 Input of {} is already used by {}'.format(tx, input_tx))
+        elif include_block:
             for input_tx in include_block.txs:
                 if input_tx is tx:
                     continue
@@ -45,12 +50,12 @@ def inputs_origin_check(tx, include_block):
                         raise BlockChainError('2 Input of {} is already used by {}'.format(tx, input_tx))
 
 
-def amount_check(tx, payfee_coin_id, include_block):
+def amount_check(tx, payfee_coin_id, include_block, context=None):
     """check tx sum of inputs and outputs amount"""
     # Inputs
     input_coins = Balance()
     for txhash, txindex in tx.inputs:
-        pair = get_output_from_input(input_hash=txhash, input_index=txindex, best_block=include_block)
+        pair = get_input_output(txhash, txindex, include_block, context)
         if pair is None:
             raise BlockChainError('Not found input tx {}'.format(txhash.hex()))
         address, coin_id, amount = pair
@@ -73,12 +78,12 @@ def amount_check(tx, payfee_coin_id, include_block):
             remain_amount, input_coins, output_coins, fee_coins))
 
 
-def signature_check(tx, include_block):
+def signature_check(tx, include_block, context=None):
     require_cks = set()
     checked_cks = set()
     signed_cks = set(tx.verified_list)
     for txhash, txindex in tx.inputs:
-        pair = get_output_from_input(txhash, txindex, best_block=include_block)
+        pair = get_input_output(txhash, txindex, include_block, context)
         if pair is None:
             raise BlockChainError('Not found input tx {}'.format(txhash.hex()))
         address, coin_id, amount = pair
@@ -109,20 +114,23 @@ def stake_coin_check(tx, previous_hash, target_hash):
 def is_mature_input(base_hash, limit_height) -> bool:
     """proof of stake input must mature same height"""
     # from unconfirmed
-    for tx in tx_builder.unconfirmed.values():
-        if tx.hash == base_hash:
-            return False
+    if base_hash in tx_builder.unconfirmed:
+        return False
 
     # from memory
-    for block in chain_builder.best_chain:
-        if block.height < limit_height:
-            return True
-        for tx in block.txs:
-            if tx.hash == base_hash:
-                return False
+    block = chain_builder.memory_txs.get(base_hash)
+    if block is not None:
+        return block.height < limit_height
 
     # from database
     height = chain_builder.root_block.height
+    if height is None or height < limit_height:
+        return True
+    position = chain_builder.db.read_tx_position(base_hash)
+    if position is not None:
+        return position[0] < limit_height
+    elif chain_builder.db.db_config['txindex']:
+        return True
     while limit_height <= height:
         block = chain_builder.get_block(height=height)
         for tx in block.txs:
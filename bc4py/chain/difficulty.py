@@ -2,6 +2,11 @@ from bc4py.config import C, V, Debug
 from bc4py.database.builder import chain_builder
 from bc4py.chain.utils import bits2target, target2bits
 from functools import lru_cache
+from collections import OrderedDict
+from logging import getLogger
+from typing import Dict, Tuple
+
+log = getLogger('bc4py')
 
 
 # https://github.com/zawy12/difficulty-algorithms/issues/3
@@ -28,6 +33,11 @@ MAX_BITS = 0x1f0fffff
 MAX_TARGET = bits2target(MAX_BITS)
 GENESIS_PREVIOUS_HASH = b'\xff' * 32
 MAX_SEARCH_BLOCKS = 1000
+BIAS_TARGET_BLOCKS = 30
+MAX_WINDOW_CACHE = 2048
+
+# rolling window state of each block {blockhash: (height, {flag: entries})}
+window_cache: 'OrderedDict[bytes, Tuple[int, Dict[int, tuple]]]' = OrderedDict()
 
 
 @lru_cache(maxsize=1024)
@@ -42,7 +52,40 @@ def get_bits_by_hash(previous_hash, consensus):
         return MAX_BITS, MAX_TARGET
     elif previous_hash == GENESIS_PREVIOUS_HASH:
         return MAX_BITS, MAX_TARGET
+    result = get_bits_by_window(previous_hash, consensus)
+    if result is None:
+        # not found header on the way, search by legacy method
+        return get_bits_by_walk(previous_hash, consensus)
+    if Debug.F_CHECK_DIFFICULTY:
+        legacy = get_bits_by_walk(previous_hash, consensus)
+        if result != legacy:
+            log.error("bits mismatch {}!={} consensus={} previous={}".format(
+                result, legacy, consensus, previous_hash.hex()))
+            return legacy
+    return result
+
+
+@lru_cache(maxsize=256)
+def get_bias_by_hash(previous_hash, consensus) -> float:
+    if consensus == C.BLOCK_GENESIS:
+        return 1.0
+    elif previous_hash == GENESIS_PREVIOUS_HASH:
+        return 1.0
+    result = get_bias_by_window(previous_hash, consensus)
+    if result is None:
+        # not found header on the way, search by legacy method
+        return get_bias_by_walk(previous_hash, consensus)
+    if Debug.F_CHECK_DIFFICULTY:
+        legacy = get_bias_by_walk(previous_hash, consensus)
+        if result != legacy:
+            log.error("bias mismatch {}!={} consensus={} previous={}".format(
+                result, legacy, consensus, previous_hash.hex()))
+            return legacy
+    return result
+
 
+def get_lwma_params(consensus):
+    """return LWMA params (N, K) of the consensus"""
     # T=<target solvetime(s)>
     T = round(V.BLOCK_TIME_SPAN / V.BLOCK_CONSENSUSES[consensus] * 100)
 
@@ -58,6 +101,160 @@ def get_bits_by_hash(previous_hash, consensus):
     adjust = 0.9989 ** (500 / N)
     K = int((N + 1) / 2 * adjust * T)
     # Bitcoin_gold T=600, N=45, K=13632
+    return N, K
+
+
+def calc_lwma_bits(previous_hash, consensus, timestamp, target, N, K):
+    """calculate next bits from N+1 timestamps and targets, old to new"""
+    sum_target = t = j = 0
+    for i in range(N):
+        solve_time = max(0, timestamp[i + 1] - timestamp[i])
+        j += 1
+        t += solve_time * j
+        sum_target += target[i + 1]
+
+    # Keep t reasonable in case strange solvetimes occurred.
+    if t < N * K // 3:
+        t = N * K // 3
+
+    new_target = t * sum_target // K // N // N
+    if MAX_TARGET < new_target:
+        return MAX_BITS, MAX_TARGET
+
+    # convert new target to bits
+    new_bits = target2bits(new_target)
+    if Debug.F_SHOW_DIFFICULTY:
+        print("ratio", C.consensus2name[consensus], new_bits, previous_hash.hex())
+    return new_bits, new_target
+
+
+def get_window_size(flag):
+    """entries length of a flag required by both LWMA and bias"""
+    if flag in V.BLOCK_CONSENSUSES:
+        return max(get_lwma_params(flag)[0] + 2, BIAS_TARGET_BLOCKS + 1)
+    else:
+        return BIAS_TARGET_BLOCKS + 1
+
+
+def get_window_state(blockhash):
+    """
+    return rolling window state (height, {flag: entries}) of the block
+
+    entries is tuple of (height, time, target) newest first, derived from parent's state
+    return None when not found header on the way
+    """
+    window = window_cache.get(blockhash)
+    if window is not None:
+        return window
+    # walk back to cached state, genesis or search limit
+    headers = list()
+    window = (None, dict())
+    target_hash = blockhash
+    for _ in range(MAX_SEARCH_BLOCKS):
+        if target_hash in window_cache:
+            window = window_cache[target_hash]
+            break
+        target_block = get_block_from_cache(target_hash)
+        if target_block is None:
+            return None
+        headers.append(target_block)
+        target_hash = target_block.previous_hash
+        if target_hash == GENESIS_PREVIOUS_HASH:
+            break
+    for target_block in reversed(headers):
+        state = window[1].copy()
+        entry = (target_block.height, target_block.time, bits2target(target_block.bits))
+        entries = (entry,) + state.get(target_block.flag, ())
+        state[target_block.flag] = entries[:get_window_size(target_block.flag)]
+        window = (target_block.height, state)
+    window_cache[blockhash] = window
+    while MAX_WINDOW_CACHE < len(window_cache):
+        try:
+            window_cache.popitem(last=False)
+        except KeyError:
+            break
+    return window
+
+
+def get_bits_by_window(previous_hash, consensus):
+    """same result with get_bits_by_walk, derived from rolling window state"""
+    window = get_window_state(previous_hash)
+    if window is None:
+        return None
+    height, state = window
+    N, K = get_lwma_params(consensus)
+    # blocks of the consensus found in last MAX_SEARCH_BLOCKS blocks
+    lowest = height - MAX_SEARCH_BLOCKS + 1
+    entries = [entry for entry in state.get(consensus, ()) if lowest <= entry[0]]
+    if N + 2 <= len(entries):
+        entries = entries[:N + 1]
+    elif height < MAX_SEARCH_BLOCKS - 1:
+        # reach genesis block before finding enough blocks
+        return MAX_BITS, MAX_TARGET
+    elif len(entries) < 2:
+        # not found any mined blocks
+        return MAX_BITS, MAX_TARGET
+    else:
+        # May have been a sudden difficulty raise
+        # overwrite N param
+        N = len(entries) - 1
+    timestamp = [entry[1] for entry in reversed(entries)]
+    target = [entry[2] for entry in reversed(entries)]
+    return calc_lwma_bits(previous_hash, consensus, timestamp, target, N, K)
+
+
+def get_bias_by_window(previous_hash, consensus):
+    """same result with get_bias_by_walk, derived from rolling window state"""
+    window = get_window_state(previous_hash)
+    if window is None:
+        return None
+    height, state = window
+    N = BIAS_TARGET_BLOCKS
+    lowest = height - MAX_SEARCH_BLOCKS + 1
+    entries = [entry for entry in state.get(consensus, ()) if lowest <= entry[0]]
+    entry_heights = {entry[0] for entry in entries}
+    # height of last seen blocks of each flag
+    last_heights = sorted((x[0][0] for x in state.values() if lowest <= x[0][0]), reverse=True)
+
+    # search stops at a block not counted after others_best have enough flags
+    required = len(V.BLOCK_CONSENSUSES) - 1
+    if required <= 0:
+        check_height = height
+    elif required <= len(last_heights):
+        check_height = last_heights[required - 1]
+    else:
+        check_height = None
+    stop_height = None
+    if check_height is not None:
+        while max(lowest, 1) <= check_height:
+            if check_height not in entry_heights:
+                stop_height = check_height
+                break
+            elif N <= sum(1 for entry in entries if check_height < entry[0]):
+                stop_height = check_height
+                break
+            check_height -= 1
+    if stop_height is None:
+        if lowest <= 0:
+            # reach genesis block
+            return 1.0
+        stop_height = lowest
+
+    target_cnt = min(N, sum(1 for entry in entries if stop_height <= entry[0]))
+    if target_cnt == 0:
+        return 1.0
+    target_sum = sum(entry[2] * (N - i) for i, entry in enumerate(entries[:target_cnt]))
+    others_best = [x[0][2] for x in state.values() if stop_height <= x[0][0]]
+    if len(others_best) == 0:
+        return BASE_TARGET * target_cnt / target_sum
+    else:
+        average_target = sum(others_best) // len(others_best)
+        return average_target * target_cnt / target_sum
+
+
+def get_bits_by_walk(previous_hash, consensus):
+    """legacy method, search MAX_SEARCH_BLOCKS headers"""
+    N, K = get_lwma_params(consensus)
 
     # Loop through N most recent blocks.  "< height", not "<=".
     # height-1 = most recently solved rblock
@@ -90,36 +287,12 @@ def get_bits_by_hash(previous_hash, consensus):
             # overwrite N param
             N = len(timestamp) - 1
 
-    sum_target = t = j = 0
-    for i in range(N):
-        solve_time = max(0, timestamp[i + 1] - timestamp[i])
-        j += 1
-        t += solve_time * j
-        sum_target += target[i + 1]
-
-    # Keep t reasonable in case strange solvetimes occurred.
-    if t < N * K // 3:
-        t = N * K // 3
+    return calc_lwma_bits(previous_hash, consensus, timestamp, target, N, K)
 
-    new_target = t * sum_target // K // N // N
-    if MAX_TARGET < new_target:
-        return MAX_BITS, MAX_TARGET
 
-    # convert new target to bits
-    new_bits = target2bits(new_target)
-    if Debug.F_SHOW_DIFFICULTY:
-        print("ratio", C.consensus2name[consensus], new_bits, previous_hash.hex())
-    return new_bits, new_target
-
-
-@lru_cache(maxsize=256)
-def get_bias_by_hash(previous_hash, consensus) -> float:
-    N = 30  # target blocks
-
-    if consensus == C.BLOCK_GENESIS:
-        return 1.0
-    elif previous_hash == GENESIS_PREVIOUS_HASH:
-        return 1.0
+def get_bias_by_walk(previous_hash, consensus) -> float:
+    """legacy method, search MAX_SEARCH_BLOCKS headers"""
+    N = BIAS_TARGET_BLOCKS
 
     target_sum = 0
     target_cnt = 0
@@ -1,7 +1,9 @@
 from bc4py.config import C, V
 from bc4py.bip32 import get_address
 from multi_party_schnorr import verify_auto_multi
+from expiringdict import ExpiringDict
 from logging import getLogger
+from hashlib import sha256
 from os import cpu_count
 from time import time
 import asyncio
@@ -10,6 +12,9 @@ loop = asyncio.get_event_loop()
 log = getLogger('bc4py')
 n_workers = cpu_count()
 
+# verified signature cache {sha256(pk, r, s, binary): address}
+verified_cache = ExpiringDict(max_len=100000, max_age_seconds=3600)
+
 
 async def fill_verified_addr_single(block):
     # format check
@@ -56,6 +61,24 @@ async def fill_verified_addr_tx(tx):
     await throw_tasks(tasks, V.BECH32_HRP, C.ADDR_NORMAL_VER)
 
 
+async def fill_verified_addr_txs(txs):
+    t = time()
+    tasks = dict()
+    for tx in txs:
+        assert tx.type != C.TX_POS_REWARD
+        # format check
+        for sign in tx.signature:
+            assert isinstance(sign, tuple), tx.getinfo()
+        # get data to verify
+        for pk, r, s in tx.signature:
+            tasks[(s, r, pk, tx.b)] = tx
+    # throw task
+    if len(tasks) == 0:
+        return
+    await throw_tasks(tasks, V.BECH32_HRP, C.ADDR_NORMAL_VER)
+    log.debug("verify {} signs by {}sec".format(len(tasks), round(time() - t, 3)))
+
+
 def get_verify_tasks(block):
     tasks = dict()
     for tx in block.txs:
@@ -70,8 +93,27 @@ def get_verify_tasks(block):
     return tasks
 
 
+def get_cache_key(key):
+    """hash of (pk, r, s, binary) with length, for verified_cache"""
+    s, r, pk, binary = key
+    h = sha256()
+    for b in (pk, r, s, binary):
+        h.update(len(b).to_bytes(4, 'big'))
+        h.update(b)
+    return h.digest()
+
+
 async def throw_tasks(tasks, hrp, ver):
-    task_list = list(tasks.keys())
+    # fill cached result
+    task_list = list()
+    for key, tx in tasks.items():
+        address = verified_cache.get(get_cache_key(key))
+        if address is None:
+            task_list.append(key)
+        elif address not in tx.verified_list:
+            tx.verified_list.append(address)
+    if len(task_list) == 0:
+        return
     future: asyncio.Future = loop.run_in_executor(
         None, verify_auto_multi, task_list, n_workers, False)
     await asyncio.wait_for(future, 120.0)
@@ -84,6 +126,7 @@ async def throw_tasks(tasks, hrp, ver):
             continue
         s, r, pk, binary = key
         address = get_address(pk=pk, hrp=hrp, ver=ver)
+        verified_cache[get_cache_key(key)] = address
         verified_list = tasks[key].verified_list
         if address not in verified_list:
             verified_list.append(address)
@@ -93,4 +136,6 @@ __all__ = [
     "fill_verified_addr_single",
     "fill_verified_addr_many",
     "fill_verified_addr_tx",
+    "fill_verified_addr_txs",
+    "verified_cache",
 ]
@@ -1,21 +1,24 @@
 from bc4py.config import C, BlockChainError
 from bc4py_extension import poc_hash, poc_work, scope_index
 from bc4py.database.tools import get_output_from_input
-from concurrent.futures import ProcessPoolExecutor
 from bell_yespower import getPoWHash as yespower_hash  # for CPU
 from x11_hash import getPoWHash as x11_hash  # for ASIC
 from shield_x16s_hash import getPoWHash as x16s_hash  # for GPU
 from logging import getLogger
 from hashlib import sha256
-from os import urandom
-from time import time
+from typing import Optional, Tuple
+from time import time, sleep
+import multiprocessing
 import asyncio
 import psutil
 import atexit
+import queue
 
 
 loop = asyncio.get_event_loop()
 log = getLogger('bc4py')
+WORKER_CHUNK_SIZE = 64  # check cpu usage by hashes
+HASHRATE_SPAN = 5.0  # update hashrate by seconds
 
 
 def get_workhash_fnc(flag):
@@ -68,57 +71,150 @@ def update_work_hash(block):
         block.work_hash = hash_fnc(block.b)
 
 
-async def generate_many_hash(executor: ProcessPoolExecutor, block, request_num):
-    assert request_num > 0
-    # hash generating with multi-core
-    future: asyncio.Future = loop.run_in_executor(
-        executor, pow_generator, block.b, block.flag, request_num)
-    await asyncio.wait_for(future, 120.0)
-    binary, hashed, start = future.result()
-    if binary is None:
-        raise Exception(hashed)
-    block.b = binary
-    block.work_hash = hashed
-    block.deserialize()
-    return time() - start
-
-
-def pow_generator(binary, block_flag, request_num):
-    start = time()
-    try:
-        hash_fnc = get_workhash_fnc(block_flag)
-        hashed = hash_fnc(binary)
-        minimum_num = int.from_bytes(hashed, 'little')
-        new_binary = binary
-        for _ in range(request_num):
-            new_binary = new_binary[:-4] + urandom(4)
-            new_hash = hash_fnc(new_binary)
-            new_num = int.from_bytes(new_hash, 'little')
-            if minimum_num > new_num:
-                binary = new_binary
-                hashed = new_hash
-                minimum_num = new_num
-        return binary, hashed, start
-    except Exception as e:
-        error = "Hashing failed {} by \"{}\"".format(binary, e)
-        return None, error, start
-
-
-def get_executor_object(max_workers=None):
-    """PoW mining process generator"""
-    if max_workers is None:
-        max_process_num = 4
-        logical_cpu_num = psutil.cpu_count(logical=True) or max_process_num
-        physical_cpu_nam = psutil.cpu_count(logical=False) or max_process_num
-        max_workers = min(logical_cpu_num, physical_cpu_nam)
-    executor = ProcessPoolExecutor(max_workers)
-    atexit.register(executor.shutdown, wait=True)
-    return executor
+def get_worker_num():
+    """PoW mining process number, physical cpu number"""
+    max_process_num = 4
+    logical_cpu_num = psutil.cpu_count(logical=True) or max_process_num
+    physical_cpu_nam = psutil.cpu_count(logical=False) or max_process_num
+    return min(logical_cpu_num, physical_cpu_nam)
+
+
+class PowWorkers(object):
+    """
+    long-lived hashing processes seeking nonce of a header on shared memory
+
+    "header" is 80 bytes block header, workers fill the last 4 bytes nonce
+    2^32 nonce space is split to workers, a worker seeks own range only
+    "generation" is count up when header is updated, workers abort seeking immediately
+    and 0 means no header to seek, found nonce is reported by "result" with the generation
+    "hashes" is hashed count of each worker, for hashrate
+    """
+
+    def __init__(self, flag, power_limit=1.0, worker_num=None):
+        ctx = multiprocessing.get_context('spawn')
+        self.flag = flag
+        self.worker_num = worker_num or get_worker_num()
+        self.lock = ctx.Lock()
+        self.header = ctx.RawArray('B', 80)
+        self.target = ctx.RawArray('B', 32)
+        self.generation = ctx.RawValue('Q', 0)
+        self.power_limit = ctx.RawValue('d', power_limit)
+        self.hashes = ctx.RawArray('Q', self.worker_num)
+        self.result = ctx.Queue()
+        self.closed = ctx.Event()
+        self.count = 0
+        self.hashrate = 0
+        self.hashrate_info = (0, time())  # [total hashes, time]
+        self.processes = list()
+        for index in range(self.worker_num):
+            process = ctx.Process(
+                target=pow_worker,
+                args=(index, self.worker_num, flag, self.lock, self.header, self.target, self.generation,
+                      self.power_limit, self.hashes, self.result, self.closed),
+                name='PowWorker{}'.format(index),
+                daemon=True)
+            process.start()
+            self.processes.append(process)
+        atexit.register(self.close)
+        log.debug("start {} pow workers {}".format(self.worker_num, C.consensus2name[flag]))
+
+    def __repr__(self):
+        return "<PowWorkers {} workers={} generation={}>".format(
+            C.consensus2name[self.flag], self.worker_num, self.generation.value)
+
+    def update(self, block):
+        """start to seek new header, return the generation"""
+        assert block.flag == self.flag and len(block.b) == 80
+        if not block.target_hash:
+            block.bits2target()
+        with self.lock:
+            self.count += 1
+            self.header[:] = block.b
+            self.target[:] = block.target_hash
+            self.generation.value = self.count
+        return self.count
+
+    def pause(self):
+        """stop seeking until next update"""
+        with self.lock:
+            self.generation.value = 0
+
+    def get_result(self, generation) -> Optional[Tuple[bytes, bytes]]:
+        """(nonce, work_hash) found for the generation or None, old results are dropped"""
+        while True:
+            try:
+                found_generation, nonce, work_hash = self.result.get_nowait()
+            except queue.Empty:
+                return None
+            if found_generation == generation:
+                return nonce, work_hash
+
+    def get_hashrate(self) -> int:
+        """hash/s of all workers, updated by span"""
+        total, ntime = self.hashrate_info
+        now = time()
+        if HASHRATE_SPAN < now - ntime:
+            new_total = sum(self.hashes)
+            self.hashrate = int((new_total - total) / (now - ntime))
+            self.hashrate_info = (new_total, now)
+        return self.hashrate
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.pause()
+        self.closed.set()
+        for process in self.processes:
+            process.join(5.0)
+            if process.is_alive():
+                process.terminate()
+        log.debug("close pow workers {}".format(C.consensus2name[self.flag]))
+
+
+def pow_worker(index, worker_num, flag, lock, header, target, generation, power_limit, hashes, result, closed):
+    """seek nonce of [index * span, (index + 1) * span) in a worker process"""
+    hash_fnc = get_workhash_fnc(flag)
+    span = (1 << 32) // worker_num
+    result.cancel_join_thread()  # exit without waiting for results read
+    current = 0
+    rest = 0.0  # sleep time for power limit
+    while not closed.is_set():
+        if generation.value in (0, current):
+            # no header or finished the range
+            sleep(0.05)
+            continue
+        with lock:
+            current = generation.value
+            binary = bytes(header)[:76]
+            target_num = int.from_bytes(bytes(target), 'little')
+        if current == 0:
+            continue  # paused
+        nonce = index * span
+        end = nonce + span
+        while nonce < end and generation.value == current:
+            s = time()
+            count = 0
+            chunk_end = min(end, nonce + WORKER_CHUNK_SIZE)
+            while nonce < chunk_end and generation.value == current:
+                work_hash = hash_fnc(binary + nonce.to_bytes(4, 'big'))
+                count += 1
+                if int.from_bytes(work_hash, 'little') < target_num:
+                    result.put((current, nonce.to_bytes(4, 'big'), work_hash))
+                    nonce = end  # wait for next header
+                    break
+                nonce += 1
+            hashes[index] += count
+            # limit cpu usage
+            if power_limit.value < 1.0:
+                rest += (time() - s) * (1.0 - power_limit.value) / power_limit.value
+                if 0.05 < rest:
+                    sleep(min(10.0, rest))
+                    rest = 0.0
 
 
 __all__ = [
     "get_workhash_fnc",
     "update_work_hash",
-    "generate_many_hash",
-    "get_executor_object",
+    "get_worker_num",
+    "PowWorkers",
 ]
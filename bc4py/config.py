@@ -2,7 +2,7 @@ from p2p_python.server import Peer2Peer
 from bc4py_extension import PyAddress
 from uvicorn import Server
 from rx.subject import Subject
-from typing import Optional
+from typing import Optional, Dict
 
 
 # internal stream by ReactiveX
@@ -98,6 +98,9 @@ class C:  # Constant
     MEMORY_FILE_REFRESH_SPAN = 101  # memory_file refresh span
     MEMORY_CACHE_LIMIT = 250  # max memorized block size, means re-org limit
     MEMORY_BATCH_SIZE = 30
+    MEMPOOL_SIZE_LIMIT = 50 * 1000 * 1000  # 50Mb unconfirmed txs total size
+    MEMPOOL_FILE_REFRESH_SPAN = 30  # mempool_file dump span
+    TX_CACHE_SIZE = 32 * 1000 * 1000  # 32Mb decoded database txs cache
     MINTCOIN_GAS = int(10 * pow(10, 6))  # 新規Mintcoin発行GasFee
     SIGNATURE_GAS = int(0.01 * pow(10, 6))  # gas per one signature
     EXTRA_OUTPUT_REWARD_FEE = int(0.0001 * pow(10, 8))  # subtract EXTRA_OUTPUT fee from reward
@@ -108,8 +111,10 @@ class C:  # Constant
 
     # sqlite params
     SQLITE_CACHE_SIZE = 2000  # default size: 2000
-    SQLITE_JOURNAL_MODE = 'MEMORY'  # default journal mode: MEMORY
+    SQLITE_JOURNAL_MODE = 'WAL'  # readers do not wait for writer
     SQLITE_SYNC_MODE = 'NORMAL'  # default sync mode: NORMAL
+    SQLITE_READER_NUM = 4  # read only connections of pool
+    SQLITE_CACHED_STATEMENTS = 256  # prepared statements cache of a connection, default: 100
 
 
 class V:
@@ -122,6 +127,12 @@ class V:
     BLOCK_REWARD = None
     BLOCK_BASE_CONSENSUS = None
     BLOCK_CONSENSUSES = None
+    BLOCK_CHECKPOINTS: Dict[int, bytes] = dict()  # {height: blockhash} given by boot params
+
+    # skip signature checks of the block and ancestors
+    ASSUME_VALID_HASH: Optional[bytes] = None
+    ASSUME_VALID_HEIGHT: Optional[int] = None  # None if unknown yet
+    ASSUME_VALID_CHAIN: Dict[int, bytes] = dict()  # {height: blockhash} linked by previous_hash to my chain
 
     # base coin
     COIN_DIGIT = None
@@ -154,6 +165,7 @@ class Debug:
     F_SHOW_DIFFICULTY = False
     F_CONSTANT_DIFF = False
     F_STICKY_TX_REJECTION = True
+    F_CHECK_DIFFICULTY = False  # compare incremental difficulty with legacy search
 
 
 class BlockChainError(Exception):
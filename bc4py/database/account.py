@@ -4,7 +4,7 @@ from bc4py.user import Accounting
 from bc4py.utils import AESCipher
 from bc4py_extension import PyAddress
 from multi_party_schnorr import PyKeyPair
-from typing import List, Set, Optional
+from typing import List, Set, Tuple, Optional
 from weakref import ref
 from logging import getLogger
 from aiosqlite import Cursor
@@ -35,14 +35,46 @@ async def read_txhash2movelog(txhash, cur: Cursor):
     return MoveLog(txhash, ntype, movement, ntime)
 
 
-async def read_movelog_iter(cur: Cursor, start=0):
-    """iterate all MoveLogs"""
-    await cur.execute("SELECT DISTINCT `hash` FROM `log` ORDER BY `id` DESC")
-    c = 0
-    for (txhash,) in await cur.fetchall():
-        if start <= c:
-            yield await read_txhash2movelog(txhash, cur)
-        c += 1
+async def read_movelog_page(cur: Cursor, last_id=None, limit=100) -> List[Tuple[int, 'MoveLog']]:
+    """
+    read MoveLogs recoded before last_id, newest first [(id, move_log),..]
+    a log is found by first row (index=0) and other rows are joined by hash
+    """
+    if last_id is None:
+        last_id = (1 << 63) - 1
+    await cur.execute("""
+    SELECT `page`.`id`,`log`.`hash`,`log`.`type`,`log`.`user`,`log`.`coin_id`,`log`.`amount`,`log`.`time`
+    FROM (SELECT `id`,`hash` FROM `log` WHERE `index`=0 AND `id`<? ORDER BY `id` DESC LIMIT ?) AS `page`
+    JOIN `log` ON `log`.`hash`=`page`.`hash` ORDER BY `page`.`id` DESC
+    """, (last_id, limit))
+    page = list()
+    move_log = None
+    for uuid, txhash, ntype, user, coin_id, amount, ntime in await cur.fetchall():
+        if move_log is None or page[-1][0] != uuid:
+            move_log = MoveLog(txhash, ntype, Accounting(), ntime)
+            page.append((uuid, move_log))
+        move_log.movement[user][coin_id] += amount
+    return page
+
+
+async def read_movelog_iter(cur: Cursor, start=0, page_size=100):
+    """iterate all MoveLogs by pages, newest first"""
+    last_id = None
+    if 0 < start:
+        # skip by index without reading logs
+        await cur.execute("""
+        SELECT `id` FROM `log` WHERE `index`=0 ORDER BY `id` DESC LIMIT 1 OFFSET ?
+        """, (start - 1,))
+        data = await cur.fetchone()
+        if data is None:
+            return
+        last_id = data[0]
+    while True:
+        page = await read_movelog_page(cur, last_id, page_size)
+        for last_id, move_log in page:
+            yield move_log
+        if len(page) < page_size:
+            break
 
 
 async def insert_movelog(movements, cur: Cursor, ntype=None, ntime=None, txhash=None):
@@ -164,6 +196,12 @@ async def read_all_pooled_address_set(cur: Cursor, last_uuid=0) -> Set[PyAddress
     return {PyAddress.from_binary(V.BECH32_HRP, ck) for (ck,) in await cur.fetchall()}
 
 
+async def read_new_pooled_address_list(last_uuid, cur: Cursor) -> List[Tuple[int, PyAddress, int]]:
+    """get pooled address and userid inserted after last_uuid"""
+    await cur.execute("SELECT `id`,`ck`,`user` FROM `pool` WHERE ?<`id` ORDER BY `id`", (last_uuid,))
+    return [(uuid, PyAddress.from_binary(V.BECH32_HRP, ck), user) for uuid, ck, user in await cur.fetchall()]
+
+
 async def read_address2account(address: PyAddress, cur: Cursor):
     """read account by address or raise exception"""
     user = await read_address2userid(address, cur)
@@ -294,6 +332,49 @@ async def read_bip_from_path(user, is_inner, index, cur: Cursor):
     return bip.child_key(int(is_inner)).child_key(index)
 
 
+async def read_utxo_list(cur: Cursor) -> List[tuple]:
+    """read all wallet unspents on database"""
+    await cur.execute("""
+    SELECT `hash`,`index`,`address`,`height`,`type`,`coin_id`,`amount` FROM `utxo`
+    """)
+    return [(txhash, txindex, PyAddress.from_binary(V.BECH32_HRP, address), height, txtype, coin_id, amount)
+            for txhash, txindex, address, height, txtype, coin_id, amount in await cur.fetchall()]
+
+
+async def insert_utxo_list(utxo_list, cur: Cursor):
+    """recode wallet unspents [(txhash, txindex, address, height, type, coin_id, amount),..]"""
+    await cur.executemany("""
+    INSERT OR REPLACE INTO `utxo` (`hash`,`index`,`address`,`height`,`type`,`coin_id`,`amount`)
+    VALUES (?,?,?,?,?,?,?)""", [(txhash, txindex, address.binary(), height, txtype, coin_id, amount)
+                                 for txhash, txindex, address, height, txtype, coin_id, amount in utxo_list])
+
+
+async def delete_utxo_list(pairs, cur: Cursor):
+    """delete spent wallet unspents [(txhash, txindex),..]"""
+    await cur.executemany("DELETE FROM `utxo` WHERE `hash`=? AND `index`=?", pairs)
+
+
+async def delete_all_utxo(cur: Cursor):
+    """delete all wallet unspents and the last block"""
+    await cur.execute("DELETE FROM `utxo`")
+    await cur.execute("DELETE FROM `utxo_tip`")
+
+
+async def read_utxo_tip(cur: Cursor) -> Tuple[int, Optional[bytes], int]:
+    """read the last block and pool id wallet unspents updated by"""
+    await cur.execute("SELECT `height`,`hash`,`uuid` FROM `utxo_tip` WHERE `id`=0")
+    data = await cur.fetchone()
+    if data is None:
+        return -1, None, 0
+    return data
+
+
+async def update_utxo_tip(height, blockhash, uuid, cur: Cursor):
+    """recode the last block and pool id wallet unspents updated by"""
+    await cur.execute("INSERT OR REPLACE INTO `utxo_tip` (`id`,`height`,`hash`,`uuid`) VALUES (0,?,?,?)",
+                      (height, blockhash, uuid))
+
+
 async def convert_balance_userid2name(cur, movement):
     """convert movement's all userId to userName"""
     return {
@@ -343,6 +424,7 @@ class MoveLog(object):
 
 __all__ = [
     "read_txhash2movelog",
+    "read_movelog_page",
     "read_movelog_iter",
     "insert_movelog",
     "delete_movelog",
@@ -354,6 +436,7 @@ __all__ = [
     "read_account_info",
     "read_pooled_address_list",
     "read_all_pooled_address_set",
+    "read_new_pooled_address_list",
     "read_address2account",
     "read_name2userid",
     "read_userid2name",
@@ -364,6 +447,12 @@ __all__ = [
     "read_account_address",
     "sign_message_by_address",
     "read_bip_from_path",
+    "read_utxo_list",
+    "insert_utxo_list",
+    "delete_utxo_list",
+    "delete_all_utxo",
+    "read_utxo_tip",
+    "update_utxo_tip",
     "convert_balance_userid2name",
     "MoveLog",
 ]
@@ -0,0 +1,130 @@
+from logging import getLogger
+from typing import Dict, List, Tuple
+import mmap
+import os
+import re
+
+
+log = getLogger('bc4py')
+
+FILE_NAME_FORMAT = 'blk{:05d}.dat'
+FILE_NAME_REGEX = re.compile(r'^blk([0-9]{5})\.dat$')
+
+
+class BlockFile(object):
+    """
+    append only flat files of serialized blocks
+
+    blocks are written to `blkNNNNN.dat` and rotate to next file when over max_file_size
+    written data is pending until commit, and the position is decided at append
+    read data is a memoryview slice of mmap, do not copy until you need
+    """
+
+    def __init__(self, dirs, max_file_size, sync=False):
+        if not os.path.exists(dirs):
+            os.mkdir(dirs)
+        self.dirs = dirs
+        self.max_file_size = max_file_size
+        self.sync = sync
+        # last file position written to disk
+        numbers = [int(m.group(1)) for m in map(FILE_NAME_REGEX.match, os.listdir(dirs)) if m]
+        self.file_no = max(numbers) if numbers else 0
+        self.file_size = self._get_file_size(self.file_no)
+        # reserved position including pending
+        self.write_no = self.file_no
+        self.write_size = self.file_size
+        self.pending: List[Tuple[int, bytes]] = list()
+        self.maps: Dict[int, mmap.mmap] = dict()
+
+    def _get_path(self, file_no):
+        return os.path.join(self.dirs, FILE_NAME_FORMAT.format(file_no))
+
+    def _get_file_size(self, file_no):
+        path = self._get_path(file_no)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        else:
+            return 0
+
+    def append(self, b) -> Tuple[int, int]:
+        """reserve position and return (file_no, offset), written when commit"""
+        if 0 < self.write_size and self.max_file_size < self.write_size + len(b):
+            self.write_no += 1
+            self.write_size = 0
+        offset = self.write_size
+        self.pending.append((self.write_no, b))
+        self.write_size += len(b)
+        return self.write_no, offset
+
+    def commit(self):
+        """write pending data, call before database batch write"""
+        fp = None
+        try:
+            for file_no, b in self.pending:
+                if fp is None or fp.name != self._get_path(file_no):
+                    if fp is not None:
+                        self._close_file(fp)
+                    fp = open(self._get_path(file_no), mode='ab')
+                fp.write(b)
+            if fp is not None:
+                self._close_file(fp)
+        except Exception:
+            # partly written data shift offsets of next blocks
+            if fp is not None:
+                fp.close()
+            self._truncate_uncommitted()
+            raise
+        self.pending.clear()
+        self.file_no = self.write_no
+        self.file_size = self.write_size
+
+    def _close_file(self, fp):
+        fp.flush()
+        if self.sync:
+            os.fsync(fp.fileno())
+        fp.close()
+
+    def _truncate_uncommitted(self):
+        """remove data written after last commit"""
+        for file_no in range(self.file_no, self.write_no + 1):
+            path = self._get_path(file_no)
+            if not os.path.exists(path):
+                continue
+            if file_no == self.file_no:
+                if self.file_size < os.path.getsize(path):
+                    os.truncate(path, self.file_size)
+                    log.warning("truncate uncommitted data of {}".format(path))
+            else:
+                self.maps.pop(file_no, None)
+                os.remove(path)
+                log.warning("remove uncommitted file {}".format(path))
+
+    def rollback(self):
+        """discard pending data"""
+        self._truncate_uncommitted()
+        self.pending.clear()
+        self.write_no = self.file_no
+        self.write_size = self.file_size
+
+    def read(self, file_no, offset, length) -> memoryview:
+        """read written data without copy"""
+        m = self.maps.get(file_no)
+        if m is None or len(m) < offset + length:
+            # first access or file grown after mapped
+            with open(self._get_path(file_no), mode='rb') as fp:
+                m = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[file_no] = m
+            if len(m) < offset + length:
+                raise ValueError('out of block file range file={} offset={} length={}'
+                                 .format(file_no, offset, length))
+        return memoryview(m)[offset:offset + length]
+
+    def close(self):
+        # note: mmap is closed when all memoryview released
+        self.maps.clear()
+        log.debug("close block file")
+
+
+__all__ = [
+    "BlockFile",
+]
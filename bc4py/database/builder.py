@@ -1,4 +1,4 @@
-from bc4py.config import C, V, P, stream
+from bc4py.config import C, V, P, stream, BlockChainError
 from bc4py.bip32 import ADDR_SIZE
 from bc4py.chain.utils import signature2bin, bin2signature
 from bc4py.chain.tx import TX
@@ -7,14 +7,21 @@ import bc4py.chain.msgpack as bc4py_msgpack
 from bc4py.user import Balance, Accounting
 from bc4py.database.account import *
 from bc4py.database.create import create_db
+from bc4py.database.blockfile import BlockFile
+from bc4py.database.headerfile import HeaderFile
+from bc4py.database.coinsview import CoinsViewCache
+from bc4py.database.txcache import TxCache
+from bc4py.database.mempool import Mempool, dump_mempool_file, load_mempool_file
+from bc4py.database.walletutxo import WalletUTXO
 from bc4py_extension import sha256d_hash, PyAddress
 from msgpack import unpackb, packb
-from typing import Optional, Dict, List, Tuple, MutableMapping
+from typing import Optional, Dict, List, Tuple, Set, MutableMapping
 from weakref import WeakValueDictionary
 from logging import getLogger, INFO
 from time import time
 import random
 import struct
+import shutil
 import os
 import plyvel
 import asyncio
@@ -25,6 +32,9 @@ log = getLogger('bc4py')
 getLogger('plyvel').setLevel(INFO)
 
 struct_block = struct.Struct('>I32s80sBI')
+struct_block_pos = struct.Struct('>III')
+struct_tx_pos_file = struct.Struct('>IIII')
+struct_tx_pos_block = struct.Struct('>I32sII')
 struct_tx = struct.Struct('>2IB')
 struct_unused_idx = struct.Struct('>{}sIQ'.format(ADDR_SIZE))
 struct_address = struct.Struct('>{}s32sB'.format(ADDR_SIZE))
@@ -35,6 +45,35 @@ struct_coins = struct.Struct('>III')
 ITER_ORDER = 'big'
 DB_VERSION = 0  # increase if you change database structure
 
+# one byte key prefix of each table on single LevelDB layout
+TABLE_PREFIX = {
+    "_block": b'\x00',
+    "_tx_index": b'\x01',
+    "_unused_index": b'\x02',
+    "_block_index": b'\x03',
+    "_address_index": b'\x04',
+    "_coins": b'\x05',
+    "_height_index": b'\x06',
+}
+
+
+class PrefixedBatch(object):
+    """table view of the shared WriteBatch on single LevelDB layout"""
+    __slots__ = ("batch", "prefix")
+
+    def __init__(self, batch, prefix):
+        self.batch = batch
+        self.prefix = prefix
+
+    def put(self, key, value):
+        self.batch.put(self.prefix + key, value)
+
+    def delete(self, key):
+        self.batch.delete(self.prefix + key)
+
+    def clear(self):
+        self.batch.clear()
+
 
 class DataBase(object):
     db_config = {
@@ -42,20 +81,42 @@ class DataBase(object):
         'addrindex': True,
         'timeout': None,
         'sync': False,
+        'single': False,  # put all tables on one LevelDB with table prefix
+        'blockfile': False,  # write block binary to flat files, not LevelDB
+        'blockfile_size': 128 * 1024 * 1024,
+        'utxo_cache_size': 64 * 1024 * 1024,  # decoded unused index cache (bytes)
+        'table_options': {
+            # options of plyvel.DB, summed up on single LevelDB layout
+            "_block": {'lru_cache_size': 8 * 1024 * 1024, 'write_buffer_size': 4 * 1024 * 1024,
+                       'bloom_filter_bits': 10},
+            "_tx_index": {'lru_cache_size': 8 * 1024 * 1024, 'write_buffer_size': 4 * 1024 * 1024,
+                          'bloom_filter_bits': 10},
+            "_unused_index": {'lru_cache_size': 32 * 1024 * 1024, 'write_buffer_size': 8 * 1024 * 1024,
+                              'bloom_filter_bits': 10},
+            "_block_index": {'lru_cache_size': 4 * 1024 * 1024, 'write_buffer_size': 1024 * 1024,
+                             'bloom_filter_bits': 0},
+            "_address_index": {'lru_cache_size': 8 * 1024 * 1024, 'write_buffer_size': 4 * 1024 * 1024,
+                               'bloom_filter_bits': 0},
+            "_coins": {'lru_cache_size': 1024 * 1024, 'write_buffer_size': 1024 * 1024,
+                       'bloom_filter_bits': 0},
+            "_height_index": {'lru_cache_size': 2 * 1024 * 1024, 'write_buffer_size': 1024 * 1024,
+                              'bloom_filter_bits': 10},
+        },
     }
     database_list = [
         "_block",  # [blockhash] -> [height, time, work, b_block, flag, tx_len][txhash0]..[txhashN]
-        "_tx_index",  # [txhash] -> [height][offset]
+        # or [blockhash] -> [file_no, offset, length] pointer to block file
+        "_tx_index",  # [txhash] -> [height][file_no or blockhash][offset][length]
         "_unused_index",  # [txhash][txindex] -> [address][coin_id][amount]
         "_block_index",  # [height] -> [blockhash]
         "_address_index",  # [address][txhash][index] -> [coin_id, amount, f_used]
         "_coins",  # [coin_id][height][index] -> [txhash][params, setting]
+        "_height_index",  # [blockhash] -> [height] record of header file
     ]
 
     def __init__(self, **kwargs):
         self.db_config.update(kwargs)  # extra settings
-        dir_name = f"db-tx{int(self.db_config['txindex'])}-addr{int(self.db_config['addrindex'])}-ver{DB_VERSION}"
-        dirs = os.path.join(V.DB_HOME_DIR, dir_name)
+        dirs = os.path.join(V.DB_HOME_DIR, get_database_dir_name(self.db_config))
         self.dirs = dirs
         # already used => LevelDBError
         if os.path.exists(dirs):
@@ -64,23 +125,46 @@ class DataBase(object):
             log.debug('No database directory found')
             os.mkdir(dirs)
             f_create = True
-        self._block = plyvel.DB(os.path.join(dirs, 'block'), create_if_missing=f_create)
-        self._tx_index = plyvel.DB(os.path.join(dirs, 'tx_index'), create_if_missing=f_create)
-        self._unused_index = plyvel.DB(os.path.join(dirs, 'unused_index'), create_if_missing=f_create)
-        self._block_index = plyvel.DB(os.path.join(dirs, 'block_index'), create_if_missing=f_create)
-        self._address_index = plyvel.DB(os.path.join(dirs, 'address_index'), create_if_missing=f_create)
-        self._coins = plyvel.DB(os.path.join(dirs, 'coins'), create_if_missing=f_create)
+        if self.db_config['single']:
+            # all tables on one LevelDB
+            options = get_single_table_options(self.db_config['table_options'])
+            self.db_root = plyvel.DB(os.path.join(dirs, 'tables'), create_if_missing=f_create, **options)
+            for name in self.database_list:
+                setattr(self, name, self.db_root.prefixed_db(TABLE_PREFIX[name]))
+        else:
+            # one LevelDB by one table
+            self.db_root = None
+            for name in self.database_list:
+                options = self.db_config['table_options'].get(name, dict())
+                path = os.path.join(dirs, name[1:])
+                # note: table added after database created
+                f_create_table = f_create or not os.path.exists(path)
+                setattr(self, name, plyvel.DB(path, create_if_missing=f_create_table, **options))
+        # block binary files, always open to read
+        self.block_file = BlockFile(
+            os.path.join(dirs, 'blocks'), self.db_config['blockfile_size'], self.db_config['sync'])
+        # fixed width header records
+        self.header_file = HeaderFile(os.path.join(dirs, 'headers.dat'), self.db_config['sync'])
+        self.sync_header_file()
+        # unused index cache
+        self.coins_cache = CoinsViewCache(self.db_config['utxo_cache_size'])
         # batch objects
         self.event = asyncio.Event()
         self.event.set()
         self.batch: Dict[str, plyvel._plyvel.WriteBatch] = dict()
+        self.batch_root: Optional[plyvel._plyvel.WriteBatch] = None
         self.batch_task: Optional[asyncio.Task] = None
         self.batch_time = time()
         log.debug(':create database connect path={}'.format(dirs.replace("\\", "/")))
 
     def close(self):
-        for name in self.database_list:
-            getattr(self, name).close()
+        if self.db_root is None:
+            for name in self.database_list:
+                getattr(self, name).close()
+        else:
+            self.db_root.close()
+        self.block_file.close()
+        self.header_file.close()
         log.info("close database connection")
 
     async def batch_create(self):
@@ -88,24 +172,49 @@ class DataBase(object):
         await asyncio.wait_for(self.event.wait(), self.db_config['timeout'])
         self.event.clear()
         self.batch_time = time()
-        for name in self.database_list:
-            self.batch[name] = getattr(self, name).write_batch(sync=self.db_config['sync'])
+        if self.db_root is None:
+            for name in self.database_list:
+                self.batch[name] = getattr(self, name).write_batch(sync=self.db_config['sync'])
+        else:
+            # share one batch to write all tables atomically
+            self.batch_root = self.db_root.write_batch(sync=self.db_config['sync'])
+            for name in self.database_list:
+                self.batch[name] = PrefixedBatch(self.batch_root, TABLE_PREFIX[name])
         self.batch_task = asyncio.Task.current_task()
         log.debug(":Create database batch")
 
     async def batch_commit(self):
         assert self.batch, 'Not created batch'
-        for batch in self.batch.values():
-            batch.write()
+        # block data must be written before the pointers
+        self.block_file.commit()
+        header_length = len(self.header_file)
+        self.header_file.commit()
+        try:
+            self.coins_cache.flush(self.batch['_unused_index'], encode_unused_index)
+            if self.batch_root is None:
+                for batch in self.batch.values():
+                    batch.write()
+            else:
+                self.batch_root.write()
+                self.batch_root = None
+        except Exception:
+            # header records of blocks not written on database
+            self.header_file.truncate(header_length)
+            raise
+        self.coins_cache.commit()
         self.batch.clear()
         self.batch_task = None
         self.event.set()
         log.debug(f"commit success {int((time()-self.batch_time)*1000)}mS")
 
     def batch_rollback(self):
+        self.block_file.rollback()
+        self.header_file.rollback()
+        self.coins_cache.rollback()
         for batch in self.batch.values():
             batch.clear()
         self.batch.clear()
+        self.batch_root = None
         self.batch_task = None
         self.event.set()
         log.debug("Rollback database")
@@ -113,11 +222,24 @@ class DataBase(object):
     def is_batch_thread(self):
         return 0 < len(self.batch) and self.batch_task is asyncio.Task.current_task()
 
-    def read_block(self, blockhash):
+    def read_block_bin(self, blockhash, length=None):
+        """return block binary, memoryview of block file or bytes of LevelDB"""
         b = self._block.get(blockhash, default=None)
         if b is None:
             return None
-        b = bytes(b)
+        elif len(b) == struct_block_pos.size:
+            # pointer to block file (block binary is larger than struct_block)
+            file_no, offset, block_len = struct_block_pos.unpack(b)
+            if length is not None:
+                block_len = min(length, block_len)
+            return self.block_file.read(file_no, offset, block_len)
+        else:
+            return b
+
+    def read_block(self, blockhash):
+        b = self.read_block_bin(blockhash)
+        if b is None:
+            return None
         offset = 0
         height, work, b_block, flag, tx_len = struct_block.unpack_from(b, offset)
         offset += struct_block.size
@@ -128,11 +250,11 @@ class DataBase(object):
         for _ in range(tx_len):
             bin_len, sign_len, r_len = struct_tx.unpack_from(b, offset)
             offset += struct_tx.size
-            b_tx = b[offset:offset+bin_len]
+            b_tx = bytes(b[offset:offset+bin_len])
             offset += bin_len
-            b_sign = b[offset:offset+sign_len]
+            b_sign = bytes(b[offset:offset+sign_len])
             offset += sign_len
-            R = b[offset:offset+r_len]
+            R = bytes(b[offset:offset+r_len])
             offset += r_len
             tx = TX.from_binary(binary=b_tx)
             tx.height = height
@@ -143,13 +265,49 @@ class DataBase(object):
         return block
 
     def read_block_header(self, blockhash):
-        b = self._block.get(blockhash, default=None)
+        b_height = self._height_index.get(blockhash, default=None)
+        if b_height is not None:
+            block_header = self.read_block_header_by_height(int.from_bytes(b_height, ITER_ORDER))
+            if block_header is not None:
+                return block_header
+        # from block binary
+        b = self.read_block_bin(blockhash, length=struct_block.size)
         if b is None:
             return None
-        b = bytes(b)
         height, work, b_block, flag, tx_len = struct_block.unpack_from(b)
         return get_block_header_from_bin(height, work, b_block, flag)
 
+    def read_block_header_by_height(self, height):
+        """read header file record by height"""
+        record = self.header_file.read(height)
+        if record is None:
+            return None
+        height, flag, work, b_header = record
+        return get_block_header_from_bin(height, work, b_header, flag)
+
+    def sync_header_file(self):
+        """truncate records not on database or rebuild records from blocks"""
+        length = 0
+        for b_height in self._block_index.iterator(reverse=True, include_value=False):
+            length = int.from_bytes(b_height, ITER_ORDER) + 1
+            break
+        if length < len(self.header_file):
+            self.header_file.truncate(length)
+        elif len(self.header_file) < length:
+            log.info("rebuild header file from {} to {} height".format(len(self.header_file), length))
+            batch = self._height_index.write_batch()
+            for height, blockhash in self.read_block_hash_iter(start_height=len(self.header_file)):
+                b = self.read_block_bin(blockhash, length=struct_block.size)
+                _, work, b_block, flag, tx_len = struct_block.unpack_from(b)
+                self.header_file.put(height, flag, work, bytes(b_block))
+                batch.put(blockhash, height.to_bytes(4, ITER_ORDER))
+                if height % 10000 == 0:
+                    self.header_file.commit()
+                    batch.write()
+                    batch = self._height_index.write_batch()
+            self.header_file.commit()
+            batch.write()
+
     def read_block_hash(self, height):
         b_height = height.to_bytes(4, ITER_ORDER)
         b = self._block_index.get(b_height, default=None)
@@ -167,36 +325,60 @@ class DataBase(object):
             blockhash = bytes(blockhash)
             yield int.from_bytes(b_height, ITER_ORDER), blockhash
 
-    def read_tx(self, txhash):
-        # txhash -> height
+    def read_tx_position(self, txhash) -> Optional[Tuple[int, object, int, Optional[int]]]:
+        """return (height, location, offset, length), location is file_no or blockhash"""
         b = self._tx_index.get(txhash, default=None)
         if b is None:
             return None
-        b_height, offset = struct.unpack('>4sI', b)
-        # height -> blockhash
-        blockhash = self._block_index.get(b_height, default=None)
-        if blockhash is None:
-            return None
-        # blockhash -> block_bin
-        b = self._block.get(blockhash, default=None)
-        if b is None:
+        elif len(b) == struct_tx_pos_file.size:
+            return struct_tx_pos_file.unpack(b)
+        elif len(b) == struct_tx_pos_block.size:
+            return struct_tx_pos_block.unpack(b)
+        else:
+            # old format [height][offset], find blockhash by height
+            b_height, offset = struct.unpack('>4sI', b)
+            blockhash = self._block_index.get(b_height, default=None)
+            if blockhash is None:
+                return None
+            return int.from_bytes(b_height, ITER_ORDER), blockhash, offset, None
+
+    def read_tx(self, txhash):
+        position = self.read_tx_position(txhash)
+        if position is None:
             return None
-        # block_bin -> tx
-        bin_len, sign_len, r_len = struct_tx.unpack_from(b, offset)
-        offset += struct_tx.size
-        b_tx = b[offset:offset + bin_len]
-        offset += bin_len
-        b_sign = b[offset:offset + sign_len]
-        offset += sign_len
-        R = b[offset:offset + r_len]
-        offset += r_len
-        if txhash != sha256d_hash(b_tx):
-            return None  # will be forked
-        tx = TX.from_binary(binary=b_tx)
-        tx.height = int.from_bytes(b_height, ITER_ORDER)
-        tx.signature = bin2signature(b_sign)
-        tx.R = R
-        return tx
+        height, location, offset, length = position
+        if isinstance(location, int):
+            # block file -> tx_bin
+            b = self.block_file.read(location, offset, length)
+            offset = 0
+        else:
+            # blockhash -> block_bin
+            b = self.read_block_bin(location)
+            if b is None:
+                return None
+        return decode_tx_bin(txhash, height, b, offset)
+
+    def read_txs(self, hashes) -> List[Optional[TX]]:
+        """read many txs sorted by location, a block is read at most once"""
+        positions = list()
+        for index, txhash in enumerate(hashes):
+            position = self.read_tx_position(txhash)
+            if position is not None:
+                positions.append((position, index, txhash))
+        positions.sort(key=lambda x: (isinstance(x[0][1], bytes), x[0][1], x[0][2]))
+        txs = [None] * len(hashes)
+        last_location = b = None
+        for (height, location, offset, length), index, txhash in positions:
+            if isinstance(location, int):
+                b = self.block_file.read(location, offset, length)
+                txs[index] = decode_tx_bin(txhash, height, b, 0)
+            else:
+                if location != last_location:
+                    b = self.read_block_bin(location)
+                    last_location = location
+                if b is not None:
+                    txs[index] = decode_tx_bin(txhash, height, b, offset)
+        return txs
 
     def have_tx(self, txhash) -> bool:
         """return True if you have tx index data"""
@@ -206,15 +388,23 @@ class DataBase(object):
 
     def read_unused_index(self, txhash, txindex) -> Optional[Tuple[PyAddress, int, int]]:
         """return unused outputs info"""
-        key = txhash + txindex.to_bytes(1, ITER_ORDER)
-        b = self._unused_index.get(key, default=None)
         # return None -> not found or already used
         # return tuple -> unused
+        key = (txhash, txindex)
+        if key in self.coins_cache.dirty and self.is_batch_thread():
+            return self.coins_cache.dirty[key]
+        try:
+            return self.coins_cache[key]
+        except KeyError:
+            pass
+        b = self._unused_index.get(txhash + txindex.to_bytes(1, ITER_ORDER), default=None)
         if b is None:
-            return None
+            value = None
         else:
             b_address, coin_id, amount = struct_unused_idx.unpack(b)
-            return PyAddress.from_binary(V.BECH32_HRP, b_address), coin_id, amount
+            value = PyAddress.from_binary(V.BECH32_HRP, b_address), coin_id, amount
+        self.coins_cache.put(key, value)
+        return value
 
     def read_address_idx(self, address: PyAddress, txhash, index):
         k = address.binary() + txhash + index.to_bytes(1, ITER_ORDER)
@@ -255,10 +445,9 @@ class DataBase(object):
         b = struct_block.pack(block.height, block.work_hash, block.b, block.flag, tx_len)
         # write txs data
         b_height = block.height.to_bytes(4, ITER_ORDER)
+        tx_positions = list()
         for tx in block.txs:
-            # recode only account tx's index
-            if tx in account_tx:
-                self.batch['_tx_index'].put(tx.hash, b_height + len(b).to_bytes(4, ITER_ORDER))
+            offset = len(b)
             bin_len = len(tx.b)
             b_sign = signature2bin(tx.signature)
             sign_len = len(b_sign)
@@ -267,22 +456,36 @@ class DataBase(object):
             b += tx.b
             b += b_sign
             b += tx.R
+            # recode only account tx's index
+            if tx in account_tx:
+                tx_positions.append((tx.hash, offset, len(b) - offset))
             # log.debug("Insert new tx {}".format(tx))
-        self.batch['_block'].put(block.hash, b)
+        if self.db_config['blockfile']:
+            file_no, block_offset = self.block_file.append(b)
+            self.batch['_block'].put(block.hash, struct_block_pos.pack(file_no, block_offset, len(b)))
+            for txhash, offset, length in tx_positions:
+                v = struct_tx_pos_file.pack(block.height, file_no, block_offset + offset, length)
+                self.batch['_tx_index'].put(txhash, v)
+        else:
+            self.batch['_block'].put(block.hash, b)
+            for txhash, offset, length in tx_positions:
+                v = struct_tx_pos_block.pack(block.height, block.hash, offset, length)
+                self.batch['_tx_index'].put(txhash, v)
         self.batch['_block_index'].put(b_height, block.hash)
+        # header record
+        self.header_file.put(block.height, block.flag, block.work_hash, block.b)
+        self.batch['_height_index'].put(block.hash, b_height)
         log.debug("Insert new block {}".format(block))
 
     def write_unused_index(self, txhash, txindex, address, coin_id, amount):
         assert self.is_batch_thread()
         assert isinstance(address, PyAddress)
-        k = txhash + txindex.to_bytes(1, ITER_ORDER)
-        v = struct_unused_idx.pack(address.binary(), coin_id, amount)
-        self.batch['_unused_index'].put(k, v)
+        # note: written to batch on commit
+        self.coins_cache.write((txhash, txindex), (address, coin_id, amount))
 
     def remove_unused_index(self, txhash, txindex):
         assert self.is_batch_thread()
-        k = txhash + txindex.to_bytes(1, ITER_ORDER)
-        self.batch['_unused_index'].delete(k)
+        self.coins_cache.write((txhash, txindex), None)
 
     def write_address_idx(self, address: PyAddress, txhash, index, coin_id, amount, f_used):
         assert self.is_batch_thread()
@@ -322,6 +525,17 @@ class ChainBuilder(object):
         self.root_block: Optional[Block] = None
         self.best_block: Optional[Block] = None
         self.db: Optional[DataBase] = None
+        # outpoint indexes of "best_chain"
+        self.memory_txs: Dict[bytes, Block] = dict()
+        self.memory_outputs: Dict[Tuple[bytes, int], Tuple[tuple, Block]] = dict()
+        self.memory_spent: Dict[Tuple[bytes, int], Tuple[bytes, Block]] = dict()
+        # height and hash indexes of "best_chain"
+        self.main_heights: Dict[int, Block] = dict()
+        self.main_hashes: Set[bytes] = set()
+        # fork choice, cumulative score from root_block and tips connected to root_block
+        self.chain_score: Dict[bytes, float] = dict()
+        self.tips: Set[bytes] = set()
+        self.unconnected: Dict[bytes, List[Block]] = dict()
 
     async def close(self):
         # require manual close
@@ -363,6 +577,8 @@ class ChainBuilder(object):
             self.chain[genesis_block.hash] = genesis_block
             self.best_chain = [genesis_block]
             self.best_block = genesis_block
+            self.index_block(genesis_block)
+            self.connect_block(genesis_block)
             log.info("Set dummy block, genesisBlock={}".format(genesis_block))
             async with create_db(V.DB_ACCOUNT_PATH) as db:
                 cur = await db.cursor()
@@ -428,7 +644,11 @@ class ChainBuilder(object):
             for block in memorized_blocks:
                 batch_blocks.append(block)
                 self.chain[block.hash] = block
+                self.index_block(block)
+                self.connect_block(block)
+                block.f_orphan = False
                 for tx in block.txs:
+                    tx.height = block.height
                     await user_account.affect_new_tx(cur=cur, tx=tx)
                     if tx.hash not in tx_builder.chained_tx:
                         tx_builder.chained_tx[tx.hash] = tx
@@ -483,48 +703,75 @@ class ChainBuilder(object):
     def get_best_chain(self, best_block=None):
         assert self.root_block, 'Do not init'
         if best_block:
-            best_sets = {best_block}
+            # walk to main chain and join
+            best_chain = [best_block]
             previous_hash = best_block.previous_hash
             while self.root_block.hash != previous_hash:
                 if previous_hash not in self.chain:
                     raise BlockBuilderError('Cannot find previousHash, may not main-chain. {}'.format(
                         previous_hash.hex()))
                 block = self.chain[previous_hash]
+                if self.is_main_block(block):
+                    best_chain.extend(self.best_chain[self.best_block.height - block.height:])
+                    break
+                best_chain.append(block)
                 previous_hash = block.previous_hash
-                best_sets.add(block)
             # best_chain = [<height=n>, <height=n-1>, ...]
-            best_chain = sorted(best_sets, key=lambda x: x.height, reverse=True)
             return best_block, best_chain
-        # BestBlockがchainにおける
-        best_score = 0.0
-        best_block = None
-        best_sets = set()
-        for block in sorted(self.chain.values(), key=lambda x: x.create_time, reverse=True):
-            if block in best_sets:
+        assert self.best_block, 'Cannot find best_block on get_best_chain? chain={}'.format(list(self.chain.values()))
+        return self.best_block, self.best_chain
+
+    def connect_block(self, block):
+        """calculate cumulative score of the block and waiting children"""
+        connected = list()
+        if self.root_block.hash == block.previous_hash:
+            self.chain_score[block.hash] = block.score
+        elif block.previous_hash in self.chain_score:
+            self.chain_score[block.hash] = self.chain_score[block.previous_hash] + block.score
+        else:
+            # wait for parent
+            self.unconnected.setdefault(block.previous_hash, list()).append(block)
+            return connected
+        connected.append(block)
+        for child in connected:
+            self.tips.discard(child.previous_hash)
+            self.tips.add(child.hash)
+            for grandchild in self.unconnected.pop(child.hash, ()):
+                self.chain_score[grandchild.hash] = self.chain_score[child.hash] + grandchild.score
+                connected.append(grandchild)
+        return connected
+
+    def select_best_tip(self, blocks):
+        """highest cumulative score is best, first seen block win if same score"""
+        best_block = self.best_block
+        best_score = self.chain_score.get(best_block.hash, 0.0)
+        for block in blocks:
+            score = self.chain_score[block.hash]
+            if best_score > score:
                 continue
-            tmp_best_score = block.score
-            tmp_best_block = block
-            tmp_best_sets = {block}
-            while block.previous_hash in self.chain:
-                block = self.chain[block.previous_hash]
-                tmp_best_score += block.score
-                tmp_best_sets.add(block)
-            else:
-                if self.root_block.hash != block.previous_hash:
-                    continue
-            if best_score > tmp_best_score:
+            elif best_score == score and best_block.create_time < block.create_time:
                 continue
-            best_score = tmp_best_score
-            best_block = tmp_best_block
-            best_sets = tmp_best_sets
-        # txのheightを揃える
-        for block in best_sets:
-            for tx in block.txs:
-                tx.height = block.height
-        assert best_block, 'Cannot find best_block on get_best_chain? chain={}'.format(list(self.chain.values()))
-        # best_chain = [<height=n>, <height=n-1>, ...]
-        best_chain = sorted(best_sets, key=lambda x: x.height, reverse=True)
-        return best_block, best_chain
+            best_block = block
+            best_score = score
+        return best_block
+
+    def prune_chain_score(self):
+        """remove score of blocks not connected to root_block, scores are counted from new root_block"""
+        connected = dict()
+        for block in sorted(self.chain.values(), key=lambda x: x.height):
+            if block.hash not in self.chain_score:
+                continue
+            if self.root_block.hash == block.previous_hash:
+                connected[block.hash] = block.score
+            elif block.previous_hash in connected:
+                connected[block.hash] = connected[block.previous_hash] + block.score
+        self.chain_score = connected
+        self.tips = set(connected)
+        for blockhash in connected:
+            self.tips.discard(self.chain[blockhash].previous_hash)
+        for previous_hash in list(self.unconnected):
+            if previous_hash not in self.chain:
+                del self.unconnected[previous_hash]
 
     async def batch_apply(self):
         # 無チェックで挿入するから要注意
@@ -536,10 +783,11 @@ class ChainBuilder(object):
         best_chain = self.best_chain.copy()
         batch_count = self.batch_size
         batched_blocks = list()
-        unused_index_cache = dict()
+        indexed_txs = list()
         async with create_db(V.DB_ACCOUNT_PATH) as db:
             cur = await db.cursor()
             try:
+                await user_account.refresh_my_address(cur)
                 block = None
                 while batch_count > 0 and len(best_chain) > 0:
                     batch_count -= 1
@@ -559,13 +807,10 @@ class ChainBuilder(object):
                         # inputs
                         for index, pair in enumerate(tx.inputs):
                             txhash, txindex = pair
-                            if pair in unused_index_cache:
-                                address, coin_id, amount = unused_index_cache.pop(pair)
-                            else:
-                                address, coin_id, amount = self.db.read_unused_index(txhash, txindex)
+                            address, coin_id, amount = self.db.read_unused_index(txhash, txindex)
                             # add address index only you need or add all index
                             if is_account_tx:
-                                is_account_input = (await read_address2userid(address=address, cur=cur)) is not None
+                                is_account_input = address in user_account.my_address
                             else:
                                 is_account_input = False
                             if is_account_input or chain_builder.db.db_config['addrindex']:
@@ -577,14 +822,13 @@ class ChainBuilder(object):
                         for index, (address, coin_id, amount) in enumerate(tx.outputs):
                             # add address index only you need or add all index
                             if is_account_tx:
-                                is_account_output = (await read_address2userid(address=address, cur=cur)) is not None
+                                is_account_output = address in user_account.my_address
                             else:
                                 is_account_output = False
                             if is_account_output or chain_builder.db.db_config['addrindex']:
                                 self.db.write_address_idx(address, tx.hash, index, coin_id, amount, False)
                             # add unused output index
                             self.db.write_unused_index(tx.hash, index, address, coin_id, amount)
-                            unused_index_cache[(tx.hash, index)] = (address, coin_id, amount)
 
                         # TXの種類による追加操作
                         if tx.type == C.TX_GENESIS:
@@ -604,15 +848,23 @@ class ChainBuilder(object):
 
                     # write block with txindex
                     self.db.write_block(block, account_tx)
+                    indexed_txs.extend(account_tx)
 
                 # block挿入終了
                 self.best_chain = best_chain
                 self.root_block = block
                 await self.db.batch_commit()
+                for block in batched_blocks:
+                    self.unindex_block(block)
+                # txs are readable from database now
+                for tx in indexed_txs:
+                    tx.recode_flag = 'database'
+                    tx_builder.cache.put(tx)
                 # root_blockよりHeightの小さいBlockを消す
                 for blockhash, block in self.chain.copy().items():
                     if self.root_block.height >= block.height:
                         del self.chain[blockhash]
+                self.prune_chain_score()
                 log.debug("Success batch {} blocks, root={}".format(len(batched_blocks), self.root_block))
                 # アカウントへ反映↓
                 await user_account.new_batch_apply(cur=cur, batched_blocks=batched_blocks)
@@ -631,33 +883,77 @@ class ChainBuilder(object):
         # meet chain order: root_block < new_block
         self.chain[new_block.hash] = new_block
         # BestChainの変化を調べる
-        new_best_block, new_best_chain = self.get_best_chain()
+        new_best_block = self.select_best_tip(self.connect_block(new_block))
         if self.best_block and new_best_block == self.best_block:
             return  # 操作を加える必要は無い
+        # find fork point, only blocks between old tip, new tip and fork point change
+        new_branch = list()
+        block = new_best_block
+        while block is not None and not self.is_main_block(block):
+            new_branch.append(block)
+            block = self.chain.get(block.previous_hash)
+        if block is None:
+            old_branch = self.best_chain.copy()
+            new_best_chain = new_branch
+        else:
+            index = self.best_block.height - block.height
+            old_branch = self.best_chain[:index]
+            new_best_chain = new_branch + self.best_chain[index:]
         # tx heightを合わせる
-        old_best_chain = self.best_chain.copy()
-        new_best_sets = set(new_best_chain) - set(old_best_chain)
-        old_best_sets = set(old_best_chain) - set(new_best_chain)
-        for index, block in enumerate(old_best_sets):
-            try:
-                old_best_chain[index + 1].next_hash = None
-            except IndexError:
-                pass
+        for block in old_branch:
+            block.next_hash = None
             for tx in block.txs:
                 tx.height = None
             block.f_orphan = True
-        for index, block in enumerate(new_best_sets):
-            try:
+        for index, block in enumerate(new_branch):
+            if index + 1 < len(new_best_chain):
                 new_best_chain[index + 1].next_hash = block.hash
-            except IndexError:
-                pass
             for tx in block.txs:
                 tx.height = block.height
             block.f_orphan = False
+        old_best_sets = set(old_branch)
+        new_best_sets = set(new_branch)
         # 変化しているので反映する
         self.best_block, self.best_chain = new_best_block, new_best_chain
+        for block in old_best_sets:
+            self.unindex_block(block)
+        for block in new_best_sets:
+            self.index_block(block)
         tx_builder.affect_new_chain(new_best_sets=new_best_sets, old_best_sets=old_best_sets)
         self.write_to_memory_file(new_block)
+        if new_block.height % C.MEMPOOL_FILE_REFRESH_SPAN == 0:
+            tx_builder.write_to_mempool_file()
+
+    def index_block(self, block):
+        """add main chain block to outpoint indexes"""
+        self.main_heights[block.height] = block
+        self.main_hashes.add(block.hash)
+        for tx in block.txs:
+            self.memory_txs[tx.hash] = block
+            for index, output in enumerate(tx.outputs):
+                self.memory_outputs[(tx.hash, index)] = (output, block)
+            for pair in tx.inputs:
+                self.memory_spent[pair] = (tx.hash, block)
+
+    def unindex_block(self, block):
+        """remove orphaned or batched block from outpoint indexes"""
+        if self.main_heights.get(block.height) is block:
+            del self.main_heights[block.height]
+        self.main_hashes.discard(block.hash)
+        for tx in block.txs:
+            if self.memory_txs.get(tx.hash) is block:
+                del self.memory_txs[tx.hash]
+            for index in range(len(tx.outputs)):
+                pair = (tx.hash, index)
+                if pair in self.memory_outputs and self.memory_outputs[pair][1] is block:
+                    del self.memory_outputs[pair]
+            for pair in tx.inputs:
+                if pair in self.memory_spent and self.memory_spent[pair][1] is block:
+                    del self.memory_spent[pair]
+
+    def is_main_block(self, block) -> bool:
+        """check the block is on memory main chain"""
+        return block.hash in self.main_hashes
 
     def get_block(self, blockhash=None, height=None):
         if height is not None:
@@ -669,7 +965,7 @@ class ChainBuilder(object):
             # Memory
             block = self.chain[blockhash]
             block.recode_flag = 'memory'
-            block.f_orphan = bool(block not in self.best_chain)
+            block.f_orphan = bool(block.hash not in self.main_hashes)
         else:
             # DataBase
             block = self.db.read_block(blockhash)
@@ -682,6 +978,11 @@ class ChainBuilder(object):
 
     def get_block_header(self, blockhash=None, height=None):
         if height is not None:
+            if height not in self.main_heights and 0 <= height <= self.best_block.height:
+                # DataBase, header file record by height
+                block_header = self.db.read_block_header_by_height(height)
+                if block_header is not None:
+                    return block_header
             blockhash = self.get_block_hash(height=height)
             if blockhash is None:
                 return None
@@ -702,9 +1003,9 @@ class ChainBuilder(object):
         elif height < 0:
             return None
         # Memory
-        for block in self.best_chain:
-            if height == block.height:
-                return block.hash
+        block = self.main_heights.get(height)
+        if block is not None:
+            return block.hash
         # DataBase
         return self.db.read_block_hash(height)
 
@@ -713,11 +1014,11 @@ class TransactionBuilder(object):
 
     def __init__(self):
         # TXs that Blocks don't contain
-        self.unconfirmed: Dict[bytes, TX] = dict()
+        self.unconfirmed = Mempool(C.MEMPOOL_SIZE_LIMIT)
         # TXs that MAIN chain contains
         self.chained_tx: MutableMapping[bytes, TX] = WeakValueDictionary()
         # DataBase contains TXs
-        self.cache: MutableMapping[bytes, TX] = WeakValueDictionary()
+        self.cache = TxCache(C.TX_CACHE_SIZE)
 
     async def put_unconfirmed(self, cur, tx):
         assert tx.height is None, 'Not unconfirmed tx {}'.format(tx)
@@ -726,28 +1027,54 @@ class TransactionBuilder(object):
         elif tx.hash in self.unconfirmed:
             log.debug('Already unconfirmed tx. {}'.format(tx))
             return
+        elif tx.hash in self.chained_tx:
+            log.debug('Already chained tx. {}'.format(tx))
+            return
         tx.create_time = time()
         tx.recode_flag = 'unconfirmed'
         self.unconfirmed[tx.hash] = tx
-        if tx.hash in self.chained_tx:
-            log.debug('Already chained tx. {}'.format(tx))
-            return
+        evicted = self.unconfirmed.evict()
+        if 0 < len(evicted):
+            user_account.affect_removed_txs(evicted)
+        if tx in evicted:
+            raise BlockChainError('Mempool is full, gas_price is too low {}'.format(tx))
         movement = await user_account.affect_new_tx(cur=cur, tx=tx)
         if not stream.is_disposed:
             stream.on_next(tx)
             if movement is not None:
                 stream.on_next(movement)
 
+    def write_to_mempool_file(self):
+        """dump unconfirmed txs to mempool_file"""
+        try:
+            s = time()
+            path = os.path.join(chain_builder.db.dirs, 'mempool.dat')
+            txs = sorted(self.unconfirmed.values(), key=lambda x: x.create_time)
+            dump_mempool_file(path, txs)
+            log.debug("dump {} unconfirmed txs {}mS".format(len(txs), int((time() - s) * 1000)))
+        except Exception as e:
+            log.warning(f"failed to dump mempool_file by '{str(e)}'")
+
+    def recover_from_mempool_file(self) -> List[TX]:
+        """recover unconfirmed txs from mempool_file, signature is not verified"""
+        path = os.path.join(chain_builder.db.dirs, 'mempool.dat')
+        if not os.path.exists(path):
+            log.debug("no mempool file found")
+            return list()
+        try:
+            txs = load_mempool_file(path)
+        except Exception:
+            log.warning("failed to recover from mempool_file", exc_info=True)
+            return list()
+        return [tx for tx in txs if tx.hash not in self.unconfirmed and tx.hash not in self.chained_tx]
+
     def get_tx(self, txhash, default=None):
         """get memory or unconfirmed or accounted txs"""
 
         # warning: WeakValueDictionary delete when out of reference
-        cached_tx = self.cache.get(txhash)
         chain_tx = self.chained_tx.get(txhash)
 
-        if cached_tx is not None:
-            tx = cached_tx
-        elif txhash in self.unconfirmed:
+        if txhash in self.unconfirmed:
             # unconfirmedより
             tx = self.unconfirmed[txhash]
             tx.recode_flag = 'unconfirmed'
@@ -759,10 +1086,13 @@ class TransactionBuilder(object):
             if tx.height is None: log.warning("Is unconfirmed. {}".format(tx))
         else:
             # Databaseより
+            tx = self.cache.get(txhash)
+            if tx is not None:
+                return tx
             tx = chain_builder.db.read_tx(txhash)
             if tx:
                 tx.recode_flag = 'database'
-                self.cache[txhash] = tx
+                self.cache.put(tx)
             else:
                 return default
         return tx
@@ -785,6 +1115,7 @@ class TransactionBuilder(object):
         # 状態を戻す
         for block in old_best_sets:
             for tx in block.txs:
+                self.cache.remove(tx.hash)
                 if tx.hash not in self.unconfirmed and tx.type not in (C.TX_POW_REWARD, C.TX_POS_REWARD):
                     self.unconfirmed[tx.hash] = tx
                 if tx.hash in self.chained_tx:
@@ -792,34 +1123,26 @@ class TransactionBuilder(object):
         # 新規に反映する
         for block in new_best_sets:
             for tx in block.txs:
+                self.cache.remove(tx.hash)
                 if tx.hash not in self.chained_tx:
                     self.chained_tx[tx.hash] = tx
                 if tx.hash in self.unconfirmed:
                     del self.unconfirmed[tx.hash]
 
         # delete expired unconfirmed txs
+        if P.F_NOW_BOOTING:
+            return  # not delete on booting..
         limit = int(time() - V.BLOCK_GENESIS_TIME - C.ACCEPT_MARGIN_TIME)
-        before_num = len(self.unconfirmed)
-        for txhash, tx in self.unconfirmed.copy().items():
-            if P.F_NOW_BOOTING:
-                break  # not delete on booting..
-            # Remove expired unconfirmed tx
-            if limit > tx.deadline:
-                log.debug("Remove unconfirmed 'expired' {}".format(tx))
-                del self.unconfirmed[txhash]
-                continue
-            # Remove tx include by both best_chain & unconfirmed
-            if txhash in self.chained_tx:
-                log.debug("Remove unconfirmed 'include on chain' {}".format(tx))
-                del self.unconfirmed[txhash]
-                continue
-            # note: It is better to wait for expire the TX
-            # if is_used_inputs(tx):
-            #    log.debug("Remove unconfirmed 'use used inputs' {}".format(tx))
-            #    del self.unconfirmed[txhash]
-            #    continue
-        if before_num != len(self.unconfirmed):
-            log.warning("Removed {} unconfirmed txs".format(before_num - len(self.unconfirmed)))
+        expired_txs = self.unconfirmed.pop_expired(limit)
+        for tx in expired_txs:
+            log.debug("Remove unconfirmed 'expired' {}".format(tx))
+        user_account.affect_removed_txs(expired_txs)
+        # note: It is better to wait for expire the TX
+        # if is_used_inputs(tx):
+        #    log.debug("Remove unconfirmed 'use used inputs' {}".format(tx))
+        #    del self.unconfirmed[txhash]
+        if 0 < len(expired_txs):
+            log.warning("Removed {} unconfirmed txs".format(len(expired_txs)))
 
 
 class UserAccount(object):
@@ -828,7 +1151,15 @@ class UserAccount(object):
         self.db_balance = Accounting()
         # {txhash: (ntype, movement, ntime),..}
         self.memory_movement = dict()
-        self.pre_fetch_addr = dict()
+        # {txhash: movement,..} balance delta of memory_movement, recoded log on database is prior
+        self.memory_delta: Dict[bytes, Accounting] = dict()
+        # {address: (user, is_inner, index),..} and {(user, is_inner): {index: address},..}
+        self.pre_fetch_addr: Dict[PyAddress, Tuple[int, bool, int]] = dict()
+        self.pre_fetch_path: Dict[Tuple[int, bool], Dict[int, PyAddress]] = dict()
+        # pooled addresses {address: user,..} and the last `pool` id
+        self.my_address: Dict[PyAddress, int] = dict()
+        self.my_address_uuid = 0
+        self.utxo = WalletUTXO()
 
     async def init(self, cur, f_delete=False):
         deleted = 0
@@ -857,47 +1188,87 @@ class UserAccount(object):
                 for index in range(last_index, last_index + C.GAP_ADDR_LIMIT):
                     bip = await read_bip_from_path(user=user, is_inner=is_inner, index=index, cur=cur)
                     addr = bip.get_address(hrp=V.BECH32_HRP, ver=0)
-                    self.pre_fetch_addr[addr] = (user, is_inner, index)
+                    self.add_pre_fetch_addr(addr, user, is_inner, index)
             if last_index == 0:
                 user_gap -= 1
             user += 1
         log.info(f"fill address prefetch len={len(self.pre_fetch_addr)}")
 
+        # wallet unspents, rebuild by batched blocks if database is changed
+        await self.utxo.load(cur, chain_builder.db.read_block_hash)
+        self.my_address.clear()
+        self.my_address_uuid = 0
+        if self.utxo.height < 0:
+            # all pooled addresses are found by replayed blocks, no need to scan
+            pooled = await read_new_pooled_address_list(last_uuid=0, cur=cur)
+            self.utxo.uuid = pooled[-1][0] if pooled else 0
+        await self.refresh_my_address(cur)
+
+    def is_my_address(self, address: PyAddress) -> bool:
+        return address in self.my_address or address in self.pre_fetch_addr
+
+    def add_pre_fetch_addr(self, address: PyAddress, user, is_inner, index):
+        self.pre_fetch_addr[address] = (user, is_inner, index)
+        self.pre_fetch_path.setdefault((user, is_inner), dict())[index] = address
+
+    def remove_pre_fetch_addr(self, address: PyAddress):
+        user, is_inner, index = self.pre_fetch_addr.pop(address)
+        del self.pre_fetch_path[(user, is_inner)][index]
+
+    async def refresh_my_address(self, cur):
+        """add new pooled addresses and find unspents on database if not scanned, ex. imported keys"""
+        for uuid, address, user in await read_new_pooled_address_list(last_uuid=self.my_address_uuid, cur=cur):
+            self.my_address[address] = user
+            self.my_address_uuid = uuid
+            if uuid <= self.utxo.uuid:
+                continue
+            utxo_list = list()
+            for dummy, txhash, txindex, coin_id, amount, f_used in chain_builder.db.read_address_idx_iter(address):
+                if f_used or chain_builder.db.read_unused_index(txhash, txindex) is None:
+                    continue
+                tx = tx_builder.get_account_tx(txhash)
+                if tx is None or tx.height is None:
+                    continue
+                utxo_list.append((txhash, txindex, address, tx.height, tx.type, coin_id, amount))
+            self.utxo.put_unspents(utxo_list, uuid)
+
     async def get_balance(self, cur, confirm=6):
         assert confirm < chain_builder.cache_limit - chain_builder.batch_size
         assert chain_builder.best_block, 'Not DataBase init'
         # database
         account = self.db_balance.copy()
-        # memory
+        # memory and unconfirmed
         limit_height = chain_builder.best_block.height - confirm
-        for block in chain_builder.best_chain:
-            for tx in block.txs:
-                move_log = await read_txhash2movelog(tx.hash, cur)
-                if move_log is None:
-                    if tx.hash in self.memory_movement:
-                        move_log = self.memory_movement[tx.hash]
-                if move_log:
-                    for user, coins in move_log.movement.items():
-                        for coin_id, amount in coins:
-                            if limit_height < block.height:
-                                if amount < 0:
-                                    account[user][coin_id] += amount
-                            else:
-                                # allow incoming balance
-                                account[user][coin_id] += amount
-        # unconfirmed
-        for tx in list(tx_builder.unconfirmed.values()):
-            move_log = await read_txhash2movelog(tx.hash, cur)
-            if move_log is None:
-                if tx.hash in self.memory_movement:
-                    move_log = self.memory_movement[tx.hash]
-            if move_log:
-                for user, coins in move_log.movement.items():
-                    for coin_id, amount in coins:
-                        if amount < 0:
-                            account[user][coin_id] += amount
+        for txhash, movement in list(self.memory_delta.items()):
+            block = chain_builder.memory_txs.get(txhash)
+            if block is not None:
+                # allow incoming balance
+                f_incoming = block.height <= limit_height
+            elif txhash in tx_builder.unconfirmed:
+                f_incoming = False
+            elif self._is_dropped_tx(txhash):
+                # orphaned or expired, never connected again
+                self.memory_movement.pop(txhash, None)
+                del self.memory_delta[txhash]
+                continue
+            else:
+                continue  # on a fork block, may be connected again
+            for user, coins in movement.items():
+                for coin_id, amount in coins:
+                    if amount < 0 or f_incoming:
+                        account[user][coin_id] += amount
         return account
 
+    def _is_dropped_tx(self, txhash) -> bool:
+        """memorized tx not on main chain nor unconfirmed and cannot be on main chain again"""
+        move_log = self.memory_movement.get(txhash)
+        tx = move_log.tx_ref() if move_log and move_log.tx_ref else None
+        if tx is None or tx.height is None:
+            return True  # released or removed from unconfirmed
+        # fork blocks lower than root block are not connected
+        root_height = chain_builder.root_block.height
+        return root_height is not None and tx.height <= root_height
+
     async def move_balance(self, cur, from_user, to_user, coins):
         assert isinstance(coins, Balance), 'coins is Balance'
         # DataBaseに即書き込む(Memoryに入れない)
@@ -908,19 +1279,23 @@ class UserAccount(object):
         self.db_balance += movements
         return txhash
 
+    def _get_memory_move_log(self, txhash) -> Optional[MoveLog]:
+        """MoveLog of memory_movement with balance delta, recoded log on database is prior"""
+        move_log = self.memory_movement.get(txhash)
+        if move_log is None or txhash not in self.memory_delta:
+            return move_log
+        tx = move_log.tx_ref() if move_log.tx_ref else None
+        return MoveLog(txhash, move_log.type, self.memory_delta[txhash], move_log.time, tx)
+
     async def get_movement_iter(self, start=0, f_dict=False):
-        async with create_db(V.DB_ACCOUNT_PATH) as db:
+        async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
             cur = await db.cursor()
             count = 0
             # Unconfirmed
-            for tx in sorted(tx_builder.unconfirmed.values(), key=lambda x: x.create_time, reverse=True):
-                move_log = await read_txhash2movelog(tx.hash, cur)
-                if move_log is None:
-                    if tx.hash in self.memory_movement:
-                        move_log = self.memory_movement[tx.hash]
-                else:
-                    if tx.hash in self.memory_movement:
-                        move_log.tx_ref = self.memory_movement[tx.hash].tx_ref
+            unconfirmed = [tx_builder.unconfirmed[txhash] for txhash in list(self.memory_movement)
+                           if txhash in tx_builder.unconfirmed]
+            for tx in sorted(unconfirmed, key=lambda x: x.create_time, reverse=True):
+                move_log = self._get_memory_move_log(tx.hash)
                 if move_log:
                     if count >= start:
                         if f_dict:
@@ -931,13 +1306,7 @@ class UserAccount(object):
             # Memory
             for block in reversed(chain_builder.best_chain):
                 for tx in block.txs:
-                    move_log = await read_txhash2movelog(tx.hash, cur)
-                    if move_log is None:
-                        if tx.hash in self.memory_movement:
-                            move_log = self.memory_movement[tx.hash]
-                    else:
-                        if tx.hash in self.memory_movement:
-                            move_log.tx_ref = self.memory_movement[tx.hash].tx_ref
+                    move_log = self._get_memory_move_log(tx.hash)
                     if move_log:
                         if count >= start:
                             if f_dict:
@@ -946,7 +1315,7 @@ class UserAccount(object):
                                 yield move_log.get_tuple_data()
                         count += 1
             # DataBase
-            async for move_log in read_movelog_iter(cur, start - count):
+            async for move_log in read_movelog_iter(cur, max(0, start - count)):
                 # TRANSFERなど はDBとMemoryの両方に存在する
                 if move_log.txhash in self.memory_movement:
                     continue
@@ -964,6 +1333,7 @@ class UserAccount(object):
                     self.db_balance += move_log.movement
                     if tx.hash in self.memory_movement:
                         del self.memory_movement[tx.hash]
+                        self.memory_delta.pop(tx.hash, None)
                     # log.debug("Already recoded log {}".format(tx))
                 elif tx.hash in self.memory_movement:
                     # db_balanceに追加
@@ -971,11 +1341,37 @@ class UserAccount(object):
                     self.db_balance += movement
                     # memory_movementから削除
                     del self.memory_movement[tx.hash]
+                    self.memory_delta.pop(tx.hash, None)
                     # insert_log
                     await insert_movelog(movement, cur, ntype, ntime, tx.hash)
 
+        # wallet unspents
+        await self.refresh_my_address(cur)
+        for block in batched_blocks:
+            if block.height <= self.utxo.height:
+                continue  # already applied
+            if chain_builder.root_block and chain_builder.root_block.height is not None \
+                    and chain_builder.root_block.height < block.height:
+                continue  # memorized block on boot, not on database yet
+            await self.utxo.apply_block(cur, block, self.is_my_address)
+        await self.utxo.commit_tip(cur)
+
+    def affect_removed_txs(self, txs):
+        """forget unconfirmed txs evicted or expired from mempool"""
+        for tx in txs:
+            self.memory_movement.pop(tx.hash, None)
+            self.memory_delta.pop(tx.hash, None)
+            self.utxo.memory.pop(tx.hash, None)
+
     async def affect_new_tx(self, cur, tx) -> Optional[Accounting]:
         movement = Accounting(txhash=tx.hash)
+        # wallet unspents
+        await self.refresh_my_address(cur)
+        for address, coin_id, amount in tx.outputs:
+            if self.is_my_address(address):
+                self.utxo.put_memory_tx(tx)
+                break
+
         # already registered by send_from_apply method
         if tx.hash in self.memory_movement:
             return None
@@ -989,7 +1385,7 @@ class UserAccount(object):
             if address in self.pre_fetch_addr:
                 user = await self.get_userid_from_prefetch(address, cur)
             else:
-                user = await read_address2userid(address, cur)
+                user = self.my_address.get(address)
             if user is not None:
                 if tx.type == C.TX_POS_REWARD:
                     # subtract staking reward from @Staked
@@ -1000,7 +1396,7 @@ class UserAccount(object):
             if address in self.pre_fetch_addr:
                 user = await self.get_userid_from_prefetch(address, cur)
             else:
-                user = await read_address2userid(address, cur)
+                user = self.my_address.get(address)
             if user is not None:
                 if tx.type == C.TX_POS_REWARD:
                     # add staking reward to @Staked
@@ -1015,6 +1411,9 @@ class UserAccount(object):
             return None  # cannot find no movement to recode, skip
         move_log = MoveLog(tx.hash, tx.type, movement, tx.time, tx)
         self.memory_movement[tx.hash] = move_log
+        # balance delta, tx created by wallet is already recoded
+        db_move_log = await read_txhash2movelog(tx.hash, cur)
+        self.memory_delta[tx.hash] = movement if db_move_log is None else db_move_log.movement
 
         # find account related tx
         log.info("affected account by {}".format(tx))
@@ -1038,37 +1437,141 @@ class UserAccount(object):
                     break
 
         # insert keypair to database
-        last_index = 0
-        for addr, value in list(self.pre_fetch_addr.items()):
-            if user != value[0] or is_inner is not value[1]:
-                continue
-            if last_index < value[2]:
-                last_index = value[2]
-            if index < value[2]:
-                continue
-            if addr in self.pre_fetch_addr:
-                del self.pre_fetch_addr[addr]
-            await insert_keypair_from_bip32(ck=addr, user=user, is_inner=is_inner, index=value[2], cur=cur)
+        path = self.pre_fetch_path[(user, is_inner)]
+        last_index = max(path)
+        for used_index in sorted(i for i in path if i <= index):
+            addr = path[used_index]
+            self.remove_pre_fetch_addr(addr)
+            await insert_keypair_from_bip32(ck=addr, user=user, is_inner=is_inner, index=used_index, cur=cur)
+            self.my_address[addr] = user
             log.info("generate new address from pre-fetch {}".format(addr))
 
         # insert new pre-fetched address
         new_index = last_index + 1
         new_bip = await read_bip_from_path(user=user, is_inner=is_inner, index=new_index, cur=cur)
-        self.pre_fetch_addr[new_bip.get_address(hrp=V.BECH32_HRP, ver=0)] = (user, is_inner, new_index)
+        self.add_pre_fetch_addr(new_bip.get_address(hrp=V.BECH32_HRP, ver=0), user, is_inner, new_index)
 
         # add new account if find index=0 addr
         if index == 0:
-            new_user = max(map(lambda x: x[0], self.pre_fetch_addr.values())) + 1
+            new_user = max(user for user, is_inner in self.pre_fetch_path) + 1
             for is_inner in (True, False):
                     for new_index in range(C.GAP_ADDR_LIMIT):
                         new_bip = await read_bip_from_path(
                             user=new_user, is_inner=is_inner, index=new_index, cur=cur)
                         new_addr = new_bip.get_address(hrp=V.BECH32_HRP, ver=0)
-                        self.pre_fetch_addr[new_addr] = (new_user, is_inner, new_index)
+                        self.add_pre_fetch_addr(new_addr, new_user, is_inner, new_index)
 
         return user
 
 
+def decode_tx_bin(txhash, height, b, offset):
+    """decode tx recoded on block binary"""
+    bin_len, sign_len, r_len = struct_tx.unpack_from(b, offset)
+    offset += struct_tx.size
+    b_tx = bytes(b[offset:offset + bin_len])
+    offset += bin_len
+    b_sign = bytes(b[offset:offset + sign_len])
+    offset += sign_len
+    R = bytes(b[offset:offset + r_len])
+    if txhash != sha256d_hash(b_tx):
+        return None  # will be forked
+    tx = TX.from_binary(binary=b_tx)
+    tx.height = height
+    tx.signature = bin2signature(b_sign)
+    tx.R = R
+    return tx
+
+
+def encode_unused_index(key, value):
+    """encode coins cache entry to `_unused_index` key and value"""
+    txhash, txindex = key
+    k = txhash + txindex.to_bytes(1, ITER_ORDER)
+    if value is None:
+        return k, None
+    address, coin_id, amount = value
+    return k, struct_unused_idx.pack(address.binary(), coin_id, amount)
+
+
+def get_database_dir_name(db_config):
+    """database folder name, split and single layout use different folder"""
+    dir_name = f"db-tx{int(db_config['txindex'])}-addr{int(db_config['addrindex'])}-ver{DB_VERSION}"
+    if db_config.get('single'):
+        dir_name += "-single"
+    return dir_name
+
+
+def get_single_table_options(table_options):
+    """options of single LevelDB, cache and buffer are summed and bloom filter is the largest"""
+    options = dict()
+    for name in DataBase.database_list:
+        for key, value in table_options.get(name, dict()).items():
+            if value is None:
+                continue
+            elif key == 'bloom_filter_bits':
+                options[key] = max(options.get(key, 0), value)
+            elif key in ('lru_cache_size', 'write_buffer_size'):
+                options[key] = options.get(key, 0) + value
+            else:
+                options[key] = value
+    return options
+
+
+def migrate_database_layout(**kwargs):
+    """copy split layout `db-tx*-addr*-ver0` to single LevelDB layout"""
+    db_config = DataBase.db_config.copy()
+    db_config.update(kwargs)
+    db_config['single'] = False
+    src_dirs = os.path.join(V.DB_HOME_DIR, get_database_dir_name(db_config))
+    db_config['single'] = True
+    dst_dirs = os.path.join(V.DB_HOME_DIR, get_database_dir_name(db_config))
+    if not os.path.exists(src_dirs):
+        log.info("no split layout database found, skip migration")
+        return False
+    elif os.path.exists(dst_dirs):
+        log.info("single layout database already exists, skip migration")
+        return False
+    t = time()
+    tmp_dirs = dst_dirs + ".tmp"
+    if os.path.exists(tmp_dirs):
+        shutil.rmtree(tmp_dirs)
+    os.mkdir(tmp_dirs)
+    options = get_single_table_options(db_config['table_options'])
+    dst_db = plyvel.DB(os.path.join(tmp_dirs, 'tables'), create_if_missing=True, **options)
+    try:
+        for name in DataBase.database_list:
+            if not os.path.exists(os.path.join(src_dirs, name[1:])):
+                log.info("skip table {} not found".format(name))
+                continue
+            src_db = plyvel.DB(os.path.join(src_dirs, name[1:]), create_if_missing=False)
+            prefix = TABLE_PREFIX[name]
+            count = 0
+            batch = dst_db.write_batch()
+            for k, v in src_db.iterator():
+                batch.put(prefix + k, v)
+                count += 1
+                if count % 10000 == 0:
+                    batch.write()
+                    batch = dst_db.write_batch()
+            batch.write()
+            src_db.close()
+            log.info("migrate table {} {} keys".format(name, count))
+    finally:
+        dst_db.close()
+    # memory section file and block files
+    memory_path = os.path.join(src_dirs, 'memory.mpac')
+    if os.path.exists(memory_path):
+        shutil.copyfile(memory_path, os.path.join(tmp_dirs, 'memory.mpac'))
+    blocks_path = os.path.join(src_dirs, 'blocks')
+    if os.path.exists(blocks_path):
+        shutil.copytree(blocks_path, os.path.join(tmp_dirs, 'blocks'))
+    headers_path = os.path.join(src_dirs, 'headers.dat')
+    if os.path.exists(headers_path):
+        shutil.copyfile(headers_path, os.path.join(tmp_dirs, 'headers.dat'))
+    os.rename(tmp_dirs, dst_dirs)
+    log.info("finish database migration to {} {}Sec".format(dst_dirs, round(time() - t, 3)))
+    return True
+
+
 class BlockBuilderError(Exception):
     pass
 
@@ -1082,4 +1585,5 @@ __all__ = [
     "chain_builder",
     "tx_builder",
     "user_account",
+    "migrate_database_layout",
 ]
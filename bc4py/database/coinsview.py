@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from typing import Dict, Tuple, Optional
+from logging import getLogger
+
+
+log = getLogger('bc4py')
+
+# rough memory usage of one entry include key, value and OrderedDict link (bytes)
+ENTRY_SIZE = 300
+
+
+class CoinsViewCache(object):
+    """
+    decoded unused outputs cache in front of `_unused_index`
+
+    value is (address, coin_id, amount) or None when spent or not found
+    "entries" is same with database, evicted by LRU to max_size bytes
+    "dirty" is written by batch, flushed to database on commit and dropped on rollback
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.dirty: Dict[Tuple[bytes, int], Optional[tuple]] = dict()
+        self.hit = 0
+        self.miss = 0
+
+    def __repr__(self):
+        return "<CoinsViewCache len={} dirty={} hit={} miss={}>".format(
+            len(self.entries), len(self.dirty), self.hit, self.miss)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, key):
+        """get database entry or raise KeyError"""
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.miss += 1
+            raise
+        self.entries.move_to_end(key)
+        self.hit += 1
+        return value
+
+    def put(self, key, value):
+        """cache value read from database"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.evict()
+
+    def evict(self):
+        limit = self.max_size // ENTRY_SIZE
+        while limit < len(self.entries):
+            self.entries.popitem(last=False)
+
+    def write(self, key, value):
+        """write by batch, value None means spent"""
+        self.dirty[key] = value
+
+    def flush(self, batch, encoder):
+        """write dirty entries to database batch"""
+        for key, value in self.dirty.items():
+            k, v = encoder(key, value)
+            if v is None:
+                batch.delete(k)
+            else:
+                batch.put(k, v)
+
+    def commit(self):
+        """dirty entries are written to database"""
+        for key, value in self.dirty.items():
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+        self.dirty.clear()
+        self.evict()
+
+    def rollback(self):
+        self.dirty.clear()
+
+    def getinfo(self):
+        total = self.hit + self.miss
+        return {
+            'entries': len(self.entries),
+            'dirty': len(self.dirty),
+            'size': len(self.entries) * ENTRY_SIZE,
+            'max_size': self.max_size,
+            'hit': self.hit,
+            'miss': self.miss,
+            'hit_ratio': round(self.hit / total, 4) if total else 0.0,
+        }
+
+
+__all__ = [
+    "CoinsViewCache",
+]
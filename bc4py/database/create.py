@@ -3,7 +3,9 @@ from bc4py.bip32 import BIP32_HARDEN
 from aiocontext import async_contextmanager
 from aiosqlite import connect, Connection, Cursor
 from logging import getLogger, INFO
+from typing import Optional, Dict, List
 from time import time
+import asyncio
 import re
 import os
 
@@ -11,14 +13,131 @@ log = getLogger('bc4py')
 getLogger('aiosqlite').setLevel(INFO)
 
 
+class ConnectionPool(object):
+    """
+    long-lived connections of a database, one writer and readers
+
+    writer is used by one task at a time, changes not committed are rolled back on release
+    readers are query only and do not wait for the writer on WAL journal mode
+    """
+
+    def __init__(self, path, reader_num):
+        self.path = path
+        self.reader_num = reader_num
+        self.writer: Optional[Connection] = None
+        self.write_lock = asyncio.Lock()
+        self.write_task: Optional[asyncio.Task] = None
+        self.readers: List[Connection] = list()
+        self.reader_count = 0
+        self.idle_readers: asyncio.Queue = asyncio.Queue()
+
+    def __repr__(self):
+        return "<ConnectionPool {} readers={}/{} idle={}>".format(
+            self.path, len(self.readers), self.reader_num, self.idle_readers.qsize())
+
+    async def _connect(self, readonly) -> Connection:
+        # reader begin and end transaction by itself
+        conn = await connect(
+            self.path, timeout=120.0, cached_statements=C.SQLITE_CACHED_STATEMENTS,
+            isolation_level=None if readonly else 'IMMEDIATE')
+
+        # cache size, default 2000
+        await conn.execute("PRAGMA cache_size = %d" % C.SQLITE_CACHE_SIZE)
+
+        # journal mode
+        await conn.execute("PRAGMA journal_mode = %s" % C.SQLITE_JOURNAL_MODE)
+
+        # synchronous mode
+        await conn.execute("PRAGMA synchronous = %s" % C.SQLITE_SYNC_MODE)
+
+        # reject write statement
+        if readonly:
+            await conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @async_contextmanager
+    async def get_writer(self, strict):
+        task = asyncio.Task.current_task()
+        if task is not None and task is self.write_task:
+            raise RuntimeError('writer of {} is nested in a task, it waits for itself'.format(self.path))
+        async with self.write_lock:
+            if self.writer is None:
+                self.writer = await self._connect(readonly=False)
+            conn = self.writer
+            # isolation level
+            conn.isolation_level = 'EXCLUSIVE' if strict else 'IMMEDIATE'
+            self.write_task = task
+            try:
+                yield conn
+            finally:
+                self.write_task = None
+                try:
+                    await conn.rollback()
+                except Exception:
+                    log.warning("close broken writer connection", exc_info=True)
+                    self.writer = None
+                    await conn.close()
+
+    @async_contextmanager
+    async def get_reader(self):
+        # None on idle queue is a reader slot without connection
+        if not self.idle_readers.empty():
+            conn = self.idle_readers.get_nowait()
+        elif self.reader_count < self.reader_num:
+            self.reader_count += 1
+            conn = None
+        else:
+            conn = await self.idle_readers.get()
+        if conn is None:
+            try:
+                conn = await self._connect(readonly=True)
+            except Exception:
+                # give back the slot to a waiting task
+                self.idle_readers.put_nowait(None)
+                raise
+            self.readers.append(conn)
+        try:
+            # snapshot is kept until rollback even if cursors are not exhausted
+            await conn.execute("BEGIN")
+            yield conn
+        finally:
+            try:
+                await conn.execute("ROLLBACK")
+                self.idle_readers.put_nowait(conn)
+            except Exception:
+                log.warning("close broken reader connection", exc_info=True)
+                self.readers.remove(conn)
+                self.idle_readers.put_nowait(None)
+                await conn.close()
+
+    async def close(self):
+        async with self.write_lock:
+            if self.writer is not None:
+                await self.writer.close()
+                self.writer = None
+        for conn in self.readers:
+            await conn.close()
+        self.readers.clear()
+        self.reader_count = 0
+        self.idle_readers = asyncio.Queue()
+        log.debug("close connection pool {}".format(self.path))
+
+
+# {path: pool}
+connection_pools: Dict[str, ConnectionPool] = dict()
+
+
 @async_contextmanager
-async def create_db(path, strict=False) -> Connection:
+async def create_db(path, strict=False, readonly=False) -> Connection:
     """
-    account database connector
+    account database connector, connections are reused by pool
 
     f_strict:
         Phantom read sometimes occur on IMMEDIATE, avoid it by EXCLUSIVE.
 
+    readonly:
+        Use a query only connection, do not wait for writer. ex. API queries
+
     journal_mode: (Do not use OFF mode)
         DELETE: delete journal file at end of transaction
         TRUNCATE: set journal file size to 0 at the end of transaction
@@ -31,26 +150,26 @@ async def create_db(path, strict=False) -> Connection:
         EXTRA: provides additional durability if the commit is followed closely by a power loss.
         NORMAL: sync at the most critical moments, but less often than in FULL mode.
         OFF: without syncing as soon as it has handed data off to the operating system.
-    """
-    conn = await connect(path, timeout=120.0)
 
-    # cache size, default 2000
-    await conn.execute("PRAGMA cache_size = %d" % C.SQLITE_CACHE_SIZE)
-
-    # journal mode
-    await conn.execute("PRAGMA journal_mode = %s" % C.SQLITE_JOURNAL_MODE)
-
-    # isolation level
-    conn.isolation_level = 'EXCLUSIVE' if strict else 'IMMEDIATE'
+    warning: do not nest writer in a task, raise RuntimeError instead of waiting for itself
+    warning: do not wait for the network with writer, other writers wait for it
+    """
+    pool = connection_pools.get(path)
+    if pool is None:
+        pool = connection_pools[path] = ConnectionPool(path, C.SQLITE_READER_NUM)
+    if readonly:
+        async with pool.get_reader() as conn:
+            yield conn
+    else:
+        async with pool.get_writer(strict) as conn:
+            yield conn
 
-    # synchronous mode
-    await conn.execute("PRAGMA synchronous = %s" % C.SQLITE_SYNC_MODE)
 
-    # manage close process with contextmanager
-    try:
-        yield conn
-    finally:
-        await conn.close()
+async def close_db_pool():
+    """close all pooled connections, call on exit"""
+    for pool in list(connection_pools.values()):
+        await pool.close()
+    connection_pools.clear()
 
 
 def sql_info(data):
@@ -120,12 +239,14 @@ async def generate_wallet_db(cur: Cursor):
     # index
     sql = [
         "CREATE INDEX IF NOT EXISTS 'hash_idx' ON `log` (`hash`,`index`)",
+        "CREATE INDEX IF NOT EXISTS 'index_idx' ON `log` (`index`)",
         "CREATE INDEX IF NOT EXISTS 'name_idx' ON `account` (`name`)",
         "CREATE INDEX IF NOT EXISTS 'ck_idx' ON `pool` (`ck`)",
         "CREATE INDEX IF NOT EXISTS 'user_idx' ON `pool` (`user`)"
     ]
     for s in sql:
         await cur.execute(s)
+    await generate_utxo_table(cur)
     # default account
     if V.EXTENDED_KEY_OBJ is None or V.EXTENDED_KEY_OBJ.secret is None:
         raise Exception('Need to create root accounts first, do "import_keystone" before')
@@ -139,6 +260,28 @@ async def generate_wallet_db(cur: Cursor):
     await cur.executemany("INSERT OR IGNORE INTO `account` VALUES (?,?,?,?,?)", accounts)
 
 
+async def generate_utxo_table(cur: Cursor):
+    """wallet unspents on database and the last block and pool id updated by"""
+    await cur.execute("""
+    CREATE TABLE IF NOT EXISTS `utxo` (
+    `hash` BINARY NOT NULL,
+    `index` INTEGER NOT NULL,
+    `address` BLOB NOT NULL,
+    `height` INTEGER NOT NULL,
+    `type` INTEGER NOT NULL,
+    `coin_id` INTEGER NOT NULL,
+    `amount` INTEGER NOT NULL,
+    PRIMARY KEY (`hash`,`index`)
+    )""")
+    await cur.execute("""
+    CREATE TABLE IF NOT EXISTS `utxo_tip` (
+    `id` INTEGER PRIMARY KEY,
+    `height` INTEGER NOT NULL,
+    `hash` BINARY,
+    `uuid` INTEGER NOT NULL
+    )""")
+
+
 async def affect_new_change():
     """update differences when wallet format changed"""
     async with create_db(V.DB_ACCOUNT_PATH) as db:
@@ -186,6 +329,20 @@ async def affect_new_change():
             await db.commit()
             log.info("add `is_used` column to `pool` table")
 
+        # add index to find first row of logs
+        await cur.execute("SELECT `name` FROM `sqlite_master` WHERE `type`='index' AND `name`='index_idx'")
+        if await cur.fetchone() is None:
+            await cur.execute("CREATE INDEX IF NOT EXISTS 'index_idx' ON `log` (`index`)")
+            await db.commit()
+            log.info("add `index_idx` to `log` table")
+
+        # add utxo table
+        await cur.execute("SELECT `name` FROM `sqlite_master` WHERE `type`='table' AND `name`='utxo'")
+        if await cur.fetchone() is None:
+            await generate_utxo_table(cur)
+            await db.commit()
+            log.info("add `utxo` table")
+
 
 async def recreate_wallet_db(db):
     raise NotImplemented
@@ -193,6 +350,7 @@ async def recreate_wallet_db(db):
 
 __all__ = [
     "create_db",
+    "close_db_pool",
     "sql_info",
     "check_account_db",
     "recreate_wallet_db",
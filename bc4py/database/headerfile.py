@@ -0,0 +1,119 @@
+from logging import getLogger
+from typing import List, Optional, Tuple
+from struct import Struct
+import mmap
+import os
+
+
+log = getLogger('bc4py')
+
+# [height][flag][work_hash][80bytes block header]
+struct_header = Struct('>IB32s80s')
+
+# numpy dtype of a record, block header is little endian
+NUMPY_FIELDS = [
+    ('height', '>u4'),
+    ('flag', 'u1'),
+    ('work', 'S32'),
+    ('version', '<u4'),
+    ('previous_hash', 'S32'),
+    ('merkleroot', 'S32'),
+    ('time', '<u4'),
+    ('bits', '<u4'),
+    ('nonce', 'S4'),
+]
+
+
+class HeaderFile(object):
+    """
+    append only file of fixed width header records
+
+    record of height N is written at N * record size, so read by height is O(1)
+    written records are pending until commit, same with BlockFile
+    """
+
+    def __init__(self, path, sync=False):
+        if not os.path.exists(path):
+            open(path, mode='ab').close()
+        self.path = path
+        self.sync = sync
+        # committed records
+        self.length = os.path.getsize(path) // struct_header.size
+        self.pending: List[bytes] = list()
+        self.map: Optional[mmap.mmap] = None
+
+    def __len__(self):
+        return self.length
+
+    def put(self, height, flag, work_hash, b_header):
+        """add next height record, written when commit"""
+        assert height == self.length + len(self.pending), \
+            'header height is not continuous {}!={}'.format(height, self.length + len(self.pending))
+        self.pending.append(struct_header.pack(height, flag, work_hash, b_header))
+
+    def commit(self):
+        """write pending records, call before database batch write"""
+        if len(self.pending) == 0:
+            return
+        try:
+            with open(self.path, mode='r+b') as fp:
+                fp.seek(self.length * struct_header.size)
+                fp.write(b''.join(self.pending))
+                fp.flush()
+                if self.sync:
+                    os.fsync(fp.fileno())
+        except Exception:
+            # partly written records are read after file grown
+            os.truncate(self.path, self.length * struct_header.size)
+            raise
+        self.length += len(self.pending)
+        self.pending.clear()
+
+    def rollback(self):
+        """discard pending records"""
+        self.pending.clear()
+
+    def truncate(self, length):
+        """remove records not committed on database"""
+        assert len(self.pending) == 0, 'truncate with pending records'
+        self.map = None
+        os.truncate(self.path, length * struct_header.size)
+        self.length = length
+        log.debug("truncate header file to {} records".format(length))
+
+    def _get_map(self) -> mmap.mmap:
+        if self.map is None or len(self.map) < self.length * struct_header.size:
+            # first access or file grown after mapped
+            with open(self.path, mode='rb') as fp:
+                self.map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map
+
+    def read(self, height) -> Optional[Tuple[int, int, bytes, bytes]]:
+        """return (height, flag, work_hash, b_header) or None"""
+        if height < 0 or self.length <= height:
+            return None
+        return struct_header.unpack_from(self._get_map(), height * struct_header.size)
+
+    def get_numpy_view(self):
+        """
+        numpy structured array of committed records without copy, require numpy
+
+        columns are views too, ex. `view['time']`, `view['bits']` and `view['flag']`
+        """
+        import numpy
+        dtype = numpy.dtype(NUMPY_FIELDS)
+        assert dtype.itemsize == struct_header.size
+        if self.length == 0:
+            return numpy.zeros(0, dtype=dtype)
+        return numpy.frombuffer(self._get_map(), dtype=dtype, count=self.length)
+
+    def close(self):
+        # note: mmap is closed when all numpy view released
+        self.map = None
+        log.debug("close header file")
+
+
+__all__ = [
+    "struct_header",
+    "HeaderFile",
+]
@@ -0,0 +1,196 @@
+from bc4py.chain.tx import TX
+from bc4py.chain.utils import signature2bin, bin2signature
+from bisect import bisect_left, insort
+from heapq import heappush, heappop, heapify
+from typing import Dict, Set, List, Tuple, MutableMapping
+from logging import getLogger
+from struct import Struct
+import os
+
+
+log = getLogger('bc4py')
+
+# mempool file record [bin_len][sign_len][r_len][create_time] + [tx binary][signature][R]
+struct_mempool_tx = Struct('>IIId')
+MEMPOOL_FILE_MAGIC = b'bc4py-mempool-0\n'
+
+
+class Mempool(MutableMapping):
+    """
+    unconfirmed txs with indexes, {txhash: tx}
+
+    "spent" is outpoint -> txhashes spending it
+    "parents" and "children" link txs spending outputs of other unconfirmed txs
+    "fee_index" is sorted list of (gas_price, txhash), lowest first
+    "deadlines" is heap of (deadline, txhash), removed txs are skipped when popped
+    total_size is limited by size_limit, lowest gas_price tx and descendants are evicted
+    """
+
+    def __init__(self, size_limit):
+        self.size_limit = size_limit
+        self.total_size = 0
+        self.txs: Dict[bytes, TX] = dict()
+        self.spent: Dict[Tuple[bytes, int], Set[bytes]] = dict()
+        self.parents: Dict[bytes, Set[bytes]] = dict()
+        self.children: Dict[bytes, Set[bytes]] = dict()
+        self.types: Dict[int, Set[bytes]] = dict()
+        self.fee_index: List[Tuple[int, bytes]] = list()
+        self.deadlines: List[Tuple[int, bytes]] = list()
+
+    def __repr__(self):
+        return "<Mempool len={} size={}/{}>".format(len(self.txs), self.total_size, self.size_limit)
+
+    def __getitem__(self, txhash) -> TX:
+        return self.txs[txhash]
+
+    def __contains__(self, txhash):
+        return txhash in self.txs
+
+    def __iter__(self):
+        return iter(self.txs)
+
+    def __len__(self):
+        return len(self.txs)
+
+    def __setitem__(self, txhash, tx: TX):
+        assert txhash == tx.hash, 'key is not txhash'
+        if txhash in self.txs:
+            del self[txhash]
+        self.txs[txhash] = tx
+        self.total_size += tx.total_size
+        insort(self.fee_index, (tx.gas_price, txhash))
+        heappush(self.deadlines, (tx.deadline, txhash))
+        self.types.setdefault(tx.type, set()).add(txhash)
+        # inputs
+        parents = set()
+        for pair in tx.inputs:
+            self.spent.setdefault(pair, set()).add(txhash)
+            if pair[0] in self.txs:
+                parents.add(pair[0])
+                self.children[pair[0]].add(txhash)
+        self.parents[txhash] = parents
+        # outputs already spent by unconfirmed txs (ex. re-added from orphan block)
+        children = set()
+        for index in range(len(tx.outputs)):
+            for spender in self.spent.get((txhash, index), ()):
+                children.add(spender)
+                self.parents[spender].add(txhash)
+        self.children[txhash] = children
+
+    def __delitem__(self, txhash):
+        tx = self.txs.pop(txhash)
+        self.total_size -= tx.total_size
+        index = bisect_left(self.fee_index, (tx.gas_price, txhash))
+        del self.fee_index[index]
+        self.types[tx.type].discard(txhash)
+        for pair in tx.inputs:
+            spenders = self.spent.get(pair)
+            if spenders is None:
+                continue
+            spenders.discard(txhash)
+            if len(spenders) == 0:
+                del self.spent[pair]
+        for parent in self.parents.pop(txhash):
+            self.children[parent].discard(txhash)
+        for child in self.children.pop(txhash):
+            self.parents[child].discard(txhash)
+        if 64 < len(self.deadlines) and len(self.txs) * 2 < len(self.deadlines):
+            # compact heap of removed txs
+            self.deadlines = [(tx.deadline, txhash) for txhash, tx in self.txs.items()]
+            heapify(self.deadlines)
+
+    def iter_by_fee(self):
+        """iterate txs by gas_price, highest first"""
+        for gas_price, txhash in reversed(self.fee_index):
+            yield self.txs[txhash]
+
+    def get_by_type(self, txtype) -> List[TX]:
+        return [self.txs[txhash] for txhash in self.types.get(txtype, ())]
+
+    def get_descendants(self, txhash) -> Set[bytes]:
+        """txhashes depend on outputs of the tx directly or indirectly"""
+        descendants = set()
+        checking = [txhash]
+        while checking:
+            for child in self.children[checking.pop()]:
+                if child not in descendants:
+                    descendants.add(child)
+                    checking.append(child)
+        return descendants
+
+    def pop_expired(self, limit) -> List[TX]:
+        """remove txs with deadline older than limit"""
+        removed = list()
+        while 0 < len(self.deadlines) and self.deadlines[0][0] < limit:
+            deadline, txhash = heappop(self.deadlines)
+            tx = self.txs.get(txhash)
+            if tx is None or tx.deadline != deadline:
+                continue  # already removed
+            removed.append(self.pop(txhash))
+        return removed
+
+    def evict(self) -> List[TX]:
+        """remove lowest gas_price tx and descendants until total_size is under size_limit"""
+        removed = list()
+        while self.size_limit < self.total_size and 0 < len(self.fee_index):
+            gas_price, txhash = self.fee_index[0]
+            for descendant in self.get_descendants(txhash):
+                removed.append(self.pop(descendant))
+            removed.append(self.pop(txhash))
+        if removed:
+            log.debug("evict {} unconfirmed txs by size limit {}".format(len(removed), self.size_limit))
+        return removed
+
+    def getinfo(self):
+        return {
+            'txs': len(self.txs),
+            'size': self.total_size,
+            'size_limit': self.size_limit,
+            'spent': len(self.spent),
+            'min_gas_price': self.fee_index[0][0] if self.fee_index else None,
+            'max_gas_price': self.fee_index[-1][0] if self.fee_index else None,
+        }
+
+
+def dump_mempool_file(path, txs):
+    """write txs to mempool file, replace after all written"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, mode='bw') as fp:
+        fp.write(MEMPOOL_FILE_MAGIC)
+        for tx in txs:
+            b_sign = signature2bin(tx.signature)
+            fp.write(struct_mempool_tx.pack(len(tx.b), len(b_sign), len(tx.R), tx.create_time))
+            fp.write(tx.b)
+            fp.write(b_sign)
+            fp.write(tx.R)
+    os.replace(tmp_path, path)
+
+
+def load_mempool_file(path) -> List[TX]:
+    """read txs of mempool file, signatures are not verified"""
+    with open(path, mode='br') as fp:
+        b = fp.read()
+    if not b.startswith(MEMPOOL_FILE_MAGIC):
+        raise ValueError('unknown mempool file format')
+    txs = list()
+    offset = len(MEMPOOL_FILE_MAGIC)
+    while offset < len(b):
+        bin_len, sign_len, r_len, create_time = struct_mempool_tx.unpack_from(b, offset)
+        offset += struct_mempool_tx.size
+        tx = TX.from_binary(binary=b[offset:offset + bin_len])
+        offset += bin_len
+        tx.signature = bin2signature(b[offset:offset + sign_len])
+        offset += sign_len
+        tx.R = b[offset:offset + r_len]
+        offset += r_len
+        tx.height = None
+        tx.create_time = create_time
+        txs.append(tx)
+    return txs
+
+
+__all__ = [
+    "Mempool",
+    "dump_mempool_file",
+    "load_mempool_file",
+]
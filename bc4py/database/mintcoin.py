@@ -119,7 +119,10 @@ def fill_mintcoin_status(m, best_block=None, best_chain=None, stop_txhash=None):
             m.update(params=params, setting=setting, txhash=tx.hash)
     # unconfirmed
     if best_block is None:
-        for tx in sorted(tx_builder.unconfirmed.values(), key=lambda x: x.create_time):
+        unconfirmed_txs = tx_builder.unconfirmed.get_by_type(C.TX_MINT_COIN)
+        if stop_txhash in tx_builder.unconfirmed:
+            unconfirmed_txs.append(tx_builder.unconfirmed[stop_txhash])
+        for tx in sorted(unconfirmed_txs, key=lambda x: x.create_time):
             if tx.hash == stop_txhash:
                 return
             if tx.type != C.TX_MINT_COIN:
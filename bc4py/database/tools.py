@@ -1,10 +1,12 @@
 from bc4py.config import C, BlockChainError
-from bc4py.database.builder import chain_builder, tx_builder
+from bc4py.database.builder import chain_builder, tx_builder, user_account
 from bc4py.database.account import read_all_pooled_address_set
 from typing import AsyncGenerator
 
 best_block_cache = None
 best_chain_cache = None
+fork_view_key = None
+fork_view_cache = None
 target_address_cache = set()
 
 
@@ -58,7 +60,7 @@ async def get_unspents_iter(target_address, best_block=None, best_chain=None) ->
                         yield address, tx.height, tx.hash, index, coin_id, amount
     # Unconfirmedより
     if best_block is None:
-        for tx in sorted(tx_builder.unconfirmed.values(), key=lambda x: x.create_time):
+        for tx in list(tx_builder.unconfirmed.values()):
             for index, (address, coin_id, amount) in enumerate(tx.outputs):
                 if not is_unused_index(input_hash=tx.hash, input_index=index, best_block=best_block, best_chain=best_chain):
                     continue  # used
@@ -69,35 +71,135 @@ async def get_unspents_iter(target_address, best_block=None, best_chain=None) ->
 
 
 async def get_my_unspents_iter(cur, best_chain=None) -> AsyncGenerator:
+    """wallet unspents of main chain and unconfirmed, a fork view of best_chain is searched by legacy method"""
+    if best_chain is None or best_chain[0] is chain_builder.best_block:
+        await user_account.refresh_my_address(cur)
+        return _get_wallet_unspents_iter()
     last_uuid = len(target_address_cache)
     target_address_cache.update(await read_all_pooled_address_set(cur=cur, last_uuid=last_uuid))
     return get_unspents_iter(target_address=target_address_cache, best_block=None, best_chain=best_chain)
 
 
+async def _get_wallet_unspents_iter() -> AsyncGenerator:
+    """iterate wallet unspents of main chain and unconfirmed, O(my unspents)"""
+    utxo = user_account.utxo
+    my_address = user_account.my_address
+    unconfirmed_spent = tx_builder.unconfirmed.spent
+    allow_mined_height = chain_builder.best_block.height - C.MATURE_HEIGHT
+    # DataBaseより
+    for pair, (address, height, txtype, coin_id, amount) in list(utxo.unspents.items()):
+        if address not in my_address:
+            continue  # pre-fetched address
+        if pair in chain_builder.memory_spent or pair in unconfirmed_spent:
+            continue  # used
+        if txtype in (C.TX_POW_REWARD, C.TX_POS_REWARD) and allow_mined_height <= height:
+            continue  # immature
+        yield (address, height) + pair + (coin_id, amount)
+    # Memory and Unconfirmedより
+    for tx in list(utxo.memory.values()):
+        if tx.hash in chain_builder.memory_txs:
+            height = chain_builder.memory_txs[tx.hash].height
+        elif tx.hash in tx_builder.unconfirmed:
+            height = None
+        else:
+            root_height = chain_builder.root_block.height
+            if tx.height is None or root_height is None or root_height < tx.height:
+                utxo.memory.pop(tx.hash, None)  # orphaned or expired
+            continue  # or batched, found on database soon
+        if tx.type in (C.TX_POW_REWARD, C.TX_POS_REWARD):
+            if height is None or allow_mined_height <= height:
+                continue  # immature
+        for index, (address, coin_id, amount) in enumerate(tx.outputs):
+            if address not in my_address:
+                continue
+            pair = (tx.hash, index)
+            if pair in chain_builder.memory_spent or pair in unconfirmed_spent:
+                continue  # used
+            yield address, height, tx.hash, index, coin_id, amount
+
+
+def _get_fork_view(best_block, best_chain):
+    """
+    return (fork_height, outputs, spent) to check outpoint on the chain to best_block
+    fork_height: main chain blocks higher than this are not included
+    outputs, spent: outpoint indexes of blocks not on main chain
+    """
+    global fork_view_key, fork_view_cache
+    if best_block is None and best_chain is None:
+        return chain_builder.best_block.height, dict(), dict()
+    if best_chain is None:
+        best_chain = _get_best_chain_all(best_block)
+    key = (best_chain[0].hash, chain_builder.best_block.hash)
+    if key == fork_view_key:
+        return fork_view_cache
+    fork_height = -1
+    outputs = dict()
+    spent = dict()
+    for block in best_chain:
+        if chain_builder.is_main_block(block):
+            fork_height = block.height
+            break
+        for tx in block.txs:
+            for index, output in enumerate(tx.outputs):
+                outputs[(tx.hash, index)] = (output, block)
+            for pair in tx.inputs:
+                spent[pair] = (tx.hash, block)
+    fork_view_key = key
+    fork_view_cache = fork_height, outputs, spent
+    return fork_view_cache
+
+
+def _find_memory_output(pair, fork_height, outputs, except_block=None):
+    """find output and the block of memory chain"""
+    if pair in outputs:
+        output, block = outputs[pair]
+    elif pair in chain_builder.memory_outputs:
+        output, block = chain_builder.memory_outputs[pair]
+        if fork_height < block.height:
+            return None
+    else:
+        return None
+    if except_block is not None and block == except_block:
+        return None
+    return output
+
+
+def _find_memory_spender(pair, fork_height, spent, except_block=None):
+    """find txhash spending the outpoint on memory chain"""
+    if pair in spent:
+        txhash, block = spent[pair]
+    elif pair in chain_builder.memory_spent:
+        txhash, block = chain_builder.memory_spent[pair]
+        if fork_height < block.height:
+            return None
+    else:
+        return None
+    if except_block is not None and block == except_block:
+        return None
+    return txhash
+
+
 def get_output_from_input(input_hash, input_index, best_block=None, best_chain=None):
     """get OutputType from InputType"""
     assert chain_builder.best_block, 'Not DataBase init'
-    if best_chain is None:
-        best_chain = _get_best_chain_all(best_block)
+    pair = (input_hash, input_index)
 
     # check database
-    pair = chain_builder.db.read_unused_index(input_hash, input_index)
-    if pair is not None:
-        return pair
+    output = chain_builder.db.read_unused_index(input_hash, input_index)
+    if output is not None:
+        return output
 
     # check memory
-    for block in best_chain:
-        for tx in block.txs:
-            if tx.hash == input_hash:
-                if input_index < len(tx.outputs):
-                    return tx.outputs[input_index]
+    fork_height, outputs, spent = _get_fork_view(best_block, best_chain)
+    output = _find_memory_output(pair, fork_height, outputs)
+    if output is not None:
+        return output
 
     # check unconfirmed
-    if best_block is None:
-        for tx in list(tx_builder.unconfirmed.values()):
-            if tx.hash == input_hash:
-                if input_index < len(tx.outputs):
-                    return tx.outputs[input_index]
+    if best_block is None and input_hash in tx_builder.unconfirmed:
+        tx = tx_builder.unconfirmed[input_hash]
+        if input_index < len(tx.outputs):
+            return tx.outputs[input_index]
 
     # not found
     return None
@@ -106,8 +208,7 @@ def get_output_from_input(input_hash, input_index, best_block=None, best_chain=N
 def is_unused_index(input_hash, input_index, best_block=None, best_chain=None) -> bool:
     """check inputs is unused(True) or not(False)"""
     assert chain_builder.best_block, 'Not DataBase init'
-    if best_chain is None:
-        best_chain = _get_best_chain_all(best_block)
+    pair = (input_hash, input_index)
     is_unused = False
 
     # check database
@@ -115,26 +216,20 @@ def is_unused_index(input_hash, input_index, best_block=None, best_chain=None) -
         is_unused = True
 
     # check memory
-    for block in best_chain:
-        if best_block and block == best_block:
-            continue  # do not check best_block when specified
-        for tx in block.txs:
-            if tx.hash == input_hash:
-                if input_index < len(tx.outputs):
-                    is_unused = True
-            for txhash, txindex in tx.inputs:
-                if txhash == input_hash and txindex == input_index:
-                    return False
+    # do not check best_block when specified
+    fork_height, outputs, spent = _get_fork_view(best_block, best_chain)
+    if _find_memory_spender(pair, fork_height, spent, best_block) is not None:
+        return False
+    if _find_memory_output(pair, fork_height, outputs, best_block) is not None:
+        is_unused = True
 
     # check unconfirmed
     if best_block is None:
-        for tx in tx_builder.unconfirmed.values():
-            if tx.hash == input_hash:
-                if input_index < len(tx.outputs):
-                    is_unused = True
-            for txhash, txindex in tx.inputs:
-                if txhash == input_hash and txindex == input_index:
-                    return False
+        if pair in tx_builder.unconfirmed.spent:
+            return False
+        if input_hash in tx_builder.unconfirmed:
+            if input_index < len(tx_builder.unconfirmed[input_hash].outputs):
+                is_unused = True
 
     # all check passed
     return is_unused
@@ -145,6 +240,7 @@ def is_unused_index_except_me(input_hash, input_index, except_hash, best_block,
     WARNING: except hash work on memory or unconfirmed status
     """
     assert chain_builder.best_block, 'Not DataBase init'
+    pair = (input_hash, input_index)
     is_unused = False
 
     # check database
@@ -152,27 +248,20 @@ def is_unused_index_except_me(input_hash, input_index, except_hash, best_block,
         is_unused = True
 
     # check memory
-    for block in best_chain:
-        if block == best_block:
-            continue
-        for tx in block.txs:
-            if tx.hash == except_hash:
-                continue
-            if input_index < len(tx.outputs):
-                is_unused = True
-            for txhash, txindex in tx.inputs:
-                if txhash == input_hash and txindex == input_index:
-                    return False
+    fork_height, outputs, spent = _get_fork_view(best_block, best_chain)
+    spender = _find_memory_spender(pair, fork_height, spent, best_block)
+    if spender is not None and spender != except_hash:
+        return False
+    if input_hash != except_hash and _find_memory_output(pair, fork_height, outputs, best_block) is not None:
+        is_unused = True
 
     # check unconfirmed
-    for tx in list(tx_builder.unconfirmed.values()):
-        if tx.hash == except_hash:
-            continue
-        if input_index < len(tx.outputs):
+    for txhash in tx_builder.unconfirmed.spent.get(pair, ()):
+        if txhash != except_hash:
+            return False
+    if input_hash != except_hash and input_hash in tx_builder.unconfirmed:
+        if input_index < len(tx_builder.unconfirmed[input_hash].outputs):
             is_unused = True
-        for txhash, txindex in tx.inputs:
-            if txhash == input_hash and txindex == input_index:
-                return False
 
     # all check passed
     return is_unused
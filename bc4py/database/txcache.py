@@ -0,0 +1,79 @@
+from bc4py.chain.tx import TX
+from collections import OrderedDict
+from typing import Optional
+from logging import getLogger
+
+
+log = getLogger('bc4py')
+
+# rough memory usage of TX object except binary (bytes)
+TX_OVERHEAD_SIZE = 800
+
+
+class TxCache(object):
+    """
+    decoded database txs cache, evicted by LRU to max_size bytes
+
+    only txs readable from database are cached, txs on memory are found by chained_tx
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.txs: OrderedDict = OrderedDict()
+        self.hit = 0
+        self.miss = 0
+
+    def __repr__(self):
+        return "<TxCache len={} size={}/{} hit={} miss={}>".format(
+            len(self.txs), self.size, self.max_size, self.hit, self.miss)
+
+    def __len__(self):
+        return len(self.txs)
+
+    def __contains__(self, txhash):
+        return txhash in self.txs
+
+    def get(self, txhash) -> Optional[TX]:
+        tx = self.txs.get(txhash)
+        if tx is None:
+            self.miss += 1
+            return None
+        self.txs.move_to_end(txhash)
+        self.hit += 1
+        return tx
+
+    def put(self, tx: TX):
+        if tx.hash in self.txs:
+            self.txs.move_to_end(tx.hash)
+            return
+        self.txs[tx.hash] = tx
+        self.size += get_tx_cache_size(tx)
+        while self.max_size < self.size and 0 < len(self.txs):
+            txhash, old_tx = self.txs.popitem(last=False)
+            self.size -= get_tx_cache_size(old_tx)
+
+    def remove(self, txhash):
+        tx = self.txs.pop(txhash, None)
+        if tx is not None:
+            self.size -= get_tx_cache_size(tx)
+
+    def getinfo(self):
+        total = self.hit + self.miss
+        return {
+            'txs': len(self.txs),
+            'size': self.size,
+            'max_size': self.max_size,
+            'hit': self.hit,
+            'miss': self.miss,
+            'hit_ratio': round(self.hit / total, 4) if total else 0.0,
+        }
+
+
+def get_tx_cache_size(tx):
+    return tx.total_size + TX_OVERHEAD_SIZE
+
+
+__all__ = [
+    "TxCache",
+]
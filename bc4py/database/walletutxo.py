@@ -0,0 +1,94 @@
+from bc4py.chain.tx import TX
+from bc4py.database.account import *
+from bc4py_extension import PyAddress
+from aiosqlite import Cursor
+from typing import Dict, Tuple, Optional
+from logging import getLogger
+
+
+log = getLogger('bc4py')
+
+
+class WalletUTXO(object):
+    """
+    unspent outputs of wallet addresses
+
+    "unspents" is outputs on database {(txhash, txindex): (address, height, type, coin_id, amount)},
+    same with `utxo` table of account database and updated by batched blocks until "height"
+    "dirty" is unspents found by scan of new pooled addresses until "uuid", written with next batch
+    "memory" is txs on memory chain or unconfirmed with outputs of wallet addresses,
+    spent status of both is checked by outpoint indexes of memory chain and mempool when listed
+    """
+
+    def __init__(self):
+        self.unspents: Dict[Tuple[bytes, int], Tuple[PyAddress, int, int, int, int]] = dict()
+        self.dirty: Dict[Tuple[bytes, int], Tuple[PyAddress, int, int, int, int]] = dict()
+        self.memory: Dict[bytes, TX] = dict()
+        self.height = -1
+        self.blockhash: Optional[bytes] = None
+        self.uuid = 0
+
+    def __repr__(self):
+        return "<WalletUTXO height={} unspents={} memory={}>".format(
+            self.height, len(self.unspents), len(self.memory))
+
+    async def load(self, cur: Cursor, read_block_hash):
+        """read unspents recoded by last boot, clear if the last block is not on database"""
+        self.unspents.clear()
+        for txhash, txindex, address, height, txtype, coin_id, amount in await read_utxo_list(cur):
+            self.unspents[(txhash, txindex)] = (address, height, txtype, coin_id, amount)
+        self.height, self.blockhash, self.uuid = await read_utxo_tip(cur)
+        log.info("load {} wallet unspents at {} height".format(len(self.unspents), self.height))
+        if 0 <= self.height and self.blockhash != read_block_hash(self.height):
+            log.warning("wallet unspents is not on database at {} height, rebuild".format(self.height))
+            await self.clear(cur)
+
+    async def clear(self, cur: Cursor):
+        """remove all unspents on database, rebuild by following batched blocks"""
+        await delete_all_utxo(cur)
+        self.unspents.clear()
+        self.dirty.clear()
+        self.height = -1
+        self.blockhash = None
+        self.uuid = 0
+
+    def put_memory_tx(self, tx: TX):
+        self.memory[tx.hash] = tx
+
+    def put_unspents(self, utxo_list, uuid):
+        """add unspents found on database [(txhash, txindex, address, height, type, coin_id, amount),..]"""
+        for txhash, txindex, address, height, txtype, coin_id, amount in utxo_list:
+            self.unspents[(txhash, txindex)] = self.dirty[(txhash, txindex)] = \
+                (address, height, txtype, coin_id, amount)
+        self.uuid = uuid
+
+    async def apply_block(self, cur: Cursor, block, is_mine):
+        """update unspents by a block written to database"""
+        changes = dict()
+        for tx in block.txs:
+            for pair in tx.inputs:
+                if pair in self.unspents:
+                    del self.unspents[pair]
+                    self.dirty.pop(pair, None)
+                    changes[pair] = None
+            for index, (address, coin_id, amount) in enumerate(tx.outputs):
+                if is_mine(address):
+                    value = (address, block.height, tx.type, coin_id, amount)
+                    self.unspents[(tx.hash, index)] = value
+                    changes[(tx.hash, index)] = value
+            self.memory.pop(tx.hash, None)
+        await delete_utxo_list([pair for pair, value in changes.items() if value is None], cur)
+        await insert_utxo_list([pair + value for pair, value in changes.items() if value is not None], cur)
+        self.height = block.height
+        self.blockhash = block.hash
+
+    async def commit_tip(self, cur: Cursor):
+        """write dirty unspents and the last block, call in a transaction with batched blocks"""
+        await insert_utxo_list([pair + value for pair, value in self.dirty.items()], cur)
+        self.dirty.clear()
+        await update_utxo_tip(self.height, self.blockhash, self.uuid, cur)
+
+
+__all__ = [
+    "WalletUTXO",
+]
@@ -16,9 +16,13 @@ async def system_safe_exit():
         # reactive stream close
         stream.dispose()
 
-        from bc4py.database.builder import chain_builder
+        from bc4py.database.builder import chain_builder, tx_builder
+        tx_builder.write_to_mempool_file()
         await chain_builder.close()
 
+        from bc4py.database.create import close_db_pool
+        await close_db_pool()
+
         from bc4py.user.generate import close_generate
         close_generate()
 
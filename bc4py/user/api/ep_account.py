@@ -35,7 +35,7 @@ async def list_balance(confirm: int = 6):
         * Coin_id `0` is base currency.
     """
     data = dict()
-    async with create_db(V.DB_ACCOUNT_PATH) as db:
+    async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
         cur = await db.cursor()
         users = await user_account.get_balance(cur=cur, confirm=confirm)
         for user, balance in users.items():
@@ -59,7 +59,7 @@ async def list_transactions(page: int = 0, limit: int = 25):
     data = list()
     f_next_page = False
     start = page * limit
-    async for tx_dict in user_account.get_movement_iter(start=page, f_dict=True):
+    async for tx_dict in user_account.get_movement_iter(start=start, f_dict=True):
         if limit == 0:
             f_next_page = True
             break
@@ -124,7 +124,7 @@ async def list_private_unspents():
     """
     data = list()
     best_height = chain_builder.best_block.height
-    async with create_db(V.DB_ACCOUNT_PATH) as db:
+    async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
         cur = await db.cursor()
         unspent_iter = await get_my_unspents_iter(cur)
         async for address, height, txhash, txindex, coin_id, amount in unspent_iter:
@@ -146,7 +146,7 @@ async def list_account_address(account: str = C.account2name[C.ANT_UNKNOWN]):
     * Arguments
         1. **account** : default="@Unknown" Account name
     """
-    async with create_db(V.DB_ACCOUNT_PATH) as db:
+    async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
         cur = await db.cursor()
         user_id = await read_name2userid(account, cur)
         address_list = await read_pooled_address_list(user_id, cur)
@@ -5,7 +5,7 @@ from bc4py.user.txcreation import *
 from bc4py.database.account import *
 from bc4py.database.create import create_db
 from bc4py.database.tools import get_output_from_input
-from bc4py.user.network.sendnew import send_newtx
+from bc4py.user.network.sendnew import send_newtx, broadcast_newtx
 from bc4py.chain.tx import TX
 from bc4py.user.api.utils import error_response
 from pydantic import BaseModel
@@ -172,11 +172,12 @@ async def broadcast_tx(data: BroadcastFormat):
             )
         if data.R is not None:
             new_tx.R = a2b_hex(data.R)
-        with create_db(V.DB_ACCOUNT_PATH, strict=True) as db:
+        async with create_db(V.DB_ACCOUNT_PATH, strict=True) as db:
             cur = await db.cursor()
             if not await send_newtx(new_tx=new_tx, cur=cur):
                 raise BlockChainError('Failed to send new tx')
             await db.commit()
+        await broadcast_newtx(new_tx)
         return {
             'hash': new_tx.hash.hex(),
             'gas_amount': new_tx.gas_amount,
@@ -226,15 +227,17 @@ async def send_from_user(send: SendOne):
             if not await send_newtx(new_tx=new_tx, cur=cur):
                 raise BlockChainError('Failed to send new tx')
             await db.commit()
-            return {
-                'hash': new_tx.hash.hex(),
-                'gas_amount': new_tx.gas_amount,
-                'gas_price': new_tx.gas_price,
-                'fee': new_tx.gas_amount * new_tx.gas_price,
-                'time': round(time() - start, 3),
-            }
         except Exception:
             return error_response()
+    # broadcast after the writer is released
+    await broadcast_newtx(new_tx)
+    return {
+        'hash': new_tx.hash.hex(),
+        'gas_amount': new_tx.gas_amount,
+        'gas_price': new_tx.gas_price,
+        'fee': new_tx.gas_amount * new_tx.gas_price,
+        'time': round(time() - start, 3),
+    }
 
 
 async def send_many_user(send: SendMany):
@@ -272,15 +275,17 @@ async def send_many_user(send: SendMany):
             if not await send_newtx(new_tx=new_tx, cur=cur):
                 raise BlockChainError('Failed to send new tx')
             await db.commit()
-            return {
-                'hash': new_tx.hash.hex(),
-                'gas_amount': new_tx.gas_amount,
-                'gas_price': new_tx.gas_price,
-                'fee': new_tx.gas_amount * new_tx.gas_price,
-                'time': round(time() - start, 3),
-            }
         except Exception:
             return error_response()
+    # broadcast after the writer is released
+    await broadcast_newtx(new_tx)
+    return {
+        'hash': new_tx.hash.hex(),
+        'gas_amount': new_tx.gas_amount,
+        'gas_price': new_tx.gas_price,
+        'fee': new_tx.gas_amount * new_tx.gas_price,
+        'time': round(time() - start, 3),
+    }
 
 
 async def issue_mint_tx(mint: IssueMintFormat):
@@ -314,16 +319,18 @@ async def issue_mint_tx(mint: IssueMintFormat):
             if not await send_newtx(new_tx=tx, cur=cur):
                 raise BlockChainError('Failed to send new tx')
             await db.commit()
-            return {
-                'hash': tx.hash.hex(),
-                'gas_amount': tx.gas_amount,
-                'gas_price': tx.gas_price,
-                'fee': tx.gas_amount * tx.gas_price,
-                'time': round(time() - start, 3),
-                'mint_id': mint_id,
-            }
         except Exception:
             return error_response()
+    # broadcast after the writer is released
+    await broadcast_newtx(tx)
+    return {
+        'hash': tx.hash.hex(),
+        'gas_amount': tx.gas_amount,
+        'gas_price': tx.gas_price,
+        'fee': tx.gas_amount * tx.gas_price,
+        'time': round(time() - start, 3),
+        'mint_id': mint_id,
+    }
 
 
 async def change_mint_tx(mint: ChangeMintFormat):
@@ -355,15 +362,17 @@ async def change_mint_tx(mint: ChangeMintFormat):
             if not await send_newtx(new_tx=tx, cur=cur):
                 raise BlockChainError('Failed to send new tx')
             await db.commit()
-            return {
-                'hash': tx.hash.hex(),
-                'gas_amount': tx.gas_amount,
-                'gas_price': tx.gas_price,
-                'fee': tx.gas_amount * tx.gas_price,
-                'time': round(time() - start, 3),
-            }
         except Exception:
             return error_response()
+    # broadcast after the writer is released
+    await broadcast_newtx(tx)
+    return {
+        'hash': tx.hash.hex(),
+        'gas_amount': tx.gas_amount,
+        'gas_price': tx.gas_price,
+        'fee': tx.gas_amount * tx.gas_price,
+        'time': round(time() - start, 3),
+    }
 
 
 __all__ = [
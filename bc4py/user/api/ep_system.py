@@ -2,6 +2,7 @@ from bc4py import __version__, __chain_version__, __message__
 from bc4py.config import C, V, P
 from bc4py.chain.utils import GompertzCurve, DEFAULT_TARGET
 from bc4py.chain.difficulty import get_bits_by_hash, get_bias_by_hash
+from bc4py.chain.signature import verified_cache
 from bc4py.database.builder import chain_builder, tx_builder, user_account
 from bc4py.user.api.utils import error_response, local_address
 from bc4py.user.generate import generating_threads
@@ -52,7 +53,10 @@ async def chain_info():
         if F_ADD_CACHE_INFO:
             data['cache'] = {
                 'get_bits_by_hash': str(get_bits_by_hash.cache_info()),
-                'get_bias_by_hash': str(get_bias_by_hash.cache_info())
+                'get_bias_by_hash': str(get_bias_by_hash.cache_info()),
+                'coins_view': chain_builder.db.coins_cache.getinfo(),
+                'verified_signature': len(verified_cache),
+                'mempool': tx_builder.unconfirmed.getinfo(),
             }
         return data
     except Exception:
@@ -106,6 +110,7 @@ async def system_private_info():
             'generate_threads': [str(s) for s in generating_threads],
             'local_address': list(local_address),
             'prefetch_address': len(user_account.pre_fetch_addr),
+            'tx_cache': tx_builder.cache.getinfo(),
             'extended_key': repr(V.EXTENDED_KEY_OBJ),
         }
     except Exception:
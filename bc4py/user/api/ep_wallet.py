@@ -66,7 +66,7 @@ async def get_keypair(address: str):
         1. **address** : (string, required)
     """
     try:
-        async with create_db(V.DB_ACCOUNT_PATH) as db:
+        async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
             cur = await db.cursor()
             uuid, keypair, path = await read_address2keypair(PyAddress.from_string(address), cur)
             return {
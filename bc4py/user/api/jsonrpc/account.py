@@ -4,7 +4,7 @@ from bc4py.database.create import create_db
 from bc4py.database.account import read_name2userid, read_account_address
 from bc4py.user import Balance
 from bc4py.user.txcreation.transfer import send_from, send_many
-from bc4py.user.network.sendnew import send_newtx
+from bc4py.user.network.sendnew import send_newtx, broadcast_newtx
 from bc4py_extension import PyAddress
 from logging import getLogger
 
@@ -62,6 +62,7 @@ async def sendtoaddress(*args, **kwargs):
     # submit result
     if error:
         raise ValueError(error)
+    await broadcast_newtx(new_tx)
     return new_tx.hash.hex()
 
 
@@ -116,6 +117,7 @@ async def sendmany(*args, **kwargs):
     # submit result
     if error:
         raise ValueError(error)
+    await broadcast_newtx(new_tx)
     return new_tx.hash.hex()
 
 
@@ -23,7 +23,7 @@ async def getinfo(*args, **kwargs):
     bits, target = get_bits_by_hash(previous_hash=best_block.hash, consensus=consensus)
     difficulty = (0xffffffffffffffff // target) / 100000000
     # balance
-    async with create_db(V.DB_ACCOUNT_PATH) as db:
+    async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
         cur = await db.cursor()
         users = await user_account.get_balance(cur=cur, confirm=6)
     return {
@@ -58,7 +58,7 @@ async def validateaddress(*args, **kwargs):
     if len(args) == 0:
         raise ValueError('no argument found')
     addr: PyAddress = PyAddress.from_string(args[0])
-    async with create_db(V.DB_ACCOUNT_PATH) as db:
+    async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
         cur = await db.cursor()
         user_id = await read_address2userid(address=addr, cur=cur)
         if user_id is None:
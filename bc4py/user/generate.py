@@ -2,7 +2,7 @@ from bc4py.config import C, V, P, BlockChainError
 from bc4py.bip32 import is_address
 from bc4py.chain.block import Block
 from bc4py.chain.tx import TX
-from bc4py.chain.workhash import generate_many_hash, get_executor_object, update_work_hash
+from bc4py.chain.workhash import PowWorkers, get_worker_num, update_work_hash
 from bc4py.chain.difficulty import get_bits_by_hash
 from bc4py.chain.utils import GompertzCurve
 from bc4py.chain.checking.utils import stake_coin_check
@@ -10,7 +10,6 @@ from bc4py.database.create import create_db
 from bc4py.database.account import sign_message_by_address, generate_new_address_by_userid
 from bc4py.database.tools import get_my_unspents_iter
 from bc4py_extension import multi_seek, PyAddress
-from concurrent.futures import ProcessPoolExecutor
 from time import time
 from collections import deque
 from random import random
@@ -29,11 +28,15 @@ mined_block_que = asyncio.Queue(maxsize=1)
 mining_address: Optional[PyAddress] = None
 mining_address_lock = asyncio.Lock()
 previous_block: Optional[Block] = None
-unconfirmed_txs: Optional[List] = None
+unconfirmed_txs: Optional[tuple] = None
+unconfirmed_fees = 0
 unspents_txs: Optional[List] = None
 staking_limit = 500
 optimize_file_name_re = re.compile("^optimized\\.([a-z0-9]+)\\-([0-9]+)\\-([0-9]+)\\.dat$")
-executor: Optional['ProcessPoolExecutor'] = None
+MINING_REFRESH_SPAN = 10.0  # update mining block for new txs and time
+PROOF_OF_WORK_FLAGS = {
+    C.BLOCK_YES_POW, C.BLOCK_X11_POW, C.BLOCK_X16S_POW
+}
 
 
 class Generate(object):
@@ -46,10 +49,7 @@ class Generate(object):
         self.hashrate = (0, 0.0)  # [hash/s, update_time]
         self.f_enable = True
         self.config = kwargs
-        # generate process executor
-        global executor
-        if executor is None:
-            executor = get_executor_object()
+        self.workers: Optional[PowWorkers] = None
         generating_threads.append(self)
         # self.task = asyncio.ensure_future(self.start_loop())
         self.task = asyncio.run_coroutine_threadsafe(self.start_loop(), loop)
@@ -70,6 +70,8 @@ class Generate(object):
     def close(self):
         self.f_enable = False
         self.task.cancel()
+        if self.workers:
+            self.workers.close()
 
     async def start_loop(self):
         while self.f_enable:
@@ -110,46 +112,55 @@ class Generate(object):
 
     async def proof_of_work(self):
         global mining_address
-        spans_deque = deque(maxlen=8)
-        request_num = 100
-        base_span = 10
-        work_span = base_span * self.power_limit
-        sleep_span = base_span * (1.0 - self.power_limit)
-        while self.f_enable:
-            # check start mining
-            if previous_block is None or unconfirmed_txs is None:
-                await asyncio.sleep(0.1)
-                continue
-            mining_block = await create_mining_block(self.consensus)
-            # throw task
-            new_span = await generate_many_hash(executor, mining_block, request_num)
-            spans_deque.append(new_span)
-            # check block
-            update_work_hash(mining_block)
-            if previous_block is None or unconfirmed_txs is None:
-                log.debug("Not confirmed new block by \"nothing params\"")
-            elif previous_block.hash != mining_block.previous_hash:
-                log.debug("Not confirmed new block by \"Don't match previous_hash\"")
-            elif not mining_block.pow_check():
-                if int(time()) % 90 == 0:
-                    log.debug("Not confirmed new block by \"proof of work unsatisfied\"")
-            else:
-                # Mined yay!!!
-                await confirmed_generating_block(mining_block)
-                mining_address = None
-            # generate next mining request_num
-            try:
-                self.hashrate = (request_num * len(spans_deque) // sum(spans_deque), time())
-                bias = sum(work_span * i for i, span in enumerate(spans_deque))
-                bias /= sum(span * i for i, span in enumerate(spans_deque))
-                bias = min(2.0, max(0.5, bias))
-                request_num = max(100, int(request_num * bias))
-                if int(time()) % 90 == 0:
-                    log.info("Mining... Next target request_num is {} {}".format(request_num,
-                                                                              "Up" if bias > 1 else "Down"))
-            except ZeroDivisionError:
-                pass
-            await asyncio.sleep(sleep_span + random() - 0.5)
+        try:
+            while self.f_enable:
+                # hashing processes live while generating, re-created when PoW generators changed
+                worker_num = get_pow_worker_num()
+                if self.workers is None or self.workers.worker_num != worker_num:
+                    if self.workers:
+                        self.workers.close()
+                    self.workers = PowWorkers(self.consensus, self.power_limit, worker_num)
+                workers = self.workers
+                # check start mining
+                if previous_block is None or unconfirmed_txs is None:
+                    workers.pause()
+                    await asyncio.sleep(0.1)
+                    continue
+                mining_block = await create_mining_block(self.consensus)
+                generation = workers.update(mining_block)
+                # wait for nonce until the tip changed or refresh txs and time
+                deadline = time() + MINING_REFRESH_SPAN
+                found = None
+                while self.f_enable and time() < deadline:
+                    await asyncio.sleep(0.05)
+                    self.hashrate = (workers.get_hashrate(), time())
+                    if previous_block is None or previous_block.hash != mining_block.previous_hash:
+                        break
+                    found = workers.get_result(generation)
+                    if found:
+                        break
+                if found is None:
+                    if int(time()) % 90 == 0:
+                        log.info("Mining... {}".format(self))
+                    continue
+                # check block
+                workers.pause()
+                mining_block.b = mining_block.b[:-4] + found[0]
+                mining_block.deserialize()
+                update_work_hash(mining_block)
+                if previous_block is None or unconfirmed_txs is None:
+                    log.debug("Not confirmed new block by \"nothing params\"")
+                elif previous_block.hash != mining_block.previous_hash:
+                    log.debug("Not confirmed new block by \"Don't match previous_hash\"")
+                elif not mining_block.pow_check():
+                    log.warning("Not confirmed new block by \"proof of work unsatisfied\" {}".format(mining_block))
+                else:
+                    # Mined yay!!!
+                    await confirmed_generating_block(mining_block)
+                    mining_address = None
+        finally:
+            if self.workers:
+                self.workers.pause()
         log.info("Close signal")
 
     async def proof_of_stake(self):
@@ -207,11 +218,12 @@ class Generate(object):
                     proof_tx.height = staking_block.height
                     staking_block.txs[0] = proof_tx
                     # Fit block size
-                    while staking_block.size > C.SIZE_BLOCK_LIMIT:
-                        staking_block.txs.pop()
+                    block_size = staking_block.size
+                    while block_size > C.SIZE_BLOCK_LIMIT:
+                        block_size -= staking_block.txs.pop().size
                     staking_block.update_time(proof_tx.time)
                     staking_block.update_merkleroot()
-                    async with create_db(V.DB_ACCOUNT_PATH) as db:
+                    async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
                         cur = await db.cursor()
                         signature = await sign_message_by_address(
                             raw=staking_block.b, address=address, cur=cur)
@@ -279,7 +291,7 @@ class Generate(object):
                 if previous_block.hash != previous_hash:
                     continue
                 # Staked by capacity yay!!
-                total_fee = sum(tx.gas_price * tx.gas_amount for tx in unconfirmed_txs)
+                total_fee = unconfirmed_fees
                 staked_block = Block.from_dict(
                     block={
                         'version': 0,  # always 0
@@ -302,12 +314,13 @@ class Generate(object):
                     })
                 staked_block.txs.append(staked_proof_tx)
                 staked_block.txs.extend(unconfirmed_txs)
-                while staked_block.size > C.SIZE_BLOCK_LIMIT:
-                    staked_block.txs.pop()
+                block_size = staked_block.size
+                while block_size > C.SIZE_BLOCK_LIMIT:
+                    block_size -= staked_block.txs.pop().size
                 staked_block.update_time(staked_proof_tx.time)
                 staked_block.update_merkleroot()
                 staked_block.work_hash = work_hash
-                async with create_db(V.DB_ACCOUNT_PATH) as db:
+                async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
                     cur = await db.cursor()
                     signature = await sign_message_by_address(
                         raw=staked_block.b, address=address, cur=cur)
@@ -321,6 +334,12 @@ class Generate(object):
         log.info("Close signal")
 
 
+def get_pow_worker_num():
+    """hashing processes of a PoW generator, CPU is split by generating PoW consensus"""
+    pow_num = sum(1 for t in generating_threads if t.f_enable and t.consensus in PROOF_OF_WORK_FLAGS)
+    return max(1, get_worker_num() // max(1, pow_num))
+
+
 async def create_mining_block(consensus):
     global mining_address
     # setup mining address for PoW
@@ -339,7 +358,7 @@ async def create_mining_block(consensus):
         raise FailedGenerateWarning('previous_block is None')
     # create proof_tx
     reward = GompertzCurve.calc_block_reward(previous_block.height + 1)
-    fees = sum(tx.gas_amount * tx.gas_price for tx in unconfirmed_txs)
+    fees = unconfirmed_fees
     proof_tx = TX.from_dict(
         tx={
             'type': C.TX_POW_REWARD,
@@ -393,9 +412,11 @@ def update_previous_block(new_previous_block):
     previous_block = new_previous_block
 
 
-def update_unconfirmed_txs(new_unconfirmed_txs):
-    global unconfirmed_txs
-    unconfirmed_txs = new_unconfirmed_txs
+def update_unconfirmed_txs(template):
+    """set immutable block template, txs and total fees"""
+    global unconfirmed_txs, unconfirmed_fees
+    unconfirmed_txs = template.txs
+    unconfirmed_fees = template.fees
 
 
 async def update_unspents_txs():
@@ -405,7 +426,7 @@ async def update_unspents_txs():
     previous_height = previous_block.height
     proof_txs = list()
     all_num = 0
-    async with create_db(V.DB_ACCOUNT_PATH) as db:
+    async with create_db(V.DB_ACCOUNT_PATH, readonly=True) as db:
         cur = await db.cursor()
         unspent_iter = await get_my_unspents_iter(cur)
         async for address, height, txhash, txindex, coin_id, amount in unspent_iter:
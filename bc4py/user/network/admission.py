@@ -0,0 +1,143 @@
+from bc4py.config import V, BlockChainError
+from bc4py.chain.tx import TX
+from bc4py.chain.checking import check_tx, check_tx_time
+from bc4py.chain.signature import fill_verified_addr_tx, fill_verified_addr_txs
+from bc4py.database.create import create_db
+from bc4py.database.builder import tx_builder
+from bc4py.user.network.update import update_info_for_generate
+from typing import List, Tuple, Optional
+from logging import getLogger
+from time import time
+import asyncio
+
+
+log = getLogger('bc4py')
+
+ADMISSION_DELAY = 0.005  # collect new txs for 5mS
+ADMISSION_MAX_TXS = 500  # admit without waiting delay
+
+
+class TxAdmission(object):
+    """
+    collect new txs for a few milliseconds and admit them by a batch
+
+    signatures of a batch are verified by one executor call, accepted txs are
+    written by one database transaction and the template is refreshed once
+    a batch is collected while the previous one is admitted, admission is ordered by lock
+    """
+
+    def __init__(self, delay, max_txs):
+        self.delay = delay
+        self.max_txs = max_txs
+        self.waiting: List[Tuple[TX, asyncio.Future]] = list()
+        self.full = asyncio.Event()
+        self.task: Optional[asyncio.Future] = None
+        self.lock = asyncio.Lock()
+
+    def __repr__(self):
+        return "<TxAdmission waiting={} admitting={}>".format(len(self.waiting), self.lock.locked())
+
+    async def put(self, tx: TX) -> bool:
+        """wait for admission of the tx, True if accepted"""
+        future = asyncio.get_event_loop().create_future()
+        self.waiting.append((tx, future))
+        if self.task is None:
+            self.full.clear()
+            self.task = asyncio.ensure_future(self._collect())
+        elif self.max_txs <= len(self.waiting):
+            self.full.set()
+        return await future
+
+    async def _collect(self):
+        try:
+            await asyncio.wait_for(self.full.wait(), self.delay)
+        except asyncio.TimeoutError:
+            pass
+        batch = self.waiting[:self.max_txs]
+        self.waiting = self.waiting[self.max_txs:]
+        self.task = None
+        self.full.clear()
+        if 0 < len(self.waiting):
+            # overflowed txs are next batch
+            self.task = asyncio.ensure_future(self._collect())
+            if self.max_txs <= len(self.waiting):
+                self.full.set()
+        try:
+            async with self.lock:
+                await self._admit(batch)
+        except Exception:
+            log.error("Failed admit new txs", exc_info=True)
+        for tx, future in batch:
+            set_result(future, False)
+
+    async def _admit(self, batch: List[Tuple[TX, asyncio.Future]]):
+        s = time()
+        txs: List[Tuple[TX, asyncio.Future]] = list()
+        hashes = set()
+        for tx, future in batch:
+            if tx.hash in hashes or tx_builder.get_memorized_tx(tx.hash) is not None:
+                log.debug("high latency node? already memorized new tx")
+                set_result(future, False)
+                continue
+            try:
+                check_tx_time(tx)
+                hashes.add(tx.hash)
+                txs.append((tx, future))
+            except BlockChainError as e:
+                log.error('Failed accept new tx "{}"'.format(e), exc_info=True)
+                set_result(future, False)
+        if len(txs) == 0:
+            return
+
+        # verify all signatures
+        try:
+            await fill_verified_addr_txs([tx for tx, future in txs])
+        except Exception:
+            # a wrong format tx fail the batch, verify one by one
+            log.debug("failed verify batch, retry one by one", exc_info=True)
+            for tx, future in txs:
+                try:
+                    await fill_verified_addr_tx(tx)
+                except Exception:
+                    log.error("Failed accept new tx", exc_info=True)
+                    set_result(future, False)
+            txs = [(tx, future) for tx, future in txs if not future.done()]
+
+        # check and recode by one transaction, txs spending outputs of prior are allowed
+        results = list()
+        async with create_db(V.DB_ACCOUNT_PATH) as db:
+            cur = await db.cursor()
+            for tx, future in txs:
+                try:
+                    check_tx(tx=tx, include_block=None)
+                    await tx_builder.put_unconfirmed(cur=cur, tx=tx)
+                    log.info("Accept new tx {}".format(tx))
+                    results.append((future, True))
+                except BlockChainError as e:
+                    log.error('Failed accept new tx "{}"'.format(e), exc_info=True)
+                    results.append((future, False))
+                except Exception:
+                    log.error("Failed accept new tx", exc_info=True)
+                    results.append((future, False))
+            await db.commit()
+        for future, result in results:
+            set_result(future, result)
+        if any(result for future, result in results):
+            update_info_for_generate(u_block=False, u_unspent=False, u_unconfirmed=True)
+        log.debug("admit {}/{} new txs {}mS".format(
+            sum(result for future, result in results), len(batch), int((time() - s) * 1000)))
+
+
+def set_result(future: asyncio.Future, result):
+    """ignore the future already cancelled by caller"""
+    if not future.done():
+        future.set_result(result)
+
+
+tx_admission = TxAdmission(ADMISSION_DELAY, ADMISSION_MAX_TXS)
+
+
+__all__ = [
+    "TxAdmission",
+    "tx_admission",
+]
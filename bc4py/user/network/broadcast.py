@@ -1,13 +1,14 @@
 from bc4py.config import C, V, P, BlockChainError
 from bc4py.chain.block import Block
 from bc4py.chain.tx import TX
-from bc4py.chain.checking import new_insert_block, check_tx, check_tx_time
+from bc4py.chain.checking import new_insert_block, check_tx
 from bc4py.chain.signature import fill_verified_addr_tx
 from bc4py.chain.workhash import update_work_hash
 from bc4py.database.create import create_db
 from bc4py.database.builder import chain_builder, tx_builder
 from bc4py.user.network.update import update_info_for_generate
 from bc4py.user.network.directcmd import DirectCmd
+from bc4py.user.network.admission import tx_admission
 from bc4py.user.network.connection import ask_node
 from p2p_python.user import User
 from logging import getLogger
@@ -55,19 +56,8 @@ class BroadcastCmd:
             if tx_builder.get_memorized_tx(new_tx.hash) is not None:
                 log.debug("high latency node? already memorized new tx")
                 return False
-            check_tx_time(new_tx)
-            await fill_verified_addr_tx(new_tx)
-            check_tx(tx=new_tx, include_block=None)
-            async with create_db(V.DB_ACCOUNT_PATH) as db:
-                cur = await db.cursor()
-                await tx_builder.put_unconfirmed(cur=cur, tx=new_tx)
-            log.info("Accept new tx {}".format(new_tx))
-            update_info_for_generate(u_block=False, u_unspent=False, u_unconfirmed=True)
-            return True
-        except BlockChainError as e:
-            error = 'Failed accept new tx "{}"'.format(e)
-            log.error(error, exc_info=True)
-            return False
+            # checked and recoded with other new txs by batch
+            return await tx_admission.put(new_tx)
         except Exception:
             error = "Failed accept new tx"
             log.error(error, exc_info=True)
@@ -97,26 +87,35 @@ async def fill_newblock_info(user, data):
     update_work_hash(new_block)
     if not new_block.pow_check():
         raise BlockChainError('Proof of work is not satisfied')
-    # Append general txs
-    async with create_db(V.DB_ACCOUNT_PATH) as db:
-        cur = await db.cursor()
-        for txhash in data['txs'][1:]:
-            tx = tx_builder.get_memorized_tx(txhash)
-            if tx is None:
-                new_block.inner_score *= 0.75  # unknown tx, score down
-                log.debug("Unknown tx, try to download")
-                r = await ask_node(cmd=DirectCmd.tx_by_hash, data={'txhash': txhash}, f_continue_asking=True)
-                if isinstance(r, str):
-                    raise BlockChainError('Failed unknown tx download "{}"'.format(r))
-                tx: TX = r
-                tx.height = None
-                await fill_verified_addr_tx(tx)
-                check_tx(tx, include_block=None)
-                await tx_builder.put_unconfirmed(cur=cur, tx=tx)
-                log.debug("Success unknown tx download {}".format(tx))
-            tx.height = new_height
-            new_block.txs.append(tx)
-        await db.commit()
+    # Append general txs, download unknown txs before open account database
+    unknown_txs = list()
+    for txhash in data['txs'][1:]:
+        tx = tx_builder.get_memorized_tx(txhash)
+        if tx is None:
+            new_block.inner_score *= 0.75  # unknown tx, score down
+            log.debug("Unknown tx, try to download")
+            r = await ask_node(cmd=DirectCmd.tx_by_hash, data={'txhash': txhash}, f_continue_asking=True)
+            if isinstance(r, str):
+                raise BlockChainError('Failed unknown tx download "{}"'.format(r))
+            tx: TX = r
+            tx.height = None
+            await fill_verified_addr_tx(tx)
+            check_tx(tx, include_block=None)
+            unknown_txs.append(tx)
+            log.debug("Success unknown tx download {}".format(tx))
+        new_block.txs.append(tx)
+    if 0 < len(unknown_txs):
+        async with create_db(V.DB_ACCOUNT_PATH) as db:
+            cur = await db.cursor()
+            for tx in unknown_txs:
+                try:
+                    await tx_builder.put_unconfirmed(cur=cur, tx=tx)
+                except BlockChainError as e:
+                    # the block can include it, low gas_price tx is not kept on mempool
+                    log.debug("Unknown tx is not memorized '{}'".format(e))
+            await db.commit()
+    for tx in new_block.txs[1:]:
+        tx.height = new_height
     return new_block
 
 
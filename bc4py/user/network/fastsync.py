@@ -1,9 +1,9 @@
 from bc4py.config import C, V, P, BlockChainError
 from bc4py.chain.tx import TX
 from bc4py.chain.block import Block
-from bc4py.chain.signature import fill_verified_addr_many, fill_verified_addr_tx
+from bc4py.chain.signature import fill_verified_addr_many, fill_verified_addr_txs
 from bc4py.chain.workhash import get_workhash_fnc, update_work_hash
-from bc4py.chain.checking import new_insert_block, check_tx, check_tx_time
+from bc4py.chain.checking import new_insert_block, check_tx, check_tx_time, is_assumed_valid
 from bc4py.user.network.connection import *
 from bc4py.user.network.update import update_info_for_generate
 from bc4py.user.network.directcmd import DirectCmd
@@ -67,7 +67,7 @@ async def back_sync_loop():
                     task_list.append(block)
             future: asyncio.Future = loop.run_in_executor(
                 None, work_generate_future, task_list)
-            await fill_verified_addr_many(block_list)
+            await fill_verified_addr_many([block for block in block_list if not is_assumed_valid(block)])
             await asyncio.wait_for(future, 10.0)
             # check
             if len(block_tmp) == 0:
@@ -86,6 +86,60 @@ async def back_sync_loop():
     log.info("close by F_STOP flag")
 
 
+async def find_assume_valid_chain():
+    """
+    verify header chain from assume-valid block to my chain by previous_hash
+    height is counted from my block, height of other node is used only as request hint
+    """
+    if V.ASSUME_VALID_HASH is None or 0 < len(V.ASSUME_VALID_CHAIN):
+        return
+    try:
+        block = chain_builder.get_block(blockhash=V.ASSUME_VALID_HASH)
+        if block is not None:
+            # already inserted, ancestors are not inserted again
+            assume_valid_chain = {block.height: block.hash}
+        else:
+            block: Block = await ask_random_node(
+                cmd=DirectCmd.block_by_hash, data={'blockhash': V.ASSUME_VALID_HASH})
+            if block.hash != V.ASSUME_VALID_HASH:
+                raise BlockChainError('different block {}'.format(block))
+            best_height_on_network, best_hash_on_network = await get_best_conn_info()
+            hashes = [block.hash]
+            previous_hash = block.previous_hash
+            hint_height = block.height if isinstance(block.height, int) else 0
+            while chain_builder.get_block(blockhash=previous_hash) is None:
+                if best_height_on_network < len(hashes):
+                    raise BlockChainError('header chain is longer than network height {}'
+                                          .format(best_height_on_network))
+                block_list = await ask_random_node(cmd=DirectCmd.big_blocks, data={
+                    'height': max(0, hint_height - STACK_CHUNK_SIZE), 'request_len': STACK_CHUNK_SIZE})
+                # hash is calculated from header binary
+                block_dict = {block.hash: block for block in block_list}
+                if previous_hash not in block_dict:
+                    block = await ask_random_node(
+                        cmd=DirectCmd.block_by_hash, data={'blockhash': previous_hash})
+                    if block.hash != previous_hash:
+                        raise BlockChainError('different block {}'.format(block))
+                    block_dict = {block.hash: block}
+                while previous_hash in block_dict and chain_builder.get_block(blockhash=previous_hash) is None:
+                    block = block_dict[previous_hash]
+                    hashes.append(block.hash)
+                    previous_hash = block.previous_hash
+                hint_height = block.height if isinstance(block.height, int) else 0
+            base_height = chain_builder.get_block(blockhash=previous_hash).height
+            assume_valid_chain = {base_height + index: blockhash
+                                  for index, blockhash in enumerate(reversed(hashes), 1)}
+        height = max(assume_valid_chain)
+        if V.ASSUME_VALID_HEIGHT is not None and V.ASSUME_VALID_HEIGHT != height:
+            raise BlockChainError('assume-valid height differ from checkpoint [{}!={}]'
+                                  .format(height, V.ASSUME_VALID_HEIGHT))
+        V.ASSUME_VALID_CHAIN = assume_valid_chain
+        V.ASSUME_VALID_HEIGHT = height
+        log.info("assume valid {} height={}".format(V.ASSUME_VALID_HASH.hex(), height))
+    except BlockChainError as e:
+        log.warning("failed to find assume-valid chain, check all signatures \"{}\"".format(e))
+
+
 async def main_sync_loop():
     while not P.F_STOP:
         await asyncio.sleep(1.0)
@@ -93,6 +147,7 @@ async def main_sync_loop():
             continue
         if chain_builder.best_block is None:
             continue
+        await find_assume_valid_chain()
         # start fast sync
         my_best_block: Block = chain_builder.best_block
         start_height = my_best_block.height
@@ -154,11 +209,16 @@ async def main_sync_loop():
                 log.info("reached max height of network height={}".format(best_height_on_network))
                 stack_dict.clear()
                 break
+        # recover unconfirmed txs of last running
+        recovered_txs = sorted(tx_builder.recover_from_mempool_file(), key=lambda x: x.create_time)
+        await fill_verified_addr_txs(recovered_txs)
+        log.info("recover {} unconfirmed txs from file".format(len(recovered_txs)))
         # get unconfirmed txs
         log.info("next get unconfirmed txs")
         unconfirmed_txhash_set = set()
         for data in await ask_all_nodes(cmd=DirectCmd.unconfirmed_tx):
             unconfirmed_txhash_set.update(data['txs'])
+        unconfirmed_txhash_set.difference_update(tx.hash for tx in recovered_txs)
         unconfirmed_txs = list()
         for txhash in unconfirmed_txhash_set:
             if txhash in tx_builder.unconfirmed:
@@ -166,19 +226,21 @@ async def main_sync_loop():
             try:
                 tx: TX = await ask_random_node(cmd=DirectCmd.tx_by_hash, data={'txhash': txhash})
                 tx.height = None
-                await fill_verified_addr_tx(tx)
                 unconfirmed_txs.append(tx)
             except BlockChainError as e:
                 log.debug("1: Failed get unconfirmed {} '{}'".format(txhash.hex(), e))
+        await fill_verified_addr_txs(unconfirmed_txs)
+        unconfirmed_txs.sort(key=lambda x: x.time)
         async with create_db(V.DB_ACCOUNT_PATH) as db:
             cur = await db.cursor()
-            for tx in sorted(unconfirmed_txs, key=lambda x: x.time):
+            for tx in recovered_txs + unconfirmed_txs:
                 try:
                     check_tx_time(tx)
                     check_tx(tx, include_block=None)
                     await tx_builder.put_unconfirmed(cur=cur, tx=tx)
                 except BlockChainError as e:
                     log.debug("2: Failed get unconfirmed '{}'".format(e))
+            await db.commit()
         # fast sync finish
         log.info("fast sync finished start={} finish={} {}m".format(
             start_height, chain_builder.best_block.height, int((time() - start_time) / 60)))
@@ -76,33 +76,52 @@ async def mined_newblock(mined_block_que):
 
 
 async def send_newtx(new_tx, cur: Cursor, exc_info=True):
-    assert V.P2P_OBJ, "PeerClient is None"
+    """check and recode new tx to unconfirmed, broadcast by `broadcast_newtx` after commit"""
     try:
         check_tx_time(new_tx)
         check_tx(new_tx, include_block=None)
-        data = {
-            'cmd': BroadcastCmd.NEW_TX,
-            'data': {
-                'tx': new_tx
-            }
-        }
-        await V.P2P_OBJ.send_command(cmd=Peer2PeerCmd.BROADCAST, data=data)
         await tx_builder.put_unconfirmed(cur=cur, tx=new_tx)
-        log.info("Success broadcast new tx {}".format(new_tx))
+        log.info("Accept new tx {}".format(new_tx))
         update_info_for_generate(u_block=False, u_unspent=True, u_unconfirmed=True)
         return True
-    except ConnectionError as e:
-        log.warning(f"retry send_newtx after 1s '{e}'")
-        await asyncio.sleep(1.0)
-        return await send_newtx(new_tx=new_tx, cur=cur, exc_info=exc_info)
     except Exception as e:
-        log.warning("Failed broadcast new tx, other nodes don\'t accept {}".format(new_tx.getinfo()))
+        log.warning("Failed accept new tx {}".format(new_tx.getinfo()))
         log.warning("Reason is \"{}\"".format(e))
         log.debug("traceback,", exc_info=exc_info)
         return False
 
 
+async def broadcast_newtx(new_tx, exc_info=True):
+    """
+    broadcast new tx accepted by `send_newtx`
+
+    warning: do not call with account database writer, it waits for the network
+    """
+    assert V.P2P_OBJ, "PeerClient is None"
+    data = {
+        'cmd': BroadcastCmd.NEW_TX,
+        'data': {
+            'tx': new_tx
+        }
+    }
+    while True:
+        try:
+            await V.P2P_OBJ.send_command(cmd=Peer2PeerCmd.BROADCAST, data=data)
+            log.info("Success broadcast new tx {}".format(new_tx))
+            return True
+        except ConnectionError as e:
+            log.warning(f"retry broadcast_newtx after 1s '{e}'")
+            await asyncio.sleep(1.0)
+        except Exception as e:
+            # kept by unconfirmed and included by next block
+            log.warning("Failed broadcast new tx, other nodes don\'t accept {}".format(new_tx.getinfo()))
+            log.warning("Reason is \"{}\"".format(e))
+            log.debug("traceback,", exc_info=exc_info)
+            return False
+
+
 __all__ = [
     "mined_newblock",
     "send_newtx",
+    "broadcast_newtx",
 ]
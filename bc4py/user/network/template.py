@@ -0,0 +1,185 @@
+from bc4py.config import C
+from bc4py.chain.tx import TX
+from bc4py.database.builder import chain_builder, tx_builder
+from bc4py.database.tools import is_unused_index_except_me
+from bisect import bisect_left, insort
+from typing import NamedTuple, Tuple, Dict, Set, List, Optional
+from logging import getLogger
+import asyncio
+
+
+log = getLogger('bc4py')
+
+# status of evaluated unconfirmed tx
+F_VALID = 1
+F_INVALID = 2
+F_IMMATURE = 3  # wait for mature of generated outputs
+
+MAX_NEW_BLOCKS = 10  # rebuild when many blocks connected from last update
+MAX_SKIP_TXS = 50  # stop selecting after continuous over sized txs
+
+
+class BlockTemplate(NamedTuple):
+    """immutable txs to include in next block, ordered by create_time"""
+    previous_hash: bytes
+    txs: Tuple[TX, ...]
+    size: int  # include 80 bytes block header
+    fees: int
+
+
+class TemplateBuilder(object):
+    """
+    keep status of unconfirmed txs and select txs to include in next block
+
+    only new txs, removed txs and txs related to new blocks are evaluated on update
+    rebuild all status when the last base block is not on main chain (re-org)
+    note: a tx using unconfirmed tx's outputs is not accepted in a block,
+    so the package of a tx is itself and selected by gas_price
+    """
+
+    def __init__(self):
+        self.base_hash: Optional[bytes] = None
+        self.status: Dict[bytes, int] = dict()
+        self.txs: Dict[bytes, TX] = dict()
+        self.immature: Set[bytes] = set()
+        self.valid_index: List[Tuple[int, bytes]] = list()
+        self.template: Optional[BlockTemplate] = None
+
+    def __repr__(self):
+        return "<TemplateBuilder status={} valid={} template={}>".format(
+            len(self.status), len(self.valid_index), len(self.template.txs) if self.template else None)
+
+    def clear(self):
+        self.status.clear()
+        self.txs.clear()
+        self.immature.clear()
+        self.valid_index.clear()
+        self.template = None
+
+    def _forget(self, txhash):
+        status = self.status.pop(txhash)
+        tx = self.txs.pop(txhash)
+        if status == F_VALID:
+            del self.valid_index[bisect_left(self.valid_index, (tx.gas_price, txhash))]
+        elif status == F_IMMATURE:
+            self.immature.discard(txhash)
+
+    def _set_status(self, tx, status):
+        if tx.hash in self.status:
+            self._forget(tx.hash)
+        self.status[tx.hash] = status
+        self.txs[tx.hash] = tx
+        if status == F_VALID:
+            insort(self.valid_index, (tx.gas_price, tx.hash))
+        elif status == F_IMMATURE:
+            self.immature.add(tx.hash)
+
+    def _get_new_blocks(self, best_chain) -> Optional[list]:
+        """blocks connected after base block, None if base block is not found"""
+        if self.base_hash is None:
+            return None
+        for index, block in enumerate(best_chain[:MAX_NEW_BLOCKS]):
+            if block.hash == self.base_hash:
+                return best_chain[:index]
+        return None
+
+    @staticmethod
+    def _evaluate(tx, limit_height):
+        if tx.height is not None:
+            return F_INVALID
+        for txhash, txindex in tx.inputs:
+            input_tx = tx_builder.get_memorized_tx(txhash)
+            if input_tx is not None:
+                if input_tx.height is None:
+                    return F_INVALID  # use unconfirmed tx's outputs
+                if input_tx.type in (C.TX_POS_REWARD, C.TX_POW_REWARD):
+                    if input_tx.height > limit_height:
+                        return F_IMMATURE  # too young generated outputs
+            if not is_unused_index_except_me(
+                    input_hash=txhash,
+                    input_index=txindex,
+                    except_hash=tx.hash,
+                    best_block=None,
+                    best_chain=None):
+                return F_INVALID  # already used outputs on main chain include best_block
+        return F_VALID
+
+    async def update(self) -> BlockTemplate:
+        """update status by difference from last update and return template"""
+        mempool = tx_builder.unconfirmed
+        best_block, best_chain = chain_builder.get_best_chain()
+        checking: Set[bytes] = set()
+
+        # 1: txs related to new blocks
+        if self.base_hash != best_block.hash:
+            new_blocks = self._get_new_blocks(best_chain)
+            if new_blocks is None:
+                self.clear()
+            else:
+                for block in new_blocks:
+                    for tx in block.txs:
+                        # outputs confirmed
+                        for index in range(len(tx.outputs)):
+                            checking.update(mempool.spent.get((tx.hash, index), ()))
+                        # inputs used by block
+                        for pair in tx.inputs:
+                            checking.update(mempool.spent.get(pair, ()))
+                checking.update(self.immature)
+            self.base_hash = best_block.hash
+
+        # 2: txs removed from unconfirmed, other spenders may be valid
+        for txhash in self.status.keys() - mempool.txs.keys():
+            tx = self.txs[txhash]
+            self._forget(txhash)
+            for pair in tx.inputs:
+                checking.update(mempool.spent.get(pair, ()))
+
+        # 3: new unconfirmed txs, spenders of same input are invalid
+        new_txs = mempool.txs.keys() - self.status.keys()
+        checking.update(new_txs)
+        for txhash in new_txs:
+            for pair in mempool[txhash].inputs:
+                checking.update(mempool.spent.get(pair, ()))
+
+        if len(checking) == 0 and self.template and self.template.previous_hash == best_block.hash:
+            return self.template
+
+        # 4: evaluate
+        limit_height = best_block.height - C.MATURE_HEIGHT
+        for count, txhash in enumerate(checking):
+            tx = mempool.get(txhash)
+            if tx is None:
+                continue  # removed on the way, forget next update
+            self._set_status(tx, self._evaluate(tx, limit_height))
+            if count % 100 == 99:
+                # switch event loop
+                await asyncio.sleep(0.0)
+
+        # 5: select by gas_price with block size limit
+        selected = list()
+        size = 80  # with block header
+        fees = skipped = 0
+        for gas_price, txhash in reversed(self.valid_index):
+            tx = self.txs[txhash]
+            if C.SIZE_BLOCK_LIMIT < size + tx.size:
+                skipped += 1
+                if MAX_SKIP_TXS < skipped:
+                    break
+                continue
+            selected.append(tx)
+            size += tx.size
+            fees += tx.gas_price * tx.gas_amount
+            skipped = 0
+        selected.sort(key=lambda x: x.create_time)
+        self.template = BlockTemplate(best_block.hash, tuple(selected), size, fees)
+        return self.template
+
+
+template_builder = TemplateBuilder()
+
+
+__all__ = [
+    "BlockTemplate",
+    "TemplateBuilder",
+    "template_builder",
+]
@@ -58,11 +58,36 @@ def set_blockchain_params(genesis_block, params):
     V.COIN_DIGIT = params.get('digit_number')
     V.COIN_MINIMUM_PRICE = params.get('minimum_price')
     V.BLOCK_CONSENSUSES = params.get('consensus')
+    V.BLOCK_CHECKPOINTS = {
+        int(height): bytes.fromhex(blockhash) for height, blockhash in params.get('checkpoints', {}).items()}
     GompertzCurve.k = V.BLOCK_MINING_SUPPLY
     V.SOURCE_HASH = calc_python_source_hash()
     V.BRANCH_NAME = get_current_branch()
 
 
+def set_assume_valid(blockhash=None):
+    """
+    skip signature checks of ancestors of the block, the last checkpoint is default
+    disabled by "0", ancestors are verified by header chain to my chain when sync
+    """
+    V.ASSUME_VALID_HASH = V.ASSUME_VALID_HEIGHT = None
+    V.ASSUME_VALID_CHAIN = dict()
+    if blockhash == '0':
+        log.info("disabled assume-valid, check all signatures")
+    elif blockhash is None:
+        if 0 < len(V.BLOCK_CHECKPOINTS):
+            V.ASSUME_VALID_HEIGHT = max(V.BLOCK_CHECKPOINTS)
+            V.ASSUME_VALID_HASH = V.BLOCK_CHECKPOINTS[V.ASSUME_VALID_HEIGHT]
+            log.info("assume valid last checkpoint height={}".format(V.ASSUME_VALID_HEIGHT))
+    else:
+        V.ASSUME_VALID_HASH = bytes.fromhex(blockhash)
+        assert len(V.ASSUME_VALID_HASH) == 32, 'assume-valid blockhash is 32 bytes hex'
+        for height, checkpoint in V.BLOCK_CHECKPOINTS.items():
+            if checkpoint == V.ASSUME_VALID_HASH:
+                V.ASSUME_VALID_HEIGHT = height
+        log.info("assume valid {} height={}".format(blockhash, V.ASSUME_VALID_HEIGHT))
+
+
 def check_already_started():
     assert V.DB_HOME_DIR is not None
     # check already started
@@ -149,6 +174,20 @@ def console_args_parser():
     p.add_argument('--addrindex',
                    help='index addr for `/public/listunspents`',
                    action='store_true')
+    p.add_argument('--single-db',
+                   help='put all database tables on one LevelDB',
+                   action='store_true')
+    p.add_argument('--blockfile',
+                   help='write new blocks to flat files `blkNNNNN.dat`',
+                   action='store_true')
+    p.add_argument('--migrate-db',
+                   help='migrate database to one LevelDB layout before start',
+                   action='store_true')
+    p.add_argument('--assumevalid',
+                   help='skip signature checks of the blockhash and ancestors, "0" disable '
+                        '(default: last checkpoint)',
+                   default=None,
+                   type=str)
     return p.parse_args()
 
 
@@ -293,6 +332,7 @@ class ProgressBar:
 __all__ = [
     "set_database_path",
     "set_blockchain_params",
+    "set_assume_valid",
     "check_already_started",
     "console_args_parser",
     "check_process_status",
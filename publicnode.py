@@ -10,7 +10,7 @@ from bc4py.user.boot import *
 from bc4py.user.network import *
 from bc4py.user.api import setup_rest_server
 from bc4py.database.create import check_account_db
-from bc4py.database.builder import chain_builder
+from bc4py.database.builder import chain_builder, migrate_database_layout
 from bc4py.chain.msgpack import default_hook, object_hook
 from p2p_python.utils import setup_p2p_params, setup_server_hostname
 from p2p_python.server import Peer2Peer
@@ -57,11 +57,16 @@ def main():
     # environment
     set_database_path(sub_dir=p.sub_dir)
     check_already_started()
-    chain_builder.set_database_object(txindex=p.txindex, addrindex=p.addrindex)
+    if p.migrate_db:
+        migrate_database_layout(txindex=p.txindex, addrindex=p.addrindex)
+    chain_builder.set_database_object(
+        txindex=p.txindex, addrindex=p.addrindex,
+        single=p.single_db or p.migrate_db, blockfile=p.blockfile)
     import_keystone(passphrase='hello python')
     loop.run_until_complete(check_account_db())
     genesis_block, genesis_params, network_ver, connections = load_boot_file()
     set_blockchain_params(genesis_block, genesis_params)
+    set_assume_valid(p.assumevalid)
     logging.info("Start p2p network-ver{} .".format(network_ver))
 
     # P2P network setup
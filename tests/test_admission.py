@@ -0,0 +1,112 @@
+from bc4py.user.network import admission
+from bc4py.user.network.admission import TxAdmission
+import asyncio
+import pytest
+
+
+class FakeTx(object):
+
+    def __init__(self, txhash):
+        self.hash = txhash
+
+
+class FakeTxBuilder(object):
+
+    def __init__(self):
+        self.memorized = dict()
+
+    def get_memorized_tx(self, txhash):
+        return self.memorized.get(txhash)
+
+    async def put_unconfirmed(self, cur, tx):
+        assert cur.db.opened
+        self.memorized[tx.hash] = tx
+        cur.db.txs.append(tx)
+
+
+class FakeCursor(object):
+
+    def __init__(self, db):
+        self.db = db
+
+
+class FakeDatabase(object):
+    """recode txs put by one database transaction"""
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.opened = False
+        self.txs = list()
+
+    async def __aenter__(self):
+        self.opened = True
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.opened = False
+
+    async def cursor(self):
+        return FakeCursor(self)
+
+    async def commit(self):
+        self.transactions.append([tx.hash for tx in self.txs])
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """list of committed txhash list"""
+    transactions = list()
+
+    async def fill_verified_addr_txs(txs):
+        pass
+
+    monkeypatch.setattr(admission, 'tx_builder', FakeTxBuilder())
+    monkeypatch.setattr(admission, 'create_db', lambda path: FakeDatabase(transactions))
+    monkeypatch.setattr(admission, 'check_tx', lambda tx, include_block: None)
+    monkeypatch.setattr(admission, 'check_tx_time', lambda tx: None)
+    monkeypatch.setattr(admission, 'fill_verified_addr_txs', fill_verified_addr_txs)
+    monkeypatch.setattr(admission, 'update_info_for_generate', lambda **kwargs: None)
+    return transactions
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def admit(delay, max_txs, *txs):
+    """put txs at once and return results"""
+    async def put_all():
+        tx_admission = TxAdmission(delay, max_txs)
+        return await asyncio.gather(*[tx_admission.put(tx) for tx in txs])
+    return run(put_all())
+
+
+def test_batch(batches):
+    """test txs put in delay are admitted by one database transaction"""
+    txs = [FakeTx(bytes([i]) * 32) for i in range(5)]
+    assert admit(0.05, 10, *txs) == [True] * 5
+    assert batches == [[tx.hash for tx in txs]]
+
+
+def test_overflow(batches):
+    """test txs over max_txs are admitted by next batch in put order"""
+    txs = [FakeTx(bytes([i]) * 32) for i in range(7)]
+    assert admit(10.0, 3, *txs[:6]) == [True] * 6
+    assert batches == [[tx.hash for tx in txs[:3]], [tx.hash for tx in txs[3:6]]]
+    batches.clear()
+    assert admit(0.05, 3, *txs) == [False] * 6 + [True]
+    assert batches == [[txs[6].hash]]
+
+
+def test_duplicate(batches):
+    """test same tx in a batch and already memorized tx are rejected"""
+    tx1, tx2 = FakeTx(b'1' * 32), FakeTx(b'2' * 32)
+    assert admit(0.05, 10, tx1, tx2, FakeTx(tx1.hash)) == [True, True, False]
+    assert batches == [[tx1.hash, tx2.hash]]
+    # no database transaction when all rejected
+    assert admit(0.05, 10, tx1, tx2) == [False, False]
+    assert len(batches) == 1
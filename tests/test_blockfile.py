@@ -0,0 +1,52 @@
+from bc4py.database.blockfile import BlockFile
+import pytest
+import os
+
+
+def test_commit_and_read(tmp_path):
+    """test written blocks are read by appended position"""
+    bf = BlockFile(str(tmp_path), max_file_size=10)
+    pos0 = bf.append(b'aaaa')
+    pos1 = bf.append(b'bbbbbb')
+    pos2 = bf.append(b'cc')  # rotate to next file
+    assert pos0 == (0, 0)
+    assert pos1 == (0, 4)
+    assert pos2 == (1, 0)
+    bf.commit()
+    assert bytes(bf.read(*pos1, 6)) == b'bbbbbb'
+    assert bytes(bf.read(*pos2, 2)) == b'cc'
+    # reopen
+    bf.close()
+    bf = BlockFile(str(tmp_path), max_file_size=10)
+    assert (bf.file_no, bf.file_size) == (1, 2)
+    assert bf.append(b'dd') == (1, 2)
+
+
+def test_rollback(tmp_path):
+    """test pending data is discarded and position is reused"""
+    bf = BlockFile(str(tmp_path), max_file_size=10)
+    bf.append(b'aaaa')
+    bf.commit()
+    assert bf.append(b'bbbb') == (0, 4)
+    bf.rollback()
+    assert bf.append(b'cccc') == (0, 4)
+    bf.commit()
+    assert bytes(bf.read(0, 0, 8)) == b'aaaacccc'
+
+
+def test_failed_commit(tmp_path):
+    """test partly written data is removed and next offsets are correct"""
+    bf = BlockFile(str(tmp_path), max_file_size=10)
+    bf.append(b'aaaa')
+    bf.commit()
+    bf.append(b'bbbb')
+    bf.append(b'ccccc')  # rotate to next file
+    bf.pending.append((bf.write_no, None))  # fail after written others
+    with pytest.raises(TypeError):
+        bf.commit()
+    assert os.path.getsize(os.path.join(str(tmp_path), 'blk00000.dat')) == 4
+    assert not os.path.exists(os.path.join(str(tmp_path), 'blk00001.dat'))
+    bf.rollback()
+    assert bf.append(b'dddd') == (0, 4)
+    bf.commit()
+    assert bytes(bf.read(0, 0, 8)) == b'aaaadddd'
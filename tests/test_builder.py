@@ -0,0 +1,171 @@
+from bc4py.config import C, V
+from bc4py.user import Accounting
+from bc4py.database import builder
+from bc4py.database.account import MoveLog
+from bc4py.database.builder import ChainBuilder, DataBase, UserAccount
+from bc4py.database.mempool import Mempool
+import asyncio
+import pytest
+
+
+class FakeTx(object):
+
+    def __init__(self, txhash, height=None):
+        self.hash = txhash
+        self.height = height
+        self.inputs = list()
+        self.outputs = list()
+        self.type = C.TX_TRANSFER
+        self.gas_price = 100
+        self.total_size = 100
+        self.deadline = 1000
+
+
+class FakeBlock(object):
+
+    def __init__(self, height, blockhash=None):
+        self.height = height
+        self.hash = blockhash
+        self.flag = C.BLOCK_YES_POW
+        self.work_hash = b'\x00' * 32
+        self.b = bytes([height % 256]) * 80
+        self.txs = list()
+
+
+class ScoredBlock(object):
+
+    def __init__(self, blockhash, previous_hash, height, score):
+        self.hash = blockhash
+        self.previous_hash = previous_hash
+        self.height = height
+        self.score = score
+        self.create_time = float(height)
+
+
+class FakeChainBuilder(object):
+
+    def __init__(self):
+        self.cache_limit = 100
+        self.batch_size = 20
+        self.best_block = FakeBlock(150)
+        self.root_block = FakeBlock(120)
+        self.memory_txs = dict()
+
+
+class FakeTxBuilder(object):
+
+    def __init__(self):
+        self.unconfirmed = Mempool(100000)
+
+
+def test_balance_drop_delta(monkeypatch):
+    """test balance delta of orphaned or expired txs is removed"""
+    chain_builder = FakeChainBuilder()
+    tx_builder = FakeTxBuilder()
+    monkeypatch.setattr(builder, 'chain_builder', chain_builder)
+    monkeypatch.setattr(builder, 'tx_builder', tx_builder)
+    user_account = UserAccount()
+    txs = {
+        'main': FakeTx(b'm' * 32, height=130),
+        'unconfirmed': FakeTx(b'u' * 32),
+        'fork': FakeTx(b'f' * 32, height=140),  # fork block, may be connected
+        'pruned': FakeTx(b'p' * 32, height=110),  # fork lower than root
+        'expired': FakeTx(b'e' * 32),
+    }
+    for amount, tx in enumerate(txs.values(), 1):
+        movement = Accounting()
+        movement[0][0] += amount
+        user_account.memory_movement[tx.hash] = MoveLog(tx.hash, tx.type, movement, 0, tx)
+        user_account.memory_delta[tx.hash] = movement
+    chain_builder.memory_txs[txs['main'].hash] = FakeBlock(130)
+    tx_builder.unconfirmed[txs['unconfirmed'].hash] = txs['unconfirmed']
+
+    loop = asyncio.new_event_loop()
+    account = loop.run_until_complete(user_account.get_balance(cur=None, confirm=6))
+    loop.close()
+    assert account[0][0] == 1  # main chain tx only, others are not incoming yet
+    assert set(user_account.memory_delta) == {txs[name].hash for name in ('main', 'unconfirmed', 'fork')}
+    assert set(user_account.memory_movement) == set(user_account.memory_delta)
+    # removed from unconfirmed
+    user_account.affect_removed_txs([txs['unconfirmed']])
+    assert txs['unconfirmed'].hash not in user_account.memory_delta
+
+
+class FailedBatch(object):
+    """write batch failed when written"""
+
+    def put(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+    def write(self):
+        raise OSError('failed write batch')
+
+
+def test_failed_batch_commit(tmp_path, monkeypatch):
+    """test header records are removed when database write failed partway"""
+    monkeypatch.setattr(V, 'DB_HOME_DIR', str(tmp_path))
+    monkeypatch.setattr(DataBase, 'db_config', dict(DataBase.db_config, single=False, blockfile=False))
+    loop = asyncio.new_event_loop()
+    db = DataBase()
+
+    def write_blocks(blocks, fail=False):
+        async def write():
+            await db.batch_create()
+            for block in blocks:
+                db.write_block(block, account_tx=set())
+            if fail:
+                # tables before this are written
+                db.batch['_height_index'] = FailedBatch()
+            try:
+                await db.batch_commit()
+            except Exception:
+                db.batch_rollback()
+                raise
+        loop.run_until_complete(write())
+
+    write_blocks([FakeBlock(0, b'0' * 32)])
+    with pytest.raises(OSError):
+        write_blocks([FakeBlock(1, b'1' * 32), FakeBlock(2, b'2' * 32)], fail=True)
+    assert len(db.header_file) == 1
+    assert db.read_block_header_by_height(1) is None
+    # next batch put same heights
+    write_blocks([FakeBlock(1, b'a' * 32)])
+    assert len(db.header_file) == 2
+    assert db.read_block_header_by_height(1).previous_hash == bytes([1]) * 32
+    db.close()
+    loop.close()
+
+
+def test_prune_chain_score():
+    """test scores are counted from new root_block and fork of the root_block is not handicapped"""
+    root = ScoredBlock(b'r', None, 0, 1.0)
+    a1 = ScoredBlock(b'a1', b'r', 1, 1.0)
+    a2 = ScoredBlock(b'a2', b'a1', 2, 1.0)
+    a3 = ScoredBlock(b'a3', b'a2', 3, 1.0)
+    chain_builder = ChainBuilder()
+    chain_builder.root_block = chain_builder.best_block = root
+    for block in (a1, a2, a3):
+        chain_builder.chain[block.hash] = block
+        chain_builder.connect_block(block)
+    chain_builder.best_block = a3
+    # a1 is batched
+    del chain_builder.chain[a1.hash]
+    chain_builder.root_block = a1
+    chain_builder.prune_chain_score()
+    assert chain_builder.chain_score == {a2.hash: 1.0, a3.hash: 2.0}
+    # competing child of new root_block
+    b2, b3 = ScoredBlock(b'b2', b'a1', 2, 1.2), ScoredBlock(b'b3', b'b2', 3, 1.2)
+    for block in (b2, b3):
+        chain_builder.chain[block.hash] = block
+        chain_builder.connect_block(block)
+    assert chain_builder.select_best_tip([b2, b3]) is b3
+    assert chain_builder.tips == {a3.hash, b3.hash}
+    # same with not pruned builder
+    new_builder = ChainBuilder()
+    new_builder.root_block = a1
+    for block in (a2, a3, b2, b3):
+        new_builder.connect_block(block)
+    assert new_builder.chain_score == chain_builder.chain_score
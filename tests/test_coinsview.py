@@ -0,0 +1,68 @@
+from bc4py.config import C, V
+from bc4py.database.builder import DataBase, encode_unused_index
+from bc4py.database.coinsview import CoinsViewCache, ENTRY_SIZE
+from bc4py_extension import PyAddress
+import asyncio
+import random
+
+
+def test_write_back_equal_to_database(tmp_path, monkeypatch):
+    """test cached view is same with database written directly"""
+    monkeypatch.setattr(V, 'DB_HOME_DIR', str(tmp_path))
+    monkeypatch.setattr(V, 'BECH32_HRP', 'test')
+    monkeypatch.setattr(DataBase, 'db_config', dict(DataBase.db_config, single=False, blockfile=False))
+    db = DataBase()
+    db.coins_cache = CoinsViewCache(max_size=ENTRY_SIZE * 20)  # evicted often
+    address = PyAddress.from_binary(V.BECH32_HRP, bytes([C.ADDR_NORMAL_VER]) + b'\x01' * 20)
+    rand = random.Random(1)
+    direct = dict()  # written directly like old `_unused_index`
+    keys = [(bytes([i]) * 32, j) for i in range(10) for j in range(4)]
+
+    def read_all():
+        return {bytes(k): bytes(v) for k, v in db._unused_index.iterator()}
+
+    async def check():
+        for _ in range(200):
+            await db.batch_create()
+            writes = dict()
+            for key in rand.sample(keys, 8):
+                if rand.random() < 0.6:
+                    value = (address, 0, rand.randint(1, 100))
+                    db.write_unused_index(*key, *value)
+                else:
+                    value = None
+                    db.remove_unused_index(*key)
+                writes[key] = value
+            for key in keys:
+                expected = writes[key] if key in writes else direct.get(key)
+                assert db.read_unused_index(*key) == expected
+            if rand.random() < 0.3:
+                db.batch_rollback()
+            else:
+                await db.batch_commit()
+                for key, value in writes.items():
+                    if value is None:
+                        direct.pop(key, None)
+                    else:
+                        direct[key] = value
+            assert read_all() == dict(encode_unused_index(key, value) for key, value in direct.items())
+            for key in keys:
+                assert db.read_unused_index(*key) == direct.get(key)
+            assert len(db.coins_cache) <= 20
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(check())
+    loop.close()
+    db.close()
+
+
+def test_rollback_keep_entries():
+    """test dirty entries are dropped and database entries are kept"""
+    cache = CoinsViewCache(max_size=ENTRY_SIZE * 10)
+    cache.put((b'a', 0), (b'addr', 0, 1))
+    cache.write((b'a', 0), None)
+    cache.write((b'b', 0), (b'addr', 0, 2))
+    cache.rollback()
+    assert len(cache.dirty) == 0
+    assert cache[(b'a', 0)] == (b'addr', 0, 1)
+    assert (b'b', 0) not in cache.entries
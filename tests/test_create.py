@@ -0,0 +1,72 @@
+from bc4py.database.create import ConnectionPool
+import asyncio
+import pytest
+import os
+
+
+def test_nested_writer(tmp_path):
+    """test nested writer in a task raise error and other tasks wait for it"""
+    pool = ConnectionPool(os.path.join(str(tmp_path), 'account.db'), reader_num=1)
+    order = list()
+
+    async def write(name):
+        async with pool.get_writer(strict=False) as conn:
+            order.append(name)
+            await asyncio.sleep(0.01)
+            await conn.execute("CREATE TABLE IF NOT EXISTS `test` (`id` INTEGER PRIMARY KEY)")
+            await conn.commit()
+            order.append(name)
+
+    async def nested():
+        async with pool.get_writer(strict=False):
+            async with pool.get_writer(strict=False):
+                pass
+
+    async def check():
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(nested(), 1.0)
+        await asyncio.gather(write('a'), write('b'))
+        await pool.close()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(check())
+    loop.close()
+    assert order == ['a', 'a', 'b', 'b']
+
+
+def test_failed_reader(tmp_path, monkeypatch):
+    """test reader slot is not lost by failed connect and broken connection is replaced"""
+    pool = ConnectionPool(os.path.join(str(tmp_path), 'account.db'), reader_num=1)
+    connect = pool._connect
+    failed = list()
+
+    async def failed_connect(readonly):
+        if len(failed) == 0:
+            failed.append(readonly)
+            await asyncio.sleep(0.01)
+            raise OSError('failed connect')
+        return await connect(readonly)
+
+    monkeypatch.setattr(pool, '_connect', failed_connect)
+
+    async def read():
+        async with pool.get_reader() as conn:
+            cur = await conn.execute("SELECT 1")
+            return (await cur.fetchone())[0]
+
+    async def check():
+        # second task wait for the slot of first one
+        results = await asyncio.wait_for(asyncio.gather(read(), read(), return_exceptions=True), 1.0)
+        assert isinstance(results[0], OSError) and results[1] == 1
+        # BEGIN is failed on closed connection
+        await pool.readers[0].close()
+        with pytest.raises(Exception):
+            await read()
+        assert len(pool.readers) == 0
+        assert await asyncio.wait_for(read(), 1.0) == 1
+        assert pool.reader_count == 1 and len(pool.readers) == 1
+        await pool.close()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(check())
+    loop.close()
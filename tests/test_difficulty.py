@@ -0,0 +1,58 @@
+from bc4py.config import C, V
+from bc4py.chain import difficulty
+from bc4py.chain.utils import target2bits
+from collections import namedtuple
+import random
+
+
+Header = namedtuple('Header', ['height', 'time', 'bits', 'flag', 'previous_hash'])
+CONSENSUSES = {C.BLOCK_YES_POW: 40, C.BLOCK_X16S_POW: 40, C.BLOCK_COIN_POS: 20}
+
+
+def make_chain(rand, length, previous_hash, height, flags):
+    """random headers chain, return list of blockhash"""
+    hashes = list()
+    headers = dict()
+    time = 1000 * height
+    for _ in range(length):
+        blockhash = rand.getrandbits(256).to_bytes(32, 'big')
+        time += rand.randint(0, 40)
+        bits = target2bits(rand.randint(1, 0xffff) << 208)
+        flag = C.BLOCK_GENESIS if height == 0 else rand.choice(flags)
+        headers[blockhash] = Header(height, time, bits, flag, previous_hash)
+        hashes.append(blockhash)
+        previous_hash = blockhash
+        height += 1
+    return hashes, headers
+
+
+def check_same(hashes):
+    for blockhash in hashes:
+        for consensus in CONSENSUSES:
+            assert difficulty.get_bits_by_window(blockhash, consensus) \
+                == difficulty.get_bits_by_walk(blockhash, consensus)
+            assert difficulty.get_bias_by_window(blockhash, consensus) \
+                == difficulty.get_bias_by_walk(blockhash, consensus)
+
+
+def test_window_same_with_walk(monkeypatch):
+    """test rolling window result is same with legacy search"""
+    rand = random.Random(1)
+    flags = list(CONSENSUSES)
+    main, headers = make_chain(rand, 1300, difficulty.GENESIS_PREVIOUS_HASH, 0, flags)
+    # long span mined by one consensus, others are not found in search limit
+    fork_point = headers[main[150]]
+    fork, fork_headers = make_chain(rand, 1100, main[150], fork_point.height + 1, [C.BLOCK_YES_POW])
+    headers.update(fork_headers)
+    monkeypatch.setattr(V, 'BLOCK_CONSENSUSES', CONSENSUSES)
+    monkeypatch.setattr(V, 'BLOCK_TIME_SPAN', 20)
+    monkeypatch.setattr(difficulty, 'get_block_from_cache', headers.get)
+    difficulty.window_cache.clear()
+    try:
+        check_same(main)
+        check_same(fork)
+        # cache is not derived from the ancestors
+        difficulty.window_cache.clear()
+        check_same(reversed(main[-300:]))
+    finally:
+        difficulty.window_cache.clear()
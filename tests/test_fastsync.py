@@ -0,0 +1,110 @@
+from bc4py.config import V, BlockChainError
+from bc4py.chain.checking import is_assumed_valid
+from bc4py.user.network import fastsync
+from bc4py.user.network.directcmd import DirectCmd
+import asyncio
+import pytest
+
+
+class FakeBlock(object):
+
+    def __init__(self, blockhash, previous_hash, height):
+        self.hash = blockhash
+        self.previous_hash = previous_hash
+        self.height = height
+
+
+def make_chain(prefix, previous_hash, height, length):
+    blocks = list()
+    for _ in range(length):
+        blockhash = '{}{}'.format(prefix, height).encode().ljust(32)
+        blocks.append(FakeBlock(blockhash, previous_hash, height))
+        previous_hash = blockhash
+        height += 1
+    return blocks
+
+
+class FakeChainBuilder(object):
+
+    def __init__(self, blocks):
+        self.chain = {block.hash: block for block in blocks}
+
+    def get_block(self, blockhash):
+        return self.chain.get(blockhash)
+
+
+class FakeNode(object):
+    """other node answering blocks, height_diff is added to height of answered blocks"""
+
+    def __init__(self, blocks, height_diff=0):
+        self.blocks = {block.hash: block for block in blocks}
+        self.heights = {block.height + height_diff: block for block in blocks}
+        self.height_diff = height_diff
+
+    async def ask_random_node(self, cmd, data=None):
+        if cmd is DirectCmd.block_by_hash:
+            if data['blockhash'] not in self.blocks:
+                raise BlockChainError('Full seeked but cannot get any data')
+            block = self.blocks[data['blockhash']]
+            return FakeBlock(block.hash, block.previous_hash, block.height + self.height_diff)
+        elif cmd is DirectCmd.big_blocks:
+            heights = range(data['height'], data['height'] + data['request_len'])
+            return [self.heights[height] for height in heights if height in self.heights]
+        raise AssertionError(cmd)
+
+    async def get_best_conn_info(self):
+        return max(self.heights), None
+
+
+@pytest.fixture
+def network(monkeypatch):
+    """my chain 0-9, main chain 10-299 and a fork from 50"""
+    mine = make_chain('m', b'\x00' * 32, 0, 10)
+    main = make_chain('m', mine[-1].hash, 10, 290)
+    fork = make_chain('f', main[40].hash, 51, 100)
+    monkeypatch.setattr(fastsync, 'chain_builder', FakeChainBuilder(mine))
+    monkeypatch.setattr(V, 'ASSUME_VALID_HASH', main[240].hash)
+    monkeypatch.setattr(V, 'ASSUME_VALID_HEIGHT', None)
+    monkeypatch.setattr(V, 'ASSUME_VALID_CHAIN', dict())
+    return mine, main, fork
+
+
+def find_chain(monkeypatch, node):
+    monkeypatch.setattr(fastsync, 'ask_random_node', node.ask_random_node)
+    monkeypatch.setattr(fastsync, 'get_best_conn_info', node.get_best_conn_info)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(fastsync.find_assume_valid_chain())
+    loop.close()
+
+
+@pytest.mark.parametrize('height_diff', [0, 1000, -30])
+def test_find_assume_valid_chain(monkeypatch, network, height_diff):
+    """test ancestors are found with heights counted from my chain"""
+    mine, main, fork = network
+    find_chain(monkeypatch, FakeNode(mine + main + fork, height_diff))
+    assert V.ASSUME_VALID_HEIGHT == 250
+    assert V.ASSUME_VALID_CHAIN == {block.height: block.hash for block in main[:241]}
+    assert all(is_assumed_valid(block) for block in main[:241])
+    assert not any(is_assumed_valid(block) for block in main[241:])
+    # fork block under assume-valid height is checked
+    assert not any(is_assumed_valid(block) for block in fork)
+
+
+def test_broken_header_chain(monkeypatch, network):
+    """test header chain not linked to my chain is not assumed"""
+    mine, main, fork = network
+    other = make_chain('o', b'\x01' * 32, 0, 300)
+    monkeypatch.setattr(V, 'ASSUME_VALID_HASH', other[240].hash)
+    find_chain(monkeypatch, FakeNode(other))
+    assert V.ASSUME_VALID_HEIGHT is None
+    assert len(V.ASSUME_VALID_CHAIN) == 0
+    assert not is_assumed_valid(other[0])
+
+
+def test_differ_from_checkpoint(monkeypatch, network):
+    """test checkpoint height is not replaced by counted height"""
+    mine, main, fork = network
+    monkeypatch.setattr(V, 'ASSUME_VALID_HEIGHT', 300)
+    find_chain(monkeypatch, FakeNode(mine + main))
+    assert V.ASSUME_VALID_HEIGHT == 300
+    assert len(V.ASSUME_VALID_CHAIN) == 0
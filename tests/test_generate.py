@@ -0,0 +1,23 @@
+from bc4py.config import C
+from bc4py.user import generate
+
+
+class FakeGenerate(object):
+
+    def __init__(self, consensus, f_enable=True):
+        self.consensus = consensus
+        self.f_enable = f_enable
+
+
+def test_pow_worker_num(monkeypatch):
+    """test CPU is split by enabled PoW generators"""
+    monkeypatch.setattr(generate, 'get_worker_num', lambda: 8)
+    threads = [FakeGenerate(C.BLOCK_YES_POW), FakeGenerate(C.BLOCK_COIN_POS)]
+    monkeypatch.setattr(generate, 'generating_threads', threads)
+    assert generate.get_pow_worker_num() == 8
+    threads.append(FakeGenerate(C.BLOCK_X16S_POW))
+    assert generate.get_pow_worker_num() == 4
+    threads.append(FakeGenerate(C.BLOCK_X11_POW, f_enable=False))
+    assert generate.get_pow_worker_num() == 4
+    threads.extend(FakeGenerate(C.BLOCK_X11_POW) for _ in range(10))
+    assert generate.get_pow_worker_num() == 1
@@ -0,0 +1,69 @@
+from bc4py.database.headerfile import HeaderFile, struct_header
+import pytest
+import os
+
+
+def make_record(height):
+    return height, height % 3, bytes([height % 256]) * 32, bytes([height % 256]) * 80
+
+
+def test_put_and_commit(tmp_path):
+    """test records are read by height after commit"""
+    path = os.path.join(str(tmp_path), 'headers.dat')
+    hf = HeaderFile(path)
+    for height in range(3):
+        hf.put(*make_record(height))
+    assert len(hf) == 0
+    assert hf.read(0) is None
+    hf.commit()
+    assert len(hf) == 3
+    assert hf.read(2) == make_record(2)
+    assert hf.read(3) is None
+    # read after file grown
+    hf.put(*make_record(3))
+    hf.commit()
+    assert hf.read(3) == make_record(3)
+    assert os.path.getsize(path) == 4 * struct_header.size
+    # reopen
+    hf.close()
+    hf = HeaderFile(path)
+    assert len(hf) == 4
+    assert hf.read(1) == make_record(1)
+    with pytest.raises(AssertionError):
+        hf.put(*make_record(5))
+
+
+def test_rollback(tmp_path):
+    """test pending records are discarded"""
+    hf = HeaderFile(os.path.join(str(tmp_path), 'headers.dat'))
+    hf.put(*make_record(0))
+    hf.commit()
+    hf.put(*make_record(1))
+    hf.rollback()
+    assert len(hf) == 1
+    assert hf.read(1) is None
+    hf.put(*make_record(1))
+    hf.commit()
+    assert hf.read(1) == make_record(1)
+
+
+def test_truncate(tmp_path):
+    """test records over database height are removed and overwritten"""
+    path = os.path.join(str(tmp_path), 'headers.dat')
+    hf = HeaderFile(path)
+    for height in range(5):
+        hf.put(*make_record(height))
+    hf.commit()
+    assert hf.read(4) == make_record(4)
+    hf.truncate(2)
+    assert len(hf) == 2
+    assert hf.read(2) is None
+    assert os.path.getsize(path) == 2 * struct_header.size
+    record = (2, 1, b'\x01' * 32, b'\x02' * 80)
+    hf.put(*record)
+    hf.commit()
+    assert hf.read(2) == record
+    assert hf.read(1) == make_record(1)
+    hf.put(*make_record(3))
+    with pytest.raises(AssertionError):
+        hf.truncate(1)
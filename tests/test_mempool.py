@@ -0,0 +1,151 @@
+from bc4py.config import C
+from bc4py.chain.tx import TX
+from bc4py.database.mempool import Mempool, dump_mempool_file, load_mempool_file
+import pytest
+import os
+
+
+class FakeTx(object):
+    """attributes of TX used by mempool"""
+
+    def __init__(self, txhash, inputs, outputs=1, gas_price=100, size=100, deadline=1000, txtype=0):
+        self.hash = txhash
+        self.inputs = inputs
+        self.outputs = [(b'addr', 0, 1)] * outputs
+        self.gas_price = gas_price
+        self.total_size = size
+        self.deadline = deadline
+        self.type = txtype
+
+    def __repr__(self):
+        return "<FakeTx {}>".format(self.hash)
+
+
+def check_indexes(mempool):
+    """indexes are same with built from txs"""
+    txs = mempool.txs
+    assert mempool.total_size == sum(tx.total_size for tx in txs.values())
+    assert mempool.fee_index == sorted((tx.gas_price, tx.hash) for tx in txs.values())
+    spent = dict()
+    for tx in txs.values():
+        for pair in tx.inputs:
+            spent.setdefault(pair, set()).add(tx.hash)
+    assert mempool.spent == spent
+    for txhash, tx in txs.items():
+        assert mempool.parents[txhash] == {pair[0] for pair in tx.inputs if pair[0] in txs}
+        assert mempool.children[txhash] == {other.hash for other in txs.values()
+                                            if any(pair[0] == txhash for pair in other.inputs)}
+    assert set(mempool.parents) == set(txs)
+    assert set(mempool.children) == set(txs)
+    for txtype, hashes in mempool.types.items():
+        assert hashes == {tx.hash for tx in txs.values() if tx.type == txtype}
+
+
+def test_add_and_delete():
+    """test indexes are updated by add and delete"""
+    mempool = Mempool(10000)
+    a = FakeTx(b'a', [(b'x', 0)], outputs=2, gas_price=50)
+    b = FakeTx(b'b', [(b'a', 0)], gas_price=150, txtype=1)
+    c = FakeTx(b'c', [(b'a', 1), (b'b', 0)], gas_price=100)
+    d = FakeTx(b'd', [(b'x', 0)], gas_price=100)  # double spend
+    for tx in (b, c, a, d):
+        mempool[tx.hash] = tx  # parent added after children
+        check_indexes(mempool)
+    assert mempool.spent[(b'x', 0)] == {b'a', b'd'}
+    assert mempool.get_descendants(b'a') == {b'b', b'c'}
+    assert [tx.hash for tx in mempool.iter_by_fee()] == [b'b', b'd', b'c', b'a']
+    assert mempool.get_by_type(1) == [b]
+    del mempool[b'b']
+    check_indexes(mempool)
+    assert mempool.get_descendants(b'a') == {b'c'}
+    del mempool[b'a']
+    check_indexes(mempool)
+    assert mempool.spent[(b'x', 0)] == {b'd'}
+    # overwrite same txhash
+    mempool[b'c'] = FakeTx(b'c', [(b'y', 0)], gas_price=10)
+    check_indexes(mempool)
+    assert len(mempool) == 2
+
+
+def test_evict():
+    """test lowest gas_price tx and descendants are evicted"""
+    mempool = Mempool(350)
+    a = FakeTx(b'a', [(b'x', 0)], gas_price=10)
+    b = FakeTx(b'b', [(b'a', 0)], gas_price=200)
+    c = FakeTx(b'c', [(b'y', 0)], gas_price=100)
+    d = FakeTx(b'd', [(b'z', 0)], gas_price=50)
+    for tx in (a, b, c):
+        mempool[tx.hash] = tx
+    assert mempool.evict() == []
+    mempool[d.hash] = d
+    evicted = mempool.evict()
+    assert {tx.hash for tx in evicted} == {b'a', b'b'}
+    check_indexes(mempool)
+    assert set(mempool) == {b'c', b'd'}
+    assert mempool.total_size <= mempool.size_limit
+    # new tx with lowest gas_price is evicted itself
+    e = FakeTx(b'e', [(b'w', 0)], size=200, gas_price=1)
+    mempool[e.hash] = e
+    assert mempool.evict() == [e]
+    check_indexes(mempool)
+
+
+def test_pop_expired():
+    """test txs with old deadline are removed and deleted txs are skipped"""
+    mempool = Mempool(100000)
+    for i in range(100):
+        tx = FakeTx(bytes([i]), [(b'x', i)], deadline=1000 + i)
+        mempool[tx.hash] = tx
+    for i in range(0, 100, 3):
+        del mempool[bytes([i])]  # compact heap
+    check_indexes(mempool)
+    expired = mempool.pop_expired(1050)
+    assert sorted(tx.deadline for tx in expired) == [1000 + i for i in range(50) if i % 3 != 0]
+    check_indexes(mempool)
+    assert all(1050 <= tx.deadline for tx in mempool.values())
+    # re-added with new deadline is not expired by old record
+    tx = FakeTx(bytes([70]), [(b'x', 70)], deadline=2000)
+    mempool[tx.hash] = tx
+    expired = mempool.pop_expired(1075)
+    assert sorted(tx.deadline for tx in expired) == [1000 + i for i in range(50, 75) if i % 3 != 0 and i != 70]
+    assert mempool[bytes([70])] is tx
+    check_indexes(mempool)
+
+
+def test_mempool_file(tmp_path):
+    """test txs are recovered with signature and create_time"""
+    path = os.path.join(str(tmp_path), 'mempool.dat')
+    txs = list()
+    for i in range(3):
+        tx = TX.from_dict(tx={
+            'type': C.TX_TRANSFER,
+            'time': 100 + i,
+            'deadline': 10900 + i,
+            'inputs': [(bytes([i]) * 32, i)],
+            'gas_price': 100,
+            'gas_amount': 10000,
+            'message_type': C.MSG_PLAIN,
+            'message': 'hello {}'.format(i).encode(),
+        })
+        tx.signature = [(b'\x02' * 33, b'\x03' * 32, b'\x04' * 32)] * i
+        tx.R = b'\x05' * 32 if i == 1 else b''
+        tx.create_time = 1000.5 + i
+        txs.append(tx)
+    dump_mempool_file(path, txs)
+    assert not os.path.exists(path + '.tmp')
+    recovered = load_mempool_file(path)
+    assert len(recovered) == 3
+    for tx, new_tx in zip(txs, recovered):
+        assert new_tx.hash == tx.hash
+        assert new_tx.b == tx.b
+        assert [tuple(x) for x in new_tx.signature] == [tuple(x) for x in tx.signature]
+        assert new_tx.R == tx.R
+        assert new_tx.create_time == tx.create_time
+        assert new_tx.height is None
+    # empty and broken files
+    dump_mempool_file(path, [])
+    assert load_mempool_file(path) == []
+    with open(path, mode='bw') as fp:
+        fp.write(b'unknown format')
+    with pytest.raises(ValueError):
+        load_mempool_file(path)
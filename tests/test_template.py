@@ -0,0 +1,102 @@
+from bc4py.config import C
+from bc4py.database.mempool import Mempool
+from bc4py.database import tools
+from bc4py.user.network import template
+from bc4py.user.network.template import TemplateBuilder
+import asyncio
+
+
+class FakeTx(object):
+    """attributes of TX used by template"""
+
+    def __init__(self, txhash, inputs, gas_price=100):
+        self.hash = txhash
+        self.inputs = inputs
+        self.outputs = [(b'addr', 0, 1)]
+        self.type = C.TX_TRANSFER
+        self.height = None
+        self.gas_price = gas_price
+        self.gas_amount = 100
+        self.size = self.total_size = 100
+        self.deadline = 1000
+        self.create_time = 0.0
+
+
+class FakeBlock(object):
+
+    def __init__(self, blockhash, height, txs):
+        self.hash = blockhash
+        self.height = height
+        self.txs = txs
+
+
+class FakeDatabase(object):
+
+    def __init__(self, unused):
+        self.unused = unused
+
+    def read_unused_index(self, txhash, txindex):
+        return self.unused.get((txhash, txindex))
+
+
+class FakeChainBuilder(object):
+    """main chain on memory, best_chain is newest first"""
+
+    def __init__(self, unused):
+        self.db = FakeDatabase(unused)
+        self.best_chain = list()
+        self.best_block = None
+        self.memory_spent = dict()
+        self.memory_outputs = dict()
+
+    def connect(self, block):
+        for tx in block.txs:
+            tx.height = block.height
+            for pair in tx.inputs:
+                self.memory_spent[pair] = (tx.hash, block)
+            for index, output in enumerate(tx.outputs):
+                self.memory_outputs[(tx.hash, index)] = (output, block)
+        self.best_chain.insert(0, block)
+        self.best_block = block
+
+    def is_main_block(self, block):
+        return block in self.best_chain
+
+    def get_best_chain(self):
+        return self.best_block, self.best_chain
+
+
+class FakeTxBuilder(object):
+
+    def __init__(self):
+        self.unconfirmed = Mempool(100000)
+
+    def get_memorized_tx(self, txhash):
+        return self.unconfirmed.get(txhash)
+
+
+def test_double_spend_with_best_block(monkeypatch):
+    """test tx using same input with txs of the best block is not selected"""
+    unused = {(b'x' * 32, 0): (b'addr', 0, 1), (b'y' * 32, 0): (b'addr', 0, 1)}
+    chain_builder = FakeChainBuilder(unused)
+    tx_builder = FakeTxBuilder()
+    for module in (tools, template):
+        monkeypatch.setattr(module, 'chain_builder', chain_builder)
+        monkeypatch.setattr(module, 'tx_builder', tx_builder)
+    loop = asyncio.new_event_loop()
+    builder = TemplateBuilder()
+
+    # B1 spends x, C spends x too and D is valid
+    chain_builder.connect(FakeBlock(b'b1', 100, [FakeTx(b'a', [(b'x' * 32, 0)])]))
+    for tx in (FakeTx(b'c', [(b'x' * 32, 0)], gas_price=200), FakeTx(b'd', [(b'y' * 32, 0)])):
+        tx_builder.unconfirmed[tx.hash] = tx
+    block_template = loop.run_until_complete(builder.update())
+    assert block_template.previous_hash == b'b1'
+    assert [tx.hash for tx in block_template.txs] == [b'd']
+
+    # B2 is not related to C, C is not valid yet
+    chain_builder.connect(FakeBlock(b'b2', 101, [FakeTx(b'e', [(b'z' * 32, 0)])]))
+    block_template = loop.run_until_complete(builder.update())
+    assert block_template.previous_hash == b'b2'
+    assert [tx.hash for tx in block_template.txs] == [b'd']
+    loop.close()
@@ -0,0 +1,37 @@
+from bc4py.database.txcache import TxCache, TX_OVERHEAD_SIZE
+
+
+class FakeTx(object):
+
+    def __init__(self, txhash, size):
+        self.hash = txhash
+        self.total_size = size
+
+
+def test_byte_budget():
+    """test least recently used txs are evicted by total bytes"""
+    cache = TxCache(max_size=3 * (TX_OVERHEAD_SIZE + 100))
+    for i in range(3):
+        cache.put(FakeTx(bytes([i]), 100))
+    assert len(cache) == 3
+    assert cache.size == 3 * (TX_OVERHEAD_SIZE + 100)
+    # recently used is kept
+    assert cache.get(b'\x00').hash == b'\x00'
+    cache.put(FakeTx(b'\x03', 100))
+    assert b'\x01' not in cache
+    assert b'\x00' in cache
+    # large tx evicts some txs
+    cache.put(FakeTx(b'\x04', 2 * (TX_OVERHEAD_SIZE + 100) - TX_OVERHEAD_SIZE))
+    assert list(cache.txs) == [b'\x03', b'\x04']
+    assert cache.size <= cache.max_size
+    # duplicated put is not counted
+    cache.put(FakeTx(b'\x03', 100))
+    assert cache.size == 3 * (TX_OVERHEAD_SIZE + 100)
+    cache.remove(b'\x04')
+    cache.remove(b'\x04')
+    assert cache.size == TX_OVERHEAD_SIZE + 100
+    # tx over max_size is not kept
+    cache.put(FakeTx(b'\x05', cache.max_size))
+    assert len(cache) == 0 and cache.size == 0
+    assert cache.get(b'\x05') is None
+    assert cache.getinfo()['hit'] == 1
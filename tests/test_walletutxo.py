@@ -0,0 +1,294 @@
+from bc4py.config import C, V
+from bc4py.database.create import generate_utxo_table
+from bc4py.database.mempool import Mempool
+from bc4py.database.walletutxo import WalletUTXO
+from bc4py.database import tools
+from bc4py_extension import PyAddress
+from aiosqlite import connect
+import asyncio
+import pytest
+import os
+
+
+class FakeTx(object):
+
+    def __init__(self, txhash, inputs, outputs, txtype=C.TX_TRANSFER, height=None):
+        self.hash = txhash
+        self.inputs = inputs
+        self.outputs = outputs
+        self.type = txtype
+        self.height = height
+        self.gas_price = 100
+        self.total_size = 100
+        self.deadline = 1000
+
+
+class FakeBlock(object):
+
+    def __init__(self, blockhash, height, txs):
+        self.hash = blockhash
+        self.height = height
+        self.txs = txs
+        for tx in txs:
+            tx.height = height
+
+
+def get_address(i):
+    return PyAddress.from_binary(V.BECH32_HRP, bytes([C.ADDR_NORMAL_VER]) + bytes([i]) * 20)
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def open_db(path):
+    db = await connect(path)
+    cur = await db.cursor()
+    await generate_utxo_table(cur)
+    await db.commit()
+    return db, cur
+
+
+@pytest.fixture
+def hrp(monkeypatch):
+    monkeypatch.setattr(V, 'BECH32_HRP', 'test')
+
+
+def test_spend_in_same_block(tmp_path, hrp):
+    """test output created and spent by one block is not recoded"""
+    me, other = get_address(1), get_address(2)
+
+    async def check():
+        db, cur = await open_db(os.path.join(str(tmp_path), 'account.db'))
+        utxo = WalletUTXO()
+        tx1 = FakeTx(b'1' * 32, [(b'0' * 32, 0)], [(me, 0, 10), (me, 0, 20)])
+        tx2 = FakeTx(b'2' * 32, [(tx1.hash, 0)], [(other, 0, 10)])
+        utxo.put_memory_tx(tx1)
+        await utxo.apply_block(cur, FakeBlock(b'b' * 32, 1, [tx1, tx2]), lambda x: x == me)
+        await utxo.commit_tip(cur)
+        await db.commit()
+        assert list(utxo.unspents) == [(tx1.hash, 1)]
+        assert len(utxo.memory) == 0
+        # spent by next block
+        tx3 = FakeTx(b'3' * 32, [(tx1.hash, 1)], [(other, 0, 20)])
+        await utxo.apply_block(cur, FakeBlock(b'c' * 32, 2, [tx3]), lambda x: x == me)
+        await utxo.commit_tip(cur)
+        await db.commit()
+        assert len(utxo.unspents) == 0
+        new_utxo = WalletUTXO()
+        await new_utxo.load(cur, {1: b'b' * 32, 2: b'c' * 32}.get)
+        assert len(new_utxo.unspents) == 0
+        assert (new_utxo.height, new_utxo.blockhash) == (2, b'c' * 32)
+        await db.close()
+
+    run(check())
+
+
+def test_rebuild_missing_tip(tmp_path, hrp):
+    """test unspents are removed when the last block is not on database"""
+    me = get_address(1)
+
+    async def check():
+        db, cur = await open_db(os.path.join(str(tmp_path), 'account.db'))
+        utxo = WalletUTXO()
+        tx = FakeTx(b'1' * 32, [], [(me, 0, 10)])
+        await utxo.apply_block(cur, FakeBlock(b'b' * 32, 5, [tx]), lambda x: x == me)
+        await utxo.commit_tip(cur)
+        await db.commit()
+        # same tip
+        utxo = WalletUTXO()
+        await utxo.load(cur, {5: b'b' * 32}.get)
+        assert utxo.unspents == {(tx.hash, 0): (me, 5, C.TX_TRANSFER, 0, 10)}
+        # database is rebuilt and the tip is missing
+        utxo = WalletUTXO()
+        await utxo.load(cur, dict().get)
+        await db.commit()
+        assert (utxo.height, utxo.blockhash, utxo.uuid) == (-1, None, 0)
+        assert len(utxo.unspents) == 0
+        utxo = WalletUTXO()
+        await utxo.load(cur, dict().get)
+        assert utxo.height == -1 and len(utxo.unspents) == 0
+        await db.close()
+
+    run(check())
+
+
+def test_rescan_after_uuid(tmp_path, hrp):
+    """test scanned unspents are written with next batch and the pool id is kept"""
+    me = get_address(1)
+
+    async def check():
+        db, cur = await open_db(os.path.join(str(tmp_path), 'account.db'))
+        utxo = WalletUTXO()
+        utxo.put_unspents([(b'1' * 32, 0, me, 3, C.TX_TRANSFER, 0, 10)], uuid=7)
+        assert utxo.uuid == 7 and len(utxo.dirty) == 1
+        # not written before the batch
+        await db.commit()
+        new_utxo = WalletUTXO()
+        await new_utxo.load(cur, dict().get)
+        assert new_utxo.uuid == 0 and len(new_utxo.unspents) == 0
+        # scanned unspent spent by the batch is not written
+        utxo.put_unspents([(b'2' * 32, 0, me, 3, C.TX_TRANSFER, 0, 20)], uuid=8)
+        tx = FakeTx(b'3' * 32, [(b'2' * 32, 0)], [])
+        await utxo.apply_block(cur, FakeBlock(b'b' * 32, 4, [tx]), lambda x: x == me)
+        await utxo.commit_tip(cur)
+        await db.commit()
+        new_utxo = WalletUTXO()
+        await new_utxo.load(cur, {4: b'b' * 32}.get)
+        assert new_utxo.uuid == 8
+        assert list(new_utxo.unspents) == [(b'1' * 32, 0)]
+        await db.close()
+
+    run(check())
+
+
+class FakeDatabase(object):
+    """outputs and address index on database"""
+
+    def __init__(self):
+        self.txs = dict()
+        self.unused = dict()
+        self.address_idx = dict()
+
+    def add(self, tx, spent=()):
+        self.txs[tx.hash] = tx
+        for index, (address, coin_id, amount) in enumerate(tx.outputs):
+            pair = (tx.hash, index)
+            if pair not in spent:
+                self.unused[pair] = (address, coin_id, amount)
+            self.address_idx.setdefault(address, list()).append(
+                (None, tx.hash, index, coin_id, amount, pair in spent))
+
+    def read_unused_index(self, txhash, txindex):
+        return self.unused.get((txhash, txindex))
+
+    def read_address_idx_iter(self, address):
+        return iter(self.address_idx.get(address, ()))
+
+
+class FakeChainBuilder(object):
+
+    def __init__(self, root_block):
+        self.db = FakeDatabase()
+        self.root_block = root_block
+        self.best_chain = list()
+        self.best_block = root_block
+        self.main_hashes = set()
+        self.memory_txs = dict()
+        self.memory_spent = dict()
+        self.memory_outputs = dict()
+
+    def connect(self, block):
+        self.main_hashes.add(block.hash)
+        for tx in block.txs:
+            self.memory_txs[tx.hash] = block
+            for pair in tx.inputs:
+                self.memory_spent[pair] = (tx.hash, block)
+            for index, output in enumerate(tx.outputs):
+                self.memory_outputs[(tx.hash, index)] = (output, block)
+        self.best_chain.insert(0, block)
+        self.best_block = block
+
+    def is_main_block(self, block):
+        return block.hash in self.main_hashes
+
+
+class FakeTxBuilder(object):
+
+    def __init__(self, chain_builder):
+        self.chain_builder = chain_builder
+        self.unconfirmed = Mempool(100000)
+
+    def get_account_tx(self, txhash):
+        return self.chain_builder.db.txs.get(txhash)
+
+
+class FakeUserAccount(object):
+
+    def __init__(self, my_address):
+        self.my_address = my_address
+        self.utxo = WalletUTXO()
+
+    async def refresh_my_address(self, cur):
+        pass
+
+
+def collect(unspent_iter):
+    """list of get_my_unspents_iter result or get_unspents_iter generator"""
+    async def _collect():
+        if asyncio.iscoroutine(unspent_iter):
+            return sorted([x async for x in await unspent_iter], key=str)
+        return sorted([x async for x in unspent_iter], key=str)
+    return run(_collect())
+
+
+def test_same_with_legacy(monkeypatch, hrp):
+    """test wallet unspents are same with the legacy search and fork view is searched by legacy"""
+    me1, me2, other = get_address(1), get_address(2), get_address(3)
+    my_address = {me1: 0, me2: 0}
+    height = 100 + C.MATURE_HEIGHT
+    chain_builder = FakeChainBuilder(FakeBlock(b'r' * 32, height, []))
+    tx_builder = FakeTxBuilder(chain_builder)
+    user_account = FakeUserAccount(my_address)
+    for name, obj in (('chain_builder', chain_builder), ('tx_builder', tx_builder),
+                      ('user_account', user_account)):
+        monkeypatch.setattr(tools, name, obj)
+    monkeypatch.setattr(tools, 'fork_view_key', None)
+    monkeypatch.setattr(tools, 'target_address_cache', set(my_address))
+
+    async def read_all_pooled_address_set(cur, last_uuid):
+        return set(my_address)
+
+    monkeypatch.setattr(tools, 'read_all_pooled_address_set', read_all_pooled_address_set)
+    utxo = user_account.utxo
+
+    # database
+    d1 = FakeTx(b'd1'.ljust(32), [], [(me1, 0, 10), (other, 0, 1), (me2, 0, 11)], height=5)
+    d2 = FakeTx(b'd2'.ljust(32), [], [(me2, 0, 20)], height=6)  # spent by memory
+    d3 = FakeTx(b'd3'.ljust(32), [], [(me1, 0, 30)], txtype=C.TX_POW_REWARD, height=height - 1)
+    d4 = FakeTx(b'd4'.ljust(32), [], [(me1, 0, 40)], txtype=C.TX_POS_REWARD, height=7)
+    d5 = FakeTx(b'd5'.ljust(32), [], [(me2, 1, 50)], height=8)  # spent by unconfirmed
+    for tx in (d1, d2, d3, d4, d5):
+        chain_builder.db.add(tx, spent={(d1.hash, 2)})
+        for index, (address, coin_id, amount) in enumerate(tx.outputs):
+            if address in my_address and (tx.hash, index) != (d1.hash, 2):
+                utxo.unspents[(tx.hash, index)] = (address, tx.height, tx.type, coin_id, amount)
+
+    # memory main chain
+    m1 = FakeTx(b'm1'.ljust(32), [(d2.hash, 0)], [(me1, 0, 15), (other, 0, 5)])
+    m2 = FakeTx(b'm2'.ljust(32), [(m1.hash, 0)], [(me2, 0, 14)])
+    m3 = FakeTx(b'm3'.ljust(32), [], [(me1, 0, 60)], txtype=C.TX_POW_REWARD)  # immature
+    block1 = FakeBlock(b'b1'.ljust(32), height + 1, [m1])
+    block2 = FakeBlock(b'b2'.ljust(32), height + 2, [m2, m3])
+    chain_builder.connect(block1)
+    chain_builder.connect(block2)
+
+    # unconfirmed
+    u1 = FakeTx(b'u1'.ljust(32), [(d5.hash, 0)], [(me1, 0, 49)])
+    tx_builder.unconfirmed[u1.hash] = u1
+
+    # orphaned, dropped lazily
+    o1 = FakeTx(b'o1'.ljust(32), [(d1.hash, 0)], [(me1, 0, 9)], height=height + 2)
+    for tx in (m1, m2, m3, u1, o1):
+        utxo.put_memory_tx(tx)
+
+    legacy = collect(tools.get_unspents_iter(set(my_address)))
+    assert collect(tools.get_my_unspents_iter(None)) == legacy
+    assert o1.hash not in utxo.memory
+    assert {(x[2], x[3]) for x in legacy} == \
+        {(d1.hash, 0), (d4.hash, 0), (m2.hash, 0), (u1.hash, 0)}
+    # main chain given explicitly
+    assert collect(tools.get_my_unspents_iter(None, best_chain=chain_builder.best_chain)) == legacy
+
+    # fork view, a block connected to block1 not on main chain
+    f1 = FakeTx(b'f1'.ljust(32), [(d1.hash, 0)], [(me2, 0, 8)])
+    fork_block = FakeBlock(b'f'.ljust(32), height + 2, [f1])
+    fork_chain = [fork_block, block1]
+    fork = collect(tools.get_my_unspents_iter(None, best_chain=fork_chain))
+    assert fork == collect(tools.get_unspents_iter(set(my_address), best_chain=fork_chain))
+    assert (f1.hash, 0) in {(x[2], x[3]) for x in fork}
+    assert (d1.hash, 0) not in {(x[2], x[3]) for x in fork}